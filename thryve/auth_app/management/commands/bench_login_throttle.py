@@ -0,0 +1,61 @@
+import time
+from collections import Counter
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+
+from auth_app.views import user_login
+
+BENCH_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'bench-throttle': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'bench-throttle'},
+}
+# Effectively unlimited buckets, i.e. the behaviour before throttling existed
+UNLIMITED = {scope: (10 ** 9, 1) for scope in ('login-ip', 'login-email', 'register-ip')}
+
+
+class Command(BaseCommand):
+    help = ("Simulates a credential-stuffing burst of failed logins against the login view "
+            "and reports the worker CPU time spent with and without throttling.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--attempts', type=int, default=200,
+                            help='Number of login POSTs in the burst.')
+        parser.add_argument('--emails', type=int, default=20,
+                            help='Number of distinct emails the burst cycles through.')
+        parser.add_argument('--ips', type=int, default=1,
+                            help='Number of distinct client IPs the burst cycles through.')
+
+    def _burst(self, attempts, emails, ips):
+        factory = RequestFactory()
+        session_store = import_module(settings.SESSION_ENGINE).SessionStore
+        statuses = Counter()
+
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        for i in range(attempts):
+            request = factory.post('/login/', {
+                'username': f'victim{i % emails}@example.com',
+                'password': 'not-the-password',
+            }, REMOTE_ADDR=f'10.0.{(i % ips) // 256}.{(i % ips) % 256}')
+            request.session = session_store()
+            request.user = AnonymousUser()
+            statuses[user_login(request).status_code] += 1
+        return time.process_time() - cpu_start, time.perf_counter() - wall_start, statuses
+
+    def handle(self, *args, **options):
+        attempts = options['attempts']
+        for label, rates in (('throttle off', UNLIMITED), ('throttle on', None)):
+            overrides = {'CACHES': BENCH_CACHES, 'THROTTLE_CACHE': 'bench-throttle'}
+            if rates is not None:
+                overrides['AUTH_THROTTLE_RATES'] = rates
+            with override_settings(**overrides):
+                cpu, wall, statuses = self._burst(attempts, options['emails'], options['ips'])
+
+            self.stdout.write(
+                f"{label:>12}: {attempts} attempts, {statuses[200]} reached the hasher, "
+                f"{statuses[429]} rejected | CPU {cpu:.2f}s ({cpu / attempts * 1000:.1f} ms/attempt), "
+                f"wall {wall:.2f}s"
+            )
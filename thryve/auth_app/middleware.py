@@ -0,0 +1,15 @@
+from functools import partial
+
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.utils.functional import SimpleLazyObject
+
+from . import user_cache
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware that loads request.user through auth_app.user_cache."""
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: user_cache.get_user(request))
+        request.auser = partial(user_cache.auser, request)
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_app', '0002_customuser_phone_number'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customuser',
+            name='company_name',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from profile_app.models import BusinessProfile, UserProfile
+from . import user_cache
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def forget_saved_user(sender, instance, **kwargs):
+    user_cache.forget(instance.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+@receiver(post_save, sender=BusinessProfile)
+@receiver(post_delete, sender=BusinessProfile)
+def forget_profile_user(sender, instance, **kwargs):
+    # The cached user carries its profiles (see profile_app.middleware)
+    user_cache.forget(instance.user_id)
+
+
+@receiver(user_logged_out)
+def forget_logged_out_user(sender, request, user, **kwargs):
+    if user is not None:
+        user_cache.forget(user.pk)
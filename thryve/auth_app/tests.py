@@ -1,4 +1,12 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth import authenticate
 from .models import CustomUser, CustomUserManager
@@ -292,4 +300,145 @@ class AuthenticationViewsTest(TestCase):
         self.assertIsNone(authenticated_user)
 
         authenticated_user = authenticate(email='wrong@example.com', password='testpass123')
-        self.assertIsNone(authenticated_user)
\ No newline at end of file
+        self.assertIsNone(authenticated_user)
+
+@override_settings(AUTH_THROTTLE_RATES={
+    'login-ip': (3, 60),
+    'login-email': (2, 60),
+    'register-ip': (1, 60),
+})
+class ThrottleTest(TestCase):
+    def setUp(self):
+        caches[settings.THROTTLE_CACHE].clear()
+
+    def _login(self, email, ip='10.0.0.1'):
+        return self.client.post(reverse('login'), {'username': email, 'password': 'wrong'}, REMOTE_ADDR=ip)
+
+    def test_over_limit_login_is_rejected_before_authenticate(self):
+        """Test attempts beyond the email bucket get 429 without hashing the password"""
+        self.assertEqual(self._login('victim@example.com').status_code, 200)
+        self.assertEqual(self._login('victim@example.com').status_code, 200)
+
+        with patch('django.contrib.auth.forms.authenticate') as mock_authenticate:
+            response = self._login('victim@example.com')
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(int(response['Retry-After']) > 0)
+        self.assertContains(response, 'Too many attempts', status_code=429)
+        mock_authenticate.assert_not_called()
+
+    def test_ip_bucket_limits_rotating_emails(self):
+        """Test one IP cycling through emails is still limited"""
+        statuses = [self._login(f'user{i}@example.com').status_code for i in range(4)]
+        self.assertEqual(statuses, [200, 200, 200, 429])
+        self.assertEqual(self._login('other@example.com', ip='10.0.0.2').status_code, 200)
+
+    def _register(self, n):
+        return self.client.post(reverse('register'), {
+            'first_name': 'Reg', 'last_name': 'User', 'company_name': f'Reg Co {n}',
+            'email': f'reg{n}@example.com', 'phone_number': '912 345 6789',
+            'password1': 'Testpass123', 'password2': 'Testpass123',
+        })
+
+    def test_register_is_throttled(self):
+        """Test registrations share a per-IP bucket"""
+        self.assertEqual(self._register(1).status_code, 302)
+        response = self._register(2)
+        self.assertEqual(response.status_code, 429)
+        self.assertContains(response, 'Too many attempts', status_code=429)
+        self.assertFalse(CustomUser.objects.filter(email='reg2@example.com').exists())
+
+    def test_register_form_errors_do_not_spend_attempts(self):
+        """Test a registration form with errors is re-rendered without using up the IP's attempt"""
+        for _ in range(3):
+            self.assertEqual(self.client.post(reverse('register'), {'first_name': 'A'}).status_code, 200)
+        self.assertEqual(self._register(1).status_code, 302)
+
+    @override_settings(THROTTLE_TRUST_X_FORWARDED_FOR=True, THROTTLE_PROXY_COUNT=1)
+    def test_clients_behind_the_proxy_get_their_own_bucket(self):
+        """Test the address added by the proxy is used, not the proxy's own or a forged one"""
+        def login(email, forwarded):
+            return self.client.post(
+                reverse('login'), {'username': email, 'password': 'wrong'},
+                REMOTE_ADDR='10.0.0.254', HTTP_X_FORWARDED_FOR=forwarded,
+            ).status_code
+
+        # Forged entries left of the proxy's do not give the client a fresh bucket
+        statuses = [login(f'user{i}@example.com', f'1.1.1.{i}, 203.0.113.7') for i in range(4)]
+        self.assertEqual(statuses, [200, 200, 200, 429])
+        self.assertEqual(login('other@example.com', '203.0.113.8'), 200)
+
+
+SHARED_CACHE_DIR = tempfile.mkdtemp()
+
+
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db', CACHES={
+    **settings.CACHES,
+    'shared': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': SHARED_CACHE_DIR},
+})
+class CachedAuthenticationTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(SHARED_CACHE_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        caches[settings.AUTH_USER_CACHE].clear()
+        self.user = CustomUser.objects.create_user(
+            email='cached@example.com', password='testpass123',
+            first_name='Cached', last_name='User', company_name='Cache Co'
+        )
+        self.client.force_login(self.user)
+        self.url = reverse('profile_customization')
+
+    def _reads_of(self, table):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return [q['sql'] for q in queries.captured_queries if q['sql'].startswith('SELECT') and f'"{table}"' in q['sql']]
+
+    def test_warm_requests_skip_session_user_and_profile_reads(self):
+        """Test a repeat request reads neither the session, the user nor the profiles from the database"""
+        self._reads_of('auth_app_customuser')
+        self.assertEqual(self._reads_of('auth_app_customuser'), [])
+        self.assertEqual(self._reads_of('django_session'), [])
+        self.assertEqual(self._reads_of('profile_app_userprofile'), [])
+
+    def test_user_save_invalidates_cached_user(self):
+        """Test a saved user is reloaded on the next request"""
+        self.client.get(self.url)
+        self.user.first_name = 'Renamed'
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).context['user'].first_name, 'Renamed')
+
+    def test_password_change_logs_out_other_sessions(self):
+        """Test changing the password still ends sessions that were served from the cache"""
+        self.client.get(self.url)
+        self.user.set_password('another-pass-123')
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+
+    def test_logout_forgets_cached_user(self):
+        """Test logging out removes the cached user"""
+        self.client.get(self.url)
+        self.client.post(reverse('logout'))
+        self.assertIsNone(caches[settings.AUTH_USER_CACHE].get(f'auth-user:{self.user.pk}'))
+
+
+@override_settings(CACHES={
+    **settings.CACHES,
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'auth-locmem'},
+})
+class LocalUserCacheTest(TestCase):
+    def test_per_process_cache_is_not_used_for_users(self):
+        """Test the user is read from the database when the shared cache is local to each worker"""
+        user = CustomUser.objects.create_user(
+            email='local@example.com', password='testpass123',
+            first_name='Local', last_name='User', company_name='Local Co'
+        )
+        self.client.force_login(user)
+        self.client.get(reverse('profile_customization'))
+        self.assertIsNone(caches[settings.AUTH_USER_CACHE].get(f'auth-user:{user.pk}'))
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('profile_customization'))
+        self.assertTrue(any('"auth_app_customuser"' in q['sql'] for q in queries.captured_queries))
@@ -0,0 +1,90 @@
+"""
+Token-bucket throttling for login and registration.
+
+Each bucket holds up to `capacity` tokens and refills at `capacity / period`
+tokens per second; an attempt spends one token from every bucket it belongs
+to (per client IP and, for logins, per email). Attempts with an empty bucket
+are rejected before the form is validated, so they never reach the password
+hasher. Registration only spends its token once the form is valid: a typo in
+the form is not an attempt, but creating an account (and hashing) is.
+
+Buckets live in the THROTTLE_CACHE cache alias. Use a backend every worker
+shares (file or database) so the limit is global; locmem is per-process. The
+read-modify-write is not atomic, so concurrent attempts may overshoot a limit
+by a token or two, which is fine for shedding bursts.
+
+Behind a reverse proxy every request comes from the proxy's REMOTE_ADDR, so
+all clients would share one bucket. THROTTLE_TRUST_X_FORWARDED_FOR (on by
+default on Render) takes the client from X-Forwarded-For instead: the entry
+THROTTLE_PROXY_COUNT hops from the right, the one the nearest trusted proxy
+added, since anything left of it is sent by the client and can be forged.
+"""
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+# scope -> (capacity, period in seconds)
+DEFAULT_RATES = {
+    'login-ip': (20, 60),
+    'login-email': (5, 5 * 60),
+    'register-ip': (30, 60 * 60),
+}
+
+
+def _cache():
+    return caches[getattr(settings, 'THROTTLE_CACHE', 'default')]
+
+
+def _rate(scope):
+    return getattr(settings, 'AUTH_THROTTLE_RATES', {}).get(scope, DEFAULT_RATES[scope])
+
+
+def client_ip(request):
+    if getattr(settings, 'THROTTLE_TRUST_X_FORWARDED_FOR', False):
+        hops = [hop.strip() for hop in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if hop.strip()]
+        proxies = getattr(settings, 'THROTTLE_PROXY_COUNT', 1)
+        if hops:
+            return hops[-min(proxies, len(hops))]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _bucket_key(scope, ident):
+    digest = hashlib.sha256(ident.encode()).hexdigest()[:32]
+    return f'throttle:{scope}:{digest}'
+
+
+def _take(cache, scope, ident, now, spend=True):
+    """Spend a token (or only check for one); return 0 on success, else seconds until one is available."""
+    capacity, period = _rate(scope)
+    refill_rate = capacity / period
+    key = _bucket_key(scope, ident)
+
+    tokens, updated = cache.get(key, (capacity, now))
+    tokens = min(capacity, tokens + (now - updated) * refill_rate)
+    if tokens < 1:
+        if spend:
+            cache.set(key, (tokens, now), period)
+        return math.ceil((1 - tokens) / refill_rate)
+    if spend:
+        cache.set(key, (tokens - 1, now), period)
+    return 0
+
+
+def throttle(request, action, email=None, spend=True):
+    """
+    Spend one attempt of `action` ('login' or 'register') for this request, or
+    with spend=False only check that one is left.
+    Returns 0 if allowed, otherwise the Retry-After delay in seconds.
+    """
+    cache = _cache()
+    now = time.time()
+    buckets = [(f'{action}-ip', client_ip(request))]
+    if email and f'{action}-email' in DEFAULT_RATES:
+        buckets.append((f'{action}-email', email.strip().lower()))
+
+    # Spend from every bucket so a rotating-IP burst still drains the email bucket
+    waits = [_take(cache, scope, ident, now, spend) for scope, ident in buckets]
+    return max(waits)
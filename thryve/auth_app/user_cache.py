@@ -0,0 +1,84 @@
+"""
+Cached loading of the authenticated user.
+
+Django's AuthenticationMiddleware reads the user row on every request.
+CachedAuthenticationMiddleware first looks in the AUTH_USER_CACHE cache, where
+each user is stored together with the session auth hash (derived from the
+password hash) it was verified against. A hit only counts if the session
+carries that same hash, so changing the password still logs other sessions
+out; a miss falls back to django.contrib.auth.get_user and caches the result.
+
+profile_app.middleware re-stores the user once its profiles are loaded, so
+later requests get request.user.userprofile/businessprofile for free too.
+auth_app.signals drops the entry on user or profile writes and on logout.
+Those deletes only reach other workers through a shared cache, so while
+AUTH_USER_CACHE is a per-process LocMemCache every request reads the user
+from the database, as Django does.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.crypto import constant_time_compare
+
+CACHE_TIMEOUT = 15 * 60
+
+
+def _cache():
+    """The user cache, or None while it is local to this process."""
+    cache = caches[getattr(settings, 'AUTH_USER_CACHE', 'default')]
+    return None if isinstance(cache, LocMemCache) else cache
+
+
+def _key(user_id):
+    return f'auth-user:{user_id}'
+
+
+def _session_hash(request):
+    session = getattr(request, 'session', None)
+    return session.get(HASH_SESSION_KEY) if session is not None else None
+
+
+def remember(request, user):
+    """Cache `user` for the session hash of this request."""
+    cache, session_hash = _cache(), _session_hash(request)
+    if cache is not None and user.is_authenticated and session_hash:
+        cache.set(_key(user.pk), (session_hash, user), CACHE_TIMEOUT)
+
+
+def forget(*user_ids):
+    cache = _cache()
+    if cache is not None:
+        cache.delete_many([_key(user_id) for user_id in user_ids])
+
+
+def load_user(request):
+    cache, session = _cache(), request.session
+    user_id, session_hash = session.get(SESSION_KEY), _session_hash(request)
+    if (
+        cache is not None
+        and user_id is not None
+        and session_hash
+        and session.get(BACKEND_SESSION_KEY) in settings.AUTHENTICATION_BACKENDS
+    ):
+        cached = cache.get(_key(user_id))
+        if cached is not None and constant_time_compare(cached[0], session_hash):
+            return cached[1]
+
+    user = auth.get_user(request)
+    remember(request, user)
+    return user
+
+
+def get_user(request):
+    if not hasattr(request, '_cached_user'):
+        request._cached_user = load_user(request)
+    return request._cached_user
+
+
+async def auser(request):
+    if not hasattr(request, '_acached_user'):
+        request._acached_user = await sync_to_async(load_user)(request)
+    return request._acached_user
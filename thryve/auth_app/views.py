@@ -3,14 +3,34 @@ from django.shortcuts import render, redirect
 from django.views.decorators.cache import cache_control
 
 from .forms import RegistrationForm, LoginForm
-from django.contrib.auth import login, authenticate, logout
+from .throttle import throttle
+from django.contrib.auth import login, logout
 from django.db.models import Q
 
 
+def _throttled(request, template, form, retry_after):
+    response = render(request, template, {
+        'form': form,
+        'throttle_error': 'Too many attempts. Please wait a moment and try again.',
+    }, status=429)
+    response['Retry-After'] = str(retry_after)
+    return response
+
 def register (request):
     if request.method == 'POST':
+        # Checked before validation, but a token is only spent once the form
+        # is valid and the account (and its password hash) is about to be
+        # created. The form is re-rendered unbound since rendering a bound one
+        # would validate it.
+        retry_after = throttle(request, 'register', spend=False)
+        if retry_after:
+            form = RegistrationForm(initial=request.POST.dict())
+            return _throttled(request, 'accounts/register.html', form, retry_after)
         form = RegistrationForm(request.POST)
         if form.is_valid():
+            retry_after = throttle(request, 'register')
+            if retry_after:
+                return _throttled(request, 'accounts/register.html', form, retry_after)
             user = form.save()
             request.session['just_registered'] = True
             return redirect('login')
@@ -25,15 +45,16 @@ def user_login(request):
         return redirect('thryve_app:dashboard')
 
     if request.method == 'POST':
+        # Rejected attempts never reach authenticate(), which form validation runs
+        email = request.POST.get('username', '')
+        retry_after = throttle(request, 'login', email=email)
+        if retry_after:
+            return _throttled(request, 'accounts/login.html', LoginForm(initial={'username': email}), retry_after)
         form = LoginForm(request, request.POST)
         if form.is_valid():
-            email = form.cleaned_data['username']
-            password = form.cleaned_data['password']
-            user = authenticate(request, email=email, password=password)
-
-            if user is not None:
-                login(request, user)
-                return redirect('thryve_app:dashboard')
+            # The form already authenticated the user; don't hash the password twice
+            login(request, form.get_user())
+            return redirect('thryve_app:dashboard')
     else:
         form = LoginForm()
 
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking_app', '0004_alter_bookingrequest_unique_together'),
+        ('thryve_app', '0011_hot_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bookingrequest',
+            index=models.Index(fields=['sender', '-created_at'], name='booking_sender_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bookingrequest',
+            index=models.Index(fields=['receiver', '-created_at'], name='booking_receiver_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bookingrequest',
+            index=models.Index(condition=models.Q(('status', 'scheduled')), fields=['listing', 'proposed_start_date', 'proposed_end_date'], name='booking_listing_scheduled_idx'),
+        ),
+    ]
@@ -38,3 +38,14 @@ class BookingRequest(models.Model):
         constraints = [
             models.UniqueConstraint(fields=['listing', 'sender'], condition=models.Q(status='pending'), name='unique_pending_booking')
         ]
+        indexes = [
+            # Sent and received tabs, newest first
+            models.Index(fields=['sender', '-created_at'], name='booking_sender_created_idx'),
+            models.Index(fields=['receiver', '-created_at'], name='booking_receiver_created_idx'),
+            # Date-overlap check on create and the marketplace's "scheduled by others" filter
+            models.Index(
+                fields=['listing', 'proposed_start_date', 'proposed_end_date'],
+                condition=models.Q(status='scheduled'),
+                name='booking_listing_scheduled_idx',
+            ),
+        ]
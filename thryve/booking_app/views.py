@@ -1,14 +1,57 @@
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
-from django.views.decorators.cache import cache_control
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from django.db import models
+from thryve_app import cache_tags
+from thryve_app.activity import display_name, record_activity
+from thryve_app.conditional import conditional_page, version_time
+from thryve_app.fragments import render_fragments
 from thryve_app.models import Listing
+from thryve_app.query_budget import query_budget
 from .models import BookingRequest
 
+
+def _record_status_change(booking, actor):
+    """Log a booking status change in both parties' recent activity."""
+    other_id = booking.receiver_id if actor.pk == booking.sender_id else booking.sender_id
+    title = booking.listing.title
+    record_activity(f'booking.{booking.status}', actor, {
+        actor.pk: f"You {booking.status} the booking for {title}",
+        other_id: f"{display_name(actor)} {booking.status} the booking for {title}",
+    }, target_id=booking.pk)
+
+def render_booking_rows(kind, bookings):
+    """
+    Evaluate `bookings` and set `booking.row` to each one's cached row from
+    booking_app/fragments/<kind>_row.html. Rows show the listing, so they are
+    keyed on it too.
+    """
+    bookings = list(bookings)
+    rows = render_fragments(f'booking_app/fragments/{kind}_row.html', bookings, 'booking',
+                            related=lambda booking: [booking.listing])
+    for booking, row in zip(bookings, rows):
+        booking.row = row
+    return bookings
+
+
+def bookings_state(request):
+    """
+    Validator for conditional_page: the viewer's bookings tag (bumped on any
+    change to them, deletions included) and the newest booking and booked
+    listing, so a renamed listing shows up too.
+    """
+    version = cache_tags.version(f'user:{request.user.pk}:bookings')
+    latest = BookingRequest.objects.filter(
+        models.Q(sender=request.user) | models.Q(receiver=request.user)
+    ).aggregate(booking=models.Max('updated_at'), listing=models.Max('listing__updated_at'))
+    changed = [version_time(version), *(value for value in latest.values() if value is not None)]
+    return (version, latest['booking'], latest['listing']), max(changed)
+
+
 @login_required(login_url='login')
-@cache_control(no_cache=True, must_revalidate=True, no_store=True)
+@conditional_page(bookings_state)
+@query_budget(10)
 def bookings(request):
     # Get search query
     search_query = request.GET.get('q', '').strip()
@@ -51,13 +94,17 @@ def bookings(request):
             models.Q(created_at__date__icontains=search_query)
         )
 
+    sent_requests = render_booking_rows('sent', sent_requests)
+    scheduled_requests = render_booking_rows('scheduled', scheduled_requests)
+    received_requests = render_booking_rows('received', received_requests)
+
     context = {
         'sent_requests': sent_requests,
         'scheduled_requests': scheduled_requests,
         'received_requests': received_requests,
-        'sent_count': sent_requests.count(),
-        'scheduled_count': scheduled_requests.count(),
-        'received_count': received_requests.count(),
+        'sent_count': len(sent_requests),
+        'scheduled_count': len(scheduled_requests),
+        'received_count': len(received_requests),
         'search_query': search_query,
     }
 
@@ -106,7 +153,7 @@ def create_booking_request(request):
             }, status=409)
 
         # 2. Create the Booking Request
-        BookingRequest.objects.create(
+        booking = BookingRequest.objects.create(
             listing=listing,
             sender=sender,
             receiver=receiver,
@@ -114,6 +161,10 @@ def create_booking_request(request):
             proposed_end_date=end_date,
             message=message
         )
+        record_activity('booking.requested', sender, {
+            sender.pk: f"You requested to book {listing.title}",
+            receiver.pk: f"{display_name(sender)} requested to book {listing.title}",
+        }, target_id=booking.pk)
 
         # NOTE: Notification logic (e.g., email to receiver) should be implemented here later.
 
@@ -136,10 +187,10 @@ def cancel_booking_request(request, booking_id):
     try:
         # First try to get as sender (for pending requests)
         try:
-            booking = BookingRequest.objects.get(id=booking_id, sender=request.user, status='pending')
+            booking = BookingRequest.objects.select_related('listing').get(id=booking_id, sender=request.user, status='pending')
         except BookingRequest.DoesNotExist:
             # If not found as sender, try as receiver (for scheduled requests)
-            booking = BookingRequest.objects.filter(
+            booking = BookingRequest.objects.select_related('listing').filter(
                 id=booking_id,
                 status='scheduled'
             ).filter(
@@ -148,6 +199,7 @@ def cancel_booking_request(request, booking_id):
 
         booking.status = 'cancelled'
         booking.save()
+        _record_status_change(booking, request.user)
 
         return JsonResponse({
             'success': True,
@@ -166,7 +218,7 @@ def cancel_booking_request(request, booking_id):
 def decline_booking_request(request, booking_id):
     """Handles POST requests to decline a booking request."""
     try:
-        booking = BookingRequest.objects.get(id=booking_id, receiver=request.user)
+        booking = BookingRequest.objects.select_related('listing').get(id=booking_id, receiver=request.user)
 
         # Only allow declining pending requests
         if booking.status != 'pending':
@@ -174,6 +226,7 @@ def decline_booking_request(request, booking_id):
 
         booking.status = 'declined'
         booking.save()
+        _record_status_change(booking, request.user)
 
         return JsonResponse({
             'success': True,
@@ -192,7 +245,7 @@ def decline_booking_request(request, booking_id):
 def schedule_booking_request(request, booking_id):
     """Handles POST requests to schedule a booking request."""
     try:
-        booking = BookingRequest.objects.get(id=booking_id, receiver=request.user)
+        booking = BookingRequest.objects.select_related('listing').get(id=booking_id, receiver=request.user)
 
         # Only allow scheduling pending requests
         if booking.status != 'pending':
@@ -200,6 +253,7 @@ def schedule_booking_request(request, booking_id):
 
         booking.status = 'scheduled'
         booking.save()
+        _record_status_change(booking, request.user)
 
         return JsonResponse({
             'success': True,
@@ -218,7 +272,7 @@ def schedule_booking_request(request, booking_id):
 def complete_booking_request(request, booking_id):
     """Handles POST requests to complete a scheduled booking."""
     try:
-        booking = BookingRequest.objects.filter(
+        booking = BookingRequest.objects.select_related('listing').filter(
             id=booking_id,
             status='scheduled'
         ).filter(
@@ -227,6 +281,7 @@ def complete_booking_request(request, booking_id):
 
         booking.status = 'completed'
         booking.save()
+        _record_status_change(booking, request.user)
 
         return JsonResponse({
             'success': True,
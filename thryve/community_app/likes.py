@@ -0,0 +1,127 @@
+# community_app/likes.py
+"""
+Like toggling as a handful of conditional statements.
+
+Instead of get_object_or_404 + get_or_create/delete + COUNT, a toggle is:
+
+    DELETE the (post, user) like           -> removed? then it was an unlike
+    INSERT ... SELECT ... ON CONFLICT      -> only if the post exists, never raises
+    UPDATE the stored counter, read it     -> new count without re-counting
+
+all inside one transaction. The statements bypass the PostLike model signals,
+so `post_like_toggled` is sent instead for other listeners (live updates).
+
+Idempotency keys are claimed with an add() on the 'shared' cache before the
+toggle runs, so a retry landing on another worker, or a duplicate arriving
+while the first is still running, never toggles a second time.
+"""
+import time
+
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import CommunityPost, PostLike
+from .signals import post_like_toggled
+
+# How long a client idempotency key remembers its response
+IDEMPOTENCY_TTL = 10 * 60
+# Longest a duplicate waits for the request that claimed its key
+IDEMPOTENCY_WAIT = 5
+_PENDING = 'pending'
+_POLL_INTERVAL = 0.05
+
+
+def _apply_delta(cursor, post_id, delta):
+    """Adjust likes_count and return the stored value after the change."""
+    post_table = connection.ops.quote_name(CommunityPost._meta.db_table)
+    sql = f"UPDATE {post_table} SET likes_count = likes_count + %s, score_dirty = %s WHERE id = %s"
+    if delta < 0:
+        sql += " AND likes_count > 0"
+    cursor.execute(sql, [delta, True, post_id])
+    return _read_count(cursor, post_id)
+
+
+def _read_count(cursor, post_id):
+    post_table = connection.ops.quote_name(CommunityPost._meta.db_table)
+    cursor.execute(f"SELECT likes_count FROM {post_table} WHERE id = %s", [post_id])
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def toggle_like(post_id, user):
+    """
+    Like or unlike a post for `user`.
+    Returns (action, new_count), or None if the post does not exist.
+    """
+    qn = connection.ops.quote_name
+    like_table = qn(PostLike._meta.db_table)
+    post_table = qn(CommunityPost._meta.db_table)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {like_table} WHERE post_id = %s AND user_id = %s",
+            [post_id, user.pk],
+        )
+        if cursor.rowcount:
+            action, delta = 'unliked', -1
+        else:
+            cursor.execute(
+                f"INSERT INTO {like_table} (post_id, user_id, created_at) "
+                f"SELECT id, %s, %s FROM {post_table} WHERE id = %s "
+                f"ON CONFLICT (post_id, user_id) DO NOTHING",
+                [user.pk, connection.ops.adapt_datetimefield_value(timezone.now()), post_id],
+            )
+            if not cursor.rowcount:
+                # Either the post is gone or a concurrent request already liked it
+                new_count = _read_count(cursor, post_id)
+                return None if new_count is None else ('liked', new_count)
+            action, delta = 'liked', 1
+
+        new_count = _apply_delta(cursor, post_id, delta)
+        post_like_toggled.send(sender=PostLike, post_id=post_id, user=user, action=action)
+
+    return action, new_count
+
+
+def current_like(post_id, user):
+    """(action, count) describing the like as it stands, or None if the post does not exist."""
+    count = CommunityPost.objects.filter(pk=post_id).values_list('likes_count', flat=True).first()
+    if count is None:
+        return None
+    liked = PostLike.objects.filter(post_id=post_id, user=user).exists()
+    return ('liked' if liked else 'unliked'), count
+
+
+def toggle_like_once(post_id, user, idempotency_key=None):
+    """
+    toggle_like() that remembers its result per (user, idempotency_key), so a
+    retried request returns the first response instead of toggling again.
+    """
+    if not idempotency_key:
+        return toggle_like(post_id, user)
+
+    cache = caches['shared']
+    cache_key = f'like-toggle:{user.pk}:{post_id}:{idempotency_key[:64]}'
+    if not cache.add(cache_key, _PENDING, IDEMPOTENCY_TTL):
+        # Already claimed: return its result once the first request stores it
+        deadline = time.monotonic() + IDEMPOTENCY_WAIT
+        result = cache.get(cache_key)
+        while result == _PENDING and time.monotonic() < deadline:
+            time.sleep(_POLL_INTERVAL)
+            result = cache.get(cache_key)
+        if result is not None and result != _PENDING:
+            return result
+        # Still running (or failed): report the like as it stands, never toggle again
+        return current_like(post_id, user)
+
+    try:
+        result = toggle_like(post_id, user)
+    except Exception:
+        cache.delete(cache_key)
+        raise
+    if result is None:
+        cache.delete(cache_key)
+    else:
+        cache.set(cache_key, result, IDEMPOTENCY_TTL)
+    return result
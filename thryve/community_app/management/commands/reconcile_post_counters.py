@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from community_app.models import CommunityPost, PostLike, Comment
+
+
+def _count_subquery(model):
+    """Correlated COUNT(*) of `model` rows pointing at the outer post."""
+    counts = (
+        model.objects.filter(post=OuterRef('pk'))
+        .order_by()
+        .values('post')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+class Command(BaseCommand):
+    help = "Repairs drift in CommunityPost.likes_count/comments_count from the PostLike and Comment tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of drifted posts to fix per UPDATE statement.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report how many posts have drifted.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        drifted_ids = list(
+            CommunityPost.objects.annotate(
+                actual_likes=_count_subquery(PostLike),
+                actual_comments=_count_subquery(Comment),
+            ).exclude(
+                likes_count=F('actual_likes'),
+                comments_count=F('actual_comments'),
+            ).order_by().values_list('pk', flat=True)
+        )
+
+        if options['dry_run']:
+            self.stdout.write(f"{len(drifted_ids)} post(s) have drifted counters.")
+            return
+
+        for start in range(0, len(drifted_ids), batch_size):
+            with transaction.atomic():
+                CommunityPost.objects.filter(pk__in=drifted_ids[start:start + batch_size]).update(
+                    likes_count=_count_subquery(PostLike),
+                    comments_count=_count_subquery(Comment),
+                    # The comment count is part of the cached post card
+                    updated_at=timezone.now(),
+                )
+
+        self.stdout.write(self.style.SUCCESS(f"Reconciled counters on {len(drifted_ids)} post(s)."))
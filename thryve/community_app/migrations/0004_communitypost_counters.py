@@ -0,0 +1,47 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:26
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    CommunityPost = apps.get_model('community_app', 'CommunityPost')
+    PostLike = apps.get_model('community_app', 'PostLike')
+    Comment = apps.get_model('community_app', 'Comment')
+
+    def count_of(model):
+        counts = (
+            model.objects.filter(post=OuterRef('pk'))
+            .order_by()
+            .values('post')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+    CommunityPost.objects.update(
+        likes_count=count_of(PostLike),
+        comments_count=count_of(Comment),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community_app', '0003_comment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='communitypost',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='communitypost',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
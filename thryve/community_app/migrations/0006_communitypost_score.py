@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community_app', '0005_timelineentry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='communitypost',
+            name='score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='communitypost',
+            name='score_dirty',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddIndex(
+            model_name='communitypost',
+            index=models.Index(fields=['-score'], name='communitypost_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='communitypost',
+            index=models.Index(condition=models.Q(('score_dirty', True)), fields=['id'], name='communitypost_dirty_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community_app', '0006_communitypost_score'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='communitypost',
+            index=models.Index(fields=['-created_at'], name='communitypost_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='communitypost',
+            index=models.Index(fields=['user', '-created_at'], name='communitypost_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='postlike',
+            index=models.Index(fields=['user', 'post'], name='postlike_user_post_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community_app', '0007_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='communitypost',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
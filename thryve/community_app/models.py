@@ -9,27 +9,33 @@ class CommunityPost(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='community_posts')
     content = models.TextField(help_text="The main text content of the post.")
     created_at = models.DateTimeField(auto_now_add=True)
-    
+    # Also moved when its comments change; keys the cached post card
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Denormalized counters, kept in sync by community_app.signals and
+    # repaired in bulk by `manage.py reconcile_post_counters`
+    likes_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+
+    # Trending rank, recomputed by community_app.trending for dirty posts only
+    score = models.FloatField(default=0)
+    score_dirty = models.BooleanField(default=True)
+
     class Meta:
         ordering = ['-created_at']
         verbose_name = "Community Post"
         verbose_name_plural = "Community Posts"
+        indexes = [
+            models.Index(fields=['-score'], name='communitypost_score_idx'),
+            models.Index(fields=['id'], condition=models.Q(score_dirty=True), name='communitypost_dirty_idx'),
+            models.Index(fields=['-created_at'], name='communitypost_created_idx'),
+            # Timeline backfill and read-time fan-out per author
+            models.Index(fields=['user', '-created_at'], name='communitypost_user_created_idx'),
+        ]
 
     def __str__(self):
         return f"Post by {self.user.username} - {self.content[:50]}..."
 
-    @property
-    def likes_count(self):
-        # Count of related PostLike objects
-        return self.likes.count()
-
-    # --- NEW PROPERTY: Comment Count ---
-    @property
-    def comments_count(self):
-        # Count of related Comment objects
-        return self.comments.count()
-    # -----------------------------------
-
 
 class PostLike(models.Model):
     post = models.ForeignKey(CommunityPost, on_delete=models.CASCADE, related_name='likes')
@@ -40,6 +46,10 @@ class PostLike(models.Model):
         # Ensures a user can only like a single post once
         unique_together = ('post', 'user') 
         verbose_name = "Post Like"
+        indexes = [
+            # "Which of these posts did I like" on the feed
+            models.Index(fields=['user', 'post'], name='postlike_user_post_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} liked Post {self.post.id}"
@@ -67,4 +77,24 @@ class Comment(models.Model):
 
     def __str__(self):
         return f'Comment by {self.user.username} on Post {self.post.id}'
-# -----------------------------
\ No newline at end of file
+# -----------------------------
+
+class TimelineEntry(models.Model):
+    """A post materialized into one user's personalized timeline (see community_app.timeline)."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='timeline_entries')
+    post = models.ForeignKey(CommunityPost, on_delete=models.CASCADE, related_name='timeline_entries')
+    # Copied from the post so a page of the timeline is a single index range scan
+    created_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-created_at', '-post']
+        unique_together = ('user', 'post')
+        indexes = [
+            # Matches the (created_at, post) cursor of timeline_page
+            models.Index(fields=['user', '-created_at', '-post'], name='timeline_user_created_idx'),
+        ]
+        verbose_name = "Timeline Entry"
+        verbose_name_plural = "Timeline Entries"
+
+    def __str__(self):
+        return f"Post {self.post_id} on {self.user_id}'s timeline"
@@ -0,0 +1,71 @@
+# community_app/signals.py
+
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from thryve_app.jobs import enqueue
+from thryve_app.models import Connection
+from .models import CommunityPost, PostLike, Comment
+from .timeline import fan_out_post, link_timelines, unlink_timelines
+
+# Sent by community_app.likes, which writes PostLike rows without model signals.
+# Receives post_id, user and action ('liked' or 'unliked').
+post_like_toggled = Signal()
+
+
+def _bump(post_id, field, delta, **changes):
+    """
+    Adjusts a stored counter on a post with a single UPDATE ... SET x = x + delta,
+    flagging the post for the next trending score run in the same statement.
+    """
+    posts = CommunityPost.objects.filter(pk=post_id)
+    if delta < 0:
+        # Never go below zero if the counter has already drifted
+        posts = posts.filter(**{f'{field}__gt': 0})
+    posts.update(**{field: F(field) + delta}, score_dirty=True, **changes)
+
+
+@receiver(post_save, sender=PostLike)
+def increment_likes_count(sender, instance, created, **kwargs):
+    if created:
+        _bump(instance.post_id, 'likes_count', 1)
+
+
+@receiver(post_delete, sender=PostLike)
+def decrement_likes_count(sender, instance, **kwargs):
+    _bump(instance.post_id, 'likes_count', -1)
+
+
+# Comments are part of the cached post card (thryve_app.fragments), so every
+# comment change also moves the post's updated_at. Likes are not: the like
+# button is filled in per viewer.
+@receiver(post_save, sender=Comment)
+def increment_comments_count(sender, instance, created, **kwargs):
+    if created:
+        _bump(instance.post_id, 'comments_count', 1, updated_at=timezone.now())
+    else:
+        CommunityPost.objects.filter(pk=instance.post_id).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comments_count(sender, instance, **kwargs):
+    _bump(instance.post_id, 'comments_count', -1, updated_at=timezone.now())
+
+
+@receiver(post_save, sender=CommunityPost)
+def fan_out_new_post(sender, instance, created, **kwargs):
+    if created:
+        enqueue(fan_out_post, post_id=instance.pk)
+
+
+@receiver(post_save, sender=Connection)
+def link_connection_timelines(sender, instance, created, **kwargs):
+    if created:
+        enqueue(link_timelines, user_id=instance.user1_id, other_id=instance.user2_id)
+
+
+@receiver(post_delete, sender=Connection)
+def unlink_connection_timelines(sender, instance, **kwargs):
+    enqueue(unlink_timelines, user_id=instance.user1_id, other_id=instance.user2_id)
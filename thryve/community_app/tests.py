@@ -1,3 +1,281 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
 
-# Create your tests here.
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from auth_app.models import CustomUser
+from thryve_app.models import Connection
+from .models import CommunityPost, PostLike, Comment, TimelineEntry
+from .likes import toggle_like
+from .timeline import timeline_page
+from .trending import trending_score, update_trending_scores
+
+
+class PostCounterTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            email='poster@example.com',
+            password='testpass123',
+            first_name='Post',
+            last_name='Er',
+            company_name='Poster Co'
+        )
+        self.post = CommunityPost.objects.create(user=self.user, content='Hello SMEs')
+        cache.clear()
+        caches['shared'].clear()
+
+    def test_like_and_comment_writes_update_counters(self):
+        """Test PostLike/Comment writes keep the stored counters in sync"""
+        like = PostLike.objects.create(post=self.post, user=self.user)
+        comment = Comment.objects.create(post=self.post, user=self.user, content='First!')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+        self.assertEqual(self.post.comments_count, 1)
+
+        like.delete()
+        comment.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+        self.assertEqual(self.post.comments_count, 0)
+
+    def test_failed_comment_leaves_no_counter_or_activity_behind(self):
+        """Test a comment whose activity events fail to save is rolled back with its counter bump"""
+        self.client.force_login(self.user)
+        url = reverse('community_app:add_comment', args=[self.post.id])
+        with patch('community_app.views.record_activity', side_effect=DatabaseError), self.assertRaises(DatabaseError):
+            self.client.post(url, {'content': 'Lost'}, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 0)
+        self.assertFalse(Comment.objects.exists())
+
+    def test_toggle_like_view_returns_stored_count(self):
+        """Test toggling a like via AJAX returns the updated stored count"""
+        self.client.force_login(self.user)
+        url = reverse('community_app:toggle_post_like', args=[self.post.id])
+
+        response = self.client.post(url, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.json()['new_count'], 1)
+
+        response = self.client.post(url, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.json()['new_count'], 0)
+
+    def test_toggle_like_with_same_idempotency_key_is_applied_once(self):
+        """Test a retried like request with the same key does not toggle again"""
+        self.client.force_login(self.user)
+        url = reverse('community_app:toggle_post_like', args=[self.post.id])
+        headers = {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest', 'HTTP_X_IDEMPOTENCY_KEY': 'click-1'}
+
+        first = self.client.post(url, **headers).json()
+        retry = self.client.post(url, **headers).json()
+        self.assertEqual(first, retry)
+        self.assertEqual(PostLike.objects.filter(post=self.post).count(), 1)
+
+    def test_duplicate_of_a_claimed_key_does_not_toggle(self):
+        """Test a request arriving while its key is still being applied reports the like instead of toggling"""
+        self.client.force_login(self.user)
+        url = reverse('community_app:toggle_post_like', args=[self.post.id])
+        caches['shared'].add(f'like-toggle:{self.user.pk}:{self.post.id}:click-2', 'pending')
+
+        with patch('community_app.likes.IDEMPOTENCY_WAIT', 0):
+            response = self.client.post(url, HTTP_X_REQUESTED_WITH='XMLHttpRequest', HTTP_X_IDEMPOTENCY_KEY='click-2')
+        self.assertEqual(response.json(), {'status': 'success', 'action': 'unliked', 'new_count': 0})
+        self.assertFalse(PostLike.objects.filter(post=self.post).exists())
+
+    def test_toggle_like_service_statements(self):
+        """Test a toggle runs without re-counting and reports missing posts"""
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(toggle_like(self.post.id, self.user), ('liked', 1))
+        self.assertFalse(any('COUNT(' in query['sql'].upper() for query in queries))
+        self.assertEqual(toggle_like(self.post.id, self.user), ('unliked', 0))
+        self.assertIsNone(toggle_like(self.post.id + 100, self.user))
+
+    def test_feed_does_not_count_per_post(self):
+        """Test the feed renders counters without a COUNT query per post"""
+        self.client.force_login(self.user)
+        url = reverse('community_app:community_feed')
+        self.client.get(url)
+        cache.clear()  # render every card again, not from the fragment cache
+        with CaptureQueriesContext(connection) as one_post:
+            self.client.get(url)
+
+        for i in range(5):
+            CommunityPost.objects.create(user=self.user, content=f'Post {i}')
+        cache.clear()
+        with CaptureQueriesContext(connection) as six_posts:
+            self.client.get(url)
+
+        self.assertEqual(len(one_post), len(six_posts))
+
+    @override_settings(STORAGES={
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    })
+    def test_cached_post_cards_are_personalized(self):
+        """Test cached post cards show owner menus and likes per viewer and follow comment edits"""
+        other = CustomUser.objects.create_user(email='reader@example.com', password='testpass123')
+        comment = Comment.objects.create(post=self.post, user=self.user, content='First!')
+        PostLike.objects.create(post=self.post, user=self.user)
+        url = reverse('community_app:community_feed')
+        self.client.force_login(self.user)
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertFalse(any('community_app_comment' in query['sql'] for query in queries))
+        self.assertContains(response, f'post-menu-{self.post.id}')
+        self.assertContains(response, f'comment-menu-{comment.id}')
+        self.assertContains(response, 'fas fa-heart')
+
+        comment.content = 'Edited!'
+        comment.save()
+        self.client.force_login(other)
+        response = self.client.get(url)
+        self.assertContains(response, 'Edited!')
+        self.assertNotContains(response, f'post-menu-{self.post.id}')
+        self.assertNotContains(response, f'comment-menu-{comment.id}')
+        self.assertContains(response, 'far fa-heart')
+        self.assertNotContains(response, '<!--viewer:')
+
+    def test_reconcile_post_counters_repairs_drift(self):
+        """Test the reconcile command fixes counters that have drifted"""
+        PostLike.objects.create(post=self.post, user=self.user)
+        CommunityPost.objects.filter(pk=self.post.pk).update(likes_count=7, comments_count=3)
+
+        out = StringIO()
+        call_command('reconcile_post_counters', stdout=out)
+        self.assertIn('1 post(s)', out.getvalue())
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+        self.assertEqual(self.post.comments_count, 0)
+
+
+class TimelineTest(TestCase):
+    def setUp(self):
+        self.alice = CustomUser.objects.create_user(
+            email='alice@example.com', password='testpass123',
+            first_name='Alice', last_name='A', company_name='Alice Co'
+        )
+        self.bob = CustomUser.objects.create_user(
+            email='bob@example.com', password='testpass123',
+            first_name='Bob', last_name='B', company_name='Bob Co'
+        )
+        self.carol = CustomUser.objects.create_user(
+            email='carol@example.com', password='testpass123',
+            first_name='Carol', last_name='C', company_name='Carol Co'
+        )
+        Connection.objects.create(user1=self.alice, user2=self.bob)
+        call_command('run_worker', once=True)
+        cache.clear()
+
+    def test_new_post_is_fanned_out_to_connections(self):
+        """Test the worker copies a new post onto the author's and connections' timelines"""
+        post = CommunityPost.objects.create(user=self.bob, content='Hello network')
+        call_command('run_worker', once=True)
+
+        self.assertTrue(TimelineEntry.objects.filter(user=self.alice, post=post).exists())
+        self.assertTrue(TimelineEntry.objects.filter(user=self.bob, post=post).exists())
+        self.assertFalse(TimelineEntry.objects.filter(user=self.carol, post=post).exists())
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_high_degree_author_is_merged_at_read_time(self):
+        """Test posts from authors over the fan-out limit still appear on the timeline"""
+        CommunityPost.objects.create(user=self.alice, content='Own post')
+        post = CommunityPost.objects.create(user=self.bob, content='From a busy account')
+        call_command('run_worker', once=True)
+        self.assertFalse(TimelineEntry.objects.filter(user=self.alice, post=post).exists())
+
+        posts, _ = timeline_page(self.alice)
+        self.assertIn(post, posts)
+
+    def test_pages_do_not_skip_posts_sharing_a_timestamp(self):
+        """Test paging through posts created at the same instant returns each exactly once"""
+        posts = [CommunityPost.objects.create(user=self.bob, content=f'Bulk {i}') for i in range(5)]
+        same_time = timezone.now()
+        CommunityPost.objects.filter(pk__in=[post.pk for post in posts]).update(created_at=same_time)
+        call_command('run_worker', once=True)
+        TimelineEntry.objects.filter(post__in=posts).update(created_at=same_time)
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = timeline_page(self.alice, before=cursor, limit=2)
+            seen.extend(page)
+            if cursor is None:
+                break
+        self.assertCountEqual(seen, posts)
+
+        self.client.force_login(self.alice)
+        response = self.client.get(reverse('community_app:community_feed'), {
+            'tab': 'network', 'before': same_time.isoformat(), 'before_id': posts[2].pk,
+        })
+        self.assertEqual(list(response.context['posts']), [posts[1], posts[0]])
+
+    def test_network_tab_only_shows_connections(self):
+        """Test the My Network tab excludes posts from unconnected users"""
+        mine = CommunityPost.objects.create(user=self.bob, content='Connected post')
+        other = CommunityPost.objects.create(user=self.carol, content='Stranger post')
+        call_command('run_worker', once=True)
+
+        self.client.force_login(self.alice)
+        response = self.client.get(reverse('community_app:community_feed'), {'tab': 'network'})
+        self.assertIn(mine, response.context['posts'])
+        self.assertNotIn(other, response.context['posts'])
+
+    def test_removing_connection_clears_timeline(self):
+        """Test disconnecting removes the other user's posts from the timeline"""
+        CommunityPost.objects.create(user=self.bob, content='Soon gone')
+        call_command('run_worker', once=True)
+
+        Connection.objects.filter(user1=self.alice, user2=self.bob).delete()
+        call_command('run_worker', once=True)
+        self.assertFalse(TimelineEntry.objects.filter(user=self.alice, post__user=self.bob).exists())
+
+
+class TrendingTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            email='trend@example.com', password='testpass123',
+            first_name='Trend', last_name='Setter', company_name='Trend Co'
+        )
+
+    def test_only_touched_posts_are_rescored(self):
+        """Test the trending job rescores dirty posts and skips untouched ones"""
+        quiet = CommunityPost.objects.create(user=self.user, content='Quiet post')
+        busy = CommunityPost.objects.create(user=self.user, content='Busy post')
+        self.assertEqual(update_trending_scores(), 2)
+        self.assertEqual(update_trending_scores(), 0)
+
+        PostLike.objects.create(post=busy, user=self.user)
+        Comment.objects.create(post=busy, user=self.user, content='Nice')
+        self.assertEqual(update_trending_scores(), 1)
+
+        quiet.refresh_from_db()
+        busy.refresh_from_db()
+        self.assertGreater(busy.score, quiet.score)
+
+    def test_score_decays_with_age(self):
+        """Test a newer post outranks an older one with the same engagement"""
+        now = timezone.now()
+        older = trending_score(4, 0, now - timedelta(days=2))
+        newer = trending_score(4, 0, now)
+        self.assertGreater(newer, older)
+        # Four half-lives of age are worth 2**4 times the engagement (1 + 79 == 16 * (1 + 4))
+        self.assertAlmostEqual(trending_score(79, 0, now - timedelta(days=2)), newer, places=6)
+
+    def test_trending_tab_orders_by_score(self):
+        """Test the Trending tab lists posts by their stored score"""
+        low = CommunityPost.objects.create(user=self.user, content='Low')
+        high = CommunityPost.objects.create(user=self.user, content='High')
+        CommunityPost.objects.filter(pk=low.pk).update(score=1, score_dirty=False)
+        CommunityPost.objects.filter(pk=high.pk).update(score=5, score_dirty=False)
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('community_app:community_feed'), {'tab': 'trending'})
+        self.assertEqual(list(response.context['posts']), [high, low])
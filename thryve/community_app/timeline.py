@@ -0,0 +1,137 @@
+# community_app/timeline.py
+"""
+Personalized "My Network" timeline, built with fan-out-on-write.
+
+Creating a post enqueues `fan_out_post`, which copies it into the TimelineEntry
+rows of the author and every connection. Authors with more than
+TIMELINE_FANOUT_LIMIT connections are skipped at write time; readers merge
+their posts in at read time instead (fan-out-on-read), so one very connected
+business never has to write thousands of rows per post.
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from thryve_app.models import Connection
+from .models import CommunityPost, TimelineEntry
+
+PAGE_SIZE = 20
+# How many of a new connection's recent posts get copied into a timeline
+BACKFILL_SIZE = 50
+HIGH_DEGREE_CACHE_SECONDS = 300
+
+
+def fanout_limit():
+    return getattr(settings, 'TIMELINE_FANOUT_LIMIT', 500)
+
+
+def _add_entries(user_ids, posts):
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post_id=post_id, created_at=created_at)
+            for user_id in user_ids
+            for post_id, created_at in posts
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+def fan_out_post(post_id):
+    """Background job: push a new post onto the author's and their connections' timelines."""
+    post = CommunityPost.objects.filter(pk=post_id).values_list('user_id', 'created_at').first()
+    if post is None:
+        return
+    author_id, created_at = post
+
+    recipients = {author_id}
+    connected_ids = Connection.connected_user_ids(author_id)
+    if len(connected_ids) <= fanout_limit():
+        recipients |= connected_ids
+
+    _add_entries(recipients, [(post_id, created_at)])
+
+
+def link_timelines(user_id, other_id):
+    """Background job: after two users connect, copy each one's recent posts to the other."""
+    for owner_id, author_id in ((user_id, other_id), (other_id, user_id)):
+        if len(Connection.connected_user_ids(author_id)) > fanout_limit():
+            # Merged in at read time anyway
+            continue
+        recent = CommunityPost.objects.filter(user_id=author_id).values_list('id', 'created_at')[:BACKFILL_SIZE]
+        _add_entries([owner_id], recent)
+
+
+def unlink_timelines(user_id, other_id):
+    """Remove each user's posts from the other's timeline after they disconnect."""
+    TimelineEntry.objects.filter(user_id=user_id, post__user_id=other_id).delete()
+    TimelineEntry.objects.filter(user_id=other_id, post__user_id=user_id).delete()
+
+
+def high_degree_connection_ids(user, connected_ids):
+    """Connections of `user` whose posts are not fanned out and must be read on demand."""
+    cache_key = f'timeline:high-degree:{user.pk}'
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    degrees = Counter()
+    if connected_ids:
+        degrees.update(dict(
+            Connection.objects.filter(user1_id__in=connected_ids)
+            .values_list('user1_id').annotate(total=Count('id')).order_by()
+        ))
+        degrees.update(dict(
+            Connection.objects.filter(user2_id__in=connected_ids)
+            .values_list('user2_id').annotate(total=Count('id')).order_by()
+        ))
+    limit = fanout_limit()
+    high_degree = {user_id for user_id, degree in degrees.items() if degree > limit}
+
+    cache.set(cache_key, high_degree, HIGH_DEGREE_CACHE_SECONDS)
+    return high_degree
+
+
+def _older_than(before, created_field, id_field):
+    """Rows after the (created_at, id) cursor `before` in newest-first order."""
+    created_at, last_id = before
+    return Q(**{f'{created_field}__lt': created_at}) | Q(**{created_field: created_at, f'{id_field}__lt': last_id})
+
+
+def timeline_page(user, before=None, limit=PAGE_SIZE, queryset=None):
+    """
+    Return (posts, next_cursor) for one page of the user's timeline.
+    `before` is the (created_at, id) of the last post on the previous page;
+    the id breaks ties between posts created at the same instant (bulk
+    seeding, fan-out backfills), which a timestamp alone would skip.
+    """
+    if queryset is None:
+        queryset = CommunityPost.objects.all()
+
+    entries = TimelineEntry.objects.filter(user=user).order_by('-created_at', '-post_id')
+    if before is not None:
+        entries = entries.filter(_older_than(before, 'created_at', 'post_id'))
+    post_ids = set(entries.values_list('post_id', flat=True)[:limit])
+
+    connected_ids = Connection.connected_user_ids(user)
+    if not post_ids and before is None:
+        # Nothing materialized yet (e.g. no worker has run): fan out on read
+        read_time_authors = connected_ids | {user.pk}
+    else:
+        read_time_authors = high_degree_connection_ids(user, connected_ids)
+
+    if read_time_authors:
+        pulled = CommunityPost.objects.filter(user_id__in=read_time_authors).order_by('-created_at', '-id')
+        if before is not None:
+            pulled = pulled.filter(_older_than(before, 'created_at', 'id'))
+        post_ids.update(pulled.values_list('id', flat=True)[:limit])
+
+    posts = sorted(
+        queryset.filter(pk__in=post_ids),
+        key=lambda post: (post.created_at, post.pk),
+        reverse=True,
+    )[:limit]
+    next_cursor = (posts[-1].created_at, posts[-1].pk) if len(posts) == limit else None
+    return posts, next_cursor
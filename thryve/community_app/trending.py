@@ -0,0 +1,49 @@
+# community_app/trending.py
+"""
+Time-decayed "Trending" ranking.
+
+A post's score is log2 of its weighted engagement plus its creation time
+measured in half-lives. Ordering by this score is the same as ordering by
+engagement * 2 ** (-age / half_life), but a score never has to change just
+because time passes, so the periodic job only recomputes posts whose likes or
+comments changed (flagged `score_dirty` by community_app.signals).
+"""
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from .models import CommunityPost
+
+# Fixed reference point; scores only need to be comparable with each other
+EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+HALF_LIFE_SECONDS = 12 * 60 * 60
+COMMENT_WEIGHT = 2
+BATCH_SIZE = 500
+
+
+def trending_score(likes_count, comments_count, created_at):
+    engagement = 1 + likes_count + COMMENT_WEIGHT * comments_count
+    return math.log2(engagement) + (created_at - EPOCH).total_seconds() / HALF_LIFE_SECONDS
+
+
+def update_trending_scores(batch_size=BATCH_SIZE):
+    """Periodic job: rescore posts touched since the last run. Returns the number rescored."""
+    rescored = 0
+    while True:
+        post_ids = list(
+            CommunityPost.objects.filter(score_dirty=True)
+            .order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not post_ids:
+            return rescored
+
+        # Clear the flag before reading the counters: a like that lands after
+        # this point marks the post dirty again and it is picked up next run.
+        CommunityPost.objects.filter(pk__in=post_ids).update(score_dirty=False)
+        posts = list(
+            CommunityPost.objects.filter(pk__in=post_ids)
+            .only('pk', 'likes_count', 'comments_count', 'created_at')
+        )
+        for post in posts:
+            post.score = trending_score(post.likes_count, post.comments_count, post.created_at)
+        CommunityPost.objects.bulk_update(posts, ['score'], batch_size=batch_size)
+        rescored += len(posts)
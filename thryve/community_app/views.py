@@ -2,20 +2,87 @@
 
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse, HttpResponseBadRequest, HttpResponseForbidden 
+from django.http import JsonResponse, HttpResponseBadRequest, HttpResponseForbidden, Http404
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.template.backends.utils import csrf_input
+from django.template.loader import render_to_string
+from django.utils.dateparse import parse_datetime
+from django.utils.text import Truncator
+from thryve_app.activity import display_name, record_activity
+from thryve_app.fragments import personalize, render_fragments
+from thryve_app.query_budget import query_budget
 from .forms import CommunityPostForm, CommentForm 
 from .models import CommunityPost, PostLike, Comment 
+from .likes import toggle_like_once
+from .timeline import timeline_page
+
+TRENDING_LIMIT = 50
+
+
+def _prefetch_comments(posts):
+    prefetch_related_objects(posts, 'comments__user__userprofile')
+
+
+def _post_overlays(post, viewer_id, liked, csrf):
+    """What the viewer sees differently in a cached post card (see thryve_app.fragments)."""
+    def post_menu(user_id):
+        if user_id != viewer_id:
+            return ''
+        return render_to_string('community_app/fragments/post_menu.html', {'post': post})
+
+    def comment_menu(user_id, comment_id):
+        if user_id != viewer_id:
+            return ''
+        return render_to_string('community_app/fragments/comment_menu.html',
+                                {'post_id': post.id, 'comment_id': comment_id})
+
+    return {
+        'post-menu': post_menu,
+        'like': lambda: render_to_string('community_app/fragments/like_button.html', {'post': post, 'liked': liked}),
+        'comment-menu': comment_menu,
+        'csrf': lambda: csrf,
+    }
+
+
+def render_post_cards(request, posts, liked_posts_ids, comment_form):
+    """
+    Set `post.card` for each post: its cached card, comments included, with
+    the viewer's like button, owner menus and CSRF token filled in.
+    """
+    cards = render_fragments('community_app/fragments/post_card.html', posts, 'post',
+                             context={'comment_form': comment_form}, prepare=_prefetch_comments)
+    viewer_id = str(request.user.pk)
+    csrf = csrf_input(request)
+    for post, card in zip(posts, cards):
+        post.card = personalize(card, _post_overlays(post, viewer_id, post.id in liked_posts_ids, csrf))
+
 
 # -----------------------------------------------------------
 # CHANGE 1: Added login_url='login' to community_feed
 @login_required(login_url='login')
+@query_budget(10)
 def community_feed(request):
     """Displays the community feed page."""
     
-    # Pre-fetch comments to reduce database queries (N+1 problem)
-    posts = CommunityPost.objects.all().select_related('user__userprofile').prefetch_related('comments__user__userprofile')
+    # Comments are only prefetched for posts whose card is not cached (see render_post_cards)
+    posts = CommunityPost.objects.all().select_related('user__userprofile')
     form = CommunityPostForm()
     comment_form = CommentForm() 
+
+    # "My Network" tab reads the user's materialized timeline one page at a time
+    active_tab = request.GET.get('tab', 'all')
+    next_cursor = None
+    if active_tab == 'network':
+        before = parse_datetime(request.GET.get('before', ''))
+        before_id = request.GET.get('before_id', '')
+        cursor = (before, int(before_id)) if before and before_id.isdigit() else None
+        posts, next_cursor = timeline_page(request.user, before=cursor, queryset=posts)
+    elif active_tab == 'trending':
+        # Precomputed, indexed score (see community_app.trending)
+        posts = posts.order_by('-score')[:TRENDING_LIMIT]
+    else:
+        active_tab = 'all'
     
     # Determine which posts the current user has liked
     liked_posts_ids = []
@@ -25,12 +92,18 @@ def community_feed(request):
             post__in=posts
         ).values_list('post_id', flat=True)
 
+    posts = list(posts)
+    liked_posts_ids = set(liked_posts_ids)
+    render_post_cards(request, posts, liked_posts_ids, comment_form)
+
     context = {
         'posts': posts,
         'form': form,
         'comment_form': comment_form, 
         'liked_posts_ids': list(liked_posts_ids),
         'user': request.user, # Explicitly pass the user for the template condition
+        'active_tab': active_tab,
+        'next_cursor': next_cursor.isoformat() if next_cursor else None,
     }
     return render(request, 'community_app/community.html', context)
 
@@ -45,6 +118,9 @@ def create_community_post(request):
             post = form.save(commit=False)
             post.user = request.user
             post.save()
+            record_activity('post.created', request.user, {
+                request.user.pk: f"You posted \"{Truncator(post.content).chars(60)}\"",
+            }, target_id=post.pk)
             return redirect('community_app:community_feed')
     
     return redirect('community_app:community_feed')
@@ -56,20 +132,16 @@ def create_community_post(request):
 def toggle_post_like(request, post_id):
     """Toggles a like on a post (handled via AJAX)."""
     if request.method == 'POST' and request.headers.get('x-requested-with') == 'XMLHttpRequest':
-        post = get_object_or_404(CommunityPost, id=post_id)
-        
-        like, created = PostLike.objects.get_or_create(post=post, user=request.user)
-        
-        if created:
-            action = 'liked'
-        else:
-            like.delete()
-            action = 'unliked'
-        
+        # Conditional INSERT/DELETE + counter UPDATE; retries with the same key are free
+        result = toggle_like_once(post_id, request.user, request.headers.get('X-Idempotency-Key'))
+        if result is None:
+            raise Http404("Post not found.")
+        action, new_count = result
+
         return JsonResponse({
             'status': 'success',
             'action': action,
-            'new_count': post.likes_count 
+            'new_count': new_count
         })
     return HttpResponseBadRequest("Invalid request.")
 
@@ -110,16 +182,22 @@ def add_comment(request, post_id):
             comment = form.save(commit=False)
             comment.post = post
             comment.user = request.user
-            comment.save()
+            excerpt = Truncator(post.content).chars(60)
+            summaries = {request.user.pk: f"You commented on \"{excerpt}\""}
+            if post.user_id != request.user.pk:
+                summaries[post.user_id] = f"{display_name(request.user)} commented on your post \"{excerpt}\""
+            # The comment, the counter bump its post_save signal makes and the
+            # activity events are committed together or not at all
+            with transaction.atomic():
+                comment.save()
+                post.refresh_from_db(fields=['comments_count'])
+                record_activity('post.commented', request.user, summaries, target_id=post.pk)
 
             user_full_name = f"{request.user.first_name} {request.user.last_name}"
             # NEW: Use display_name if available
-            if hasattr(request.user, 'userprofile') and request.user.userprofile.display_name:
-                user_full_name = request.user.userprofile.display_name
-            try:
-                business_name = request.user.businessprofile.company_name
-            except AttributeError:
-                business_name = "SME User" 
+            if request.profiles.user_profile.display_name:
+                user_full_name = request.profiles.user_profile.display_name
+            business_name = request.profiles.business_profile.company_name or "SME User" 
             
             # NOTE: We now return comment.id (comment.pk) for the frontend delete function
             return JsonResponse({
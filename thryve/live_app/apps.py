@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class LiveAppConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'live_app'
+
+    def ready(self):
+        # Connect the publishers for likes, comments and booking changes
+        from . import signals  # noqa: F401
@@ -0,0 +1,181 @@
+"""
+Event sources for the live SSE stream.
+
+Two backends, selected with the LIVE_EVENTS_BACKEND setting:
+
+* ``memory`` - an in-process pub/sub broker. Write paths publish after commit
+  and every subscribed stream in the same process receives the event
+  immediately. Only correct when a single ASGI worker serves all clients.
+* ``poll`` - each stream polls the database every LIVE_EVENTS_POLL_INTERVAL
+  seconds for changed post counters and booking statuses. Works across any
+  number of workers, at the cost of one or two cheap queries per tick.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from booking_app.models import BookingRequest
+from community_app.models import CommunityPost
+
+# Events buffered per subscriber before new ones are dropped
+QUEUE_SIZE = 100
+# Idle sources yield None this often so the stream can send a keep-alive
+HEARTBEAT_SECONDS = 15
+
+
+def post_channel(post_id):
+    return f'post:{post_id}'
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+def post_counts_event(post_id, likes_count, comments_count):
+    return ('post.counts', {
+        'post_id': post_id,
+        'likes_count': likes_count,
+        'comments_count': comments_count,
+    })
+
+
+def booking_status_event(booking):
+    return ('booking.status', {
+        'booking_id': booking.pk,
+        'status': booking.status,
+        'status_display': booking.get_status_display(),
+    })
+
+
+class Subscription:
+    def __init__(self, broker, channels):
+        self.broker = broker
+        self.channels = channels
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def deliver(self, event):
+        # Runs on the subscriber's event loop
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            pass
+
+    async def get(self, timeout=None):
+        """Next event, or None if nothing arrived within `timeout` seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    """Thread-safe in-process pub/sub; publishers may run in any thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, channels):
+        subscription = Subscription(self, channels)
+        with self._lock:
+            for channel in channels:
+                self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+    def publish(self, channel, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+
+    def has_subscribers(self, channel):
+        with self._lock:
+            return bool(self._subscribers.get(channel))
+
+
+broker = Broker()
+
+
+def backend():
+    return getattr(settings, 'LIVE_EVENTS_BACKEND', 'memory')
+
+
+async def memory_events(user_id, post_ids):
+    subscription = broker.subscribe(
+        [user_channel(user_id)] + [post_channel(post_id) for post_id in post_ids]
+    )
+    try:
+        while True:
+            yield await subscription.get(timeout=HEARTBEAT_SECONDS)
+    finally:
+        subscription.close()
+
+
+def _post_counts(post_ids):
+    return {
+        post_id: (likes, comments)
+        for post_id, likes, comments in CommunityPost.objects.filter(pk__in=post_ids)
+        .values_list('pk', 'likes_count', 'comments_count')
+    }
+
+
+def _booking_changes(user_id, since):
+    return list(
+        BookingRequest.objects.filter(
+            Q(sender_id=user_id) | Q(receiver_id=user_id),
+            updated_at__gt=since,
+        ).order_by('updated_at')
+    )
+
+
+async def poll_events(user_id, post_ids, interval=None):
+    interval = interval or getattr(settings, 'LIVE_EVENTS_POLL_INTERVAL', 3)
+    counts = await sync_to_async(_post_counts)(post_ids) if post_ids else {}
+    since = timezone.now()
+    idle = 0
+    while True:
+        await asyncio.sleep(interval)
+        events = []
+
+        if post_ids:
+            latest = await sync_to_async(_post_counts)(post_ids)
+            for post_id, post_counts in latest.items():
+                if counts.get(post_id) != post_counts:
+                    events.append(post_counts_event(post_id, *post_counts))
+            counts = latest
+
+        for booking in await sync_to_async(_booking_changes)(user_id, since):
+            since = booking.updated_at
+            events.append(booking_status_event(booking))
+
+        idle = 0 if events else idle + interval
+        if idle >= HEARTBEAT_SECONDS:
+            idle = 0
+            events.append(None)
+        for event in events:
+            yield event
+
+
+def events_for(user_id, post_ids):
+    """Async iterator of (event, data) tuples for one stream; None means idle."""
+    if backend() == 'poll':
+        return poll_events(user_id, post_ids)
+    return memory_events(user_id, post_ids)
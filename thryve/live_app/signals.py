@@ -0,0 +1,58 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from booking_app.models import BookingRequest
+from community_app.models import CommunityPost, PostLike, Comment
+from community_app.signals import post_like_toggled
+from .broker import (
+    backend, broker, booking_status_event, post_channel, post_counts_event, user_channel,
+)
+
+
+def _publish_post_counts(post_id):
+    channel = post_channel(post_id)
+    if not broker.has_subscribers(channel):
+        return
+    counts = CommunityPost.objects.filter(pk=post_id).values_list('likes_count', 'comments_count').first()
+    if counts is not None:
+        broker.publish(channel, post_counts_event(post_id, *counts))
+
+
+def _on_post_activity(instance):
+    if backend() == 'memory':
+        post_id = instance.post_id
+        transaction.on_commit(lambda: _publish_post_counts(post_id))
+
+
+@receiver(post_save, sender=PostLike)
+@receiver(post_save, sender=Comment)
+def publish_post_activity_saved(sender, instance, created, **kwargs):
+    if created:
+        _on_post_activity(instance)
+
+
+@receiver(post_delete, sender=PostLike)
+@receiver(post_delete, sender=Comment)
+def publish_post_activity_deleted(sender, instance, **kwargs):
+    _on_post_activity(instance)
+
+
+@receiver(post_like_toggled)
+def publish_like_toggled(sender, post_id, **kwargs):
+    if backend() == 'memory':
+        transaction.on_commit(lambda: _publish_post_counts(post_id))
+
+
+@receiver(post_save, sender=BookingRequest)
+def publish_booking_status(sender, instance, **kwargs):
+    if backend() != 'memory':
+        return
+    event = booking_status_event(instance)
+    channels = {user_channel(instance.sender_id), user_channel(instance.receiver_id)}
+
+    def publish():
+        for channel in channels:
+            broker.publish(channel, event)
+
+    transaction.on_commit(publish)
@@ -0,0 +1,54 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.test import TestCase
+from django.urls import reverse
+
+from auth_app.models import CustomUser
+from community_app.models import CommunityPost
+from .broker import Broker, poll_events, post_counts_event
+
+
+class BrokerTest(TestCase):
+    async def test_publish_reaches_subscriber(self):
+        """Test an event published on a channel is delivered to its subscribers"""
+        broker = Broker()
+        subscription = broker.subscribe(['user:1', 'post:5'])
+        event = post_counts_event(5, 2, 1)
+
+        broker.publish('post:5', event)
+        broker.publish('post:6', post_counts_event(6, 0, 0))
+        self.assertEqual(await subscription.get(timeout=1), event)
+        self.assertIsNone(await subscription.get(timeout=0.01))
+
+        subscription.close()
+        self.assertFalse(broker.has_subscribers('post:5'))
+
+
+class PollEventsTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            email='live@example.com', password='testpass123',
+            first_name='Live', last_name='User', company_name='Live Co'
+        )
+        self.post = CommunityPost.objects.create(user=self.user, content='Watch me')
+
+    async def test_poll_backend_reports_changed_counts(self):
+        """Test the polling fallback emits an event when a post's counters change"""
+        events = poll_events(self.user.pk, [self.post.pk], interval=0.01)
+        try:
+            # Start the generator so it snapshots the current counts
+            first = asyncio.ensure_future(events.__anext__())
+            await asyncio.sleep(0.005)
+            await sync_to_async(
+                CommunityPost.objects.filter(pk=self.post.pk).update
+            )(likes_count=3)
+            self.assertEqual(await first, post_counts_event(self.post.pk, 3, 0))
+        finally:
+            await events.aclose()
+
+    def test_stream_is_not_served_under_wsgi(self):
+        """Test the SSE endpoint declines with 204 when not running under ASGI"""
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('live_app:events'))
+        self.assertEqual(response.status_code, 204)
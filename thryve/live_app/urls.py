@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+app_name = 'live_app'
+
+urlpatterns = [
+    path('events/', views.live_events, name='events'),
+]
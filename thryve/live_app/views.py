@@ -0,0 +1,54 @@
+import json
+
+from django.contrib.auth.decorators import login_required
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+
+from .broker import events_for
+
+# Upper bound on the number of posts one stream can watch
+MAX_POSTS = 100
+
+
+def _format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _stream(user_id, post_ids):
+    yield "retry: 5000\n\n"
+    events = events_for(user_id, post_ids)
+    try:
+        async for item in events:
+            if item is None:
+                # Comment line so proxies keep the idle connection open
+                yield ": keep-alive\n\n"
+            else:
+                yield _format_event(*item)
+    finally:
+        await events.aclose()
+
+
+def _parse_post_ids(raw):
+    post_ids = []
+    for value in raw.split(','):
+        value = value.strip()
+        if value.isdigit():
+            post_ids.append(int(value))
+    return post_ids[:MAX_POSTS]
+
+
+@login_required(login_url='login')
+async def live_events(request):
+    """Server-sent events for like/comment counts on visible posts and the user's booking statuses."""
+    if not isinstance(request, ASGIRequest):
+        # A long-lived stream would tie up a whole WSGI worker; 204 tells
+        # EventSource not to reconnect.
+        return HttpResponse(status=204)
+
+    user = await request.auser()
+    post_ids = _parse_post_ids(request.GET.get('posts', ''))
+
+    response = StreamingHttpResponse(_stream(user.pk, post_ids), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
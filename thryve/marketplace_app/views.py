@@ -3,10 +3,16 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.exceptions import ValidationError
 from django.db.models import Q, OuterRef, Subquery
-from django.views.decorators.cache import cache_control
+from django.template.loader import render_to_string
 
 from .forms import ListingForm, validate_images_count, validate_image_file
+from thryve_app import cache_tags
+from thryve_app.activity import record_activity
+from thryve_app.conditional import conditional_page, version_time
+from thryve_app.fragments import personalize, render_fragments
+from thryve_app.listings import MARKETPLACE_PAGE_SIZE, paginate_listings, prefetch_images
 from thryve_app.models import Listing, ListingImage
+from thryve_app.query_budget import query_budget
 from booking_app.models import BookingRequest
 
 LISTING_TYPES = [
@@ -16,8 +22,38 @@ LISTING_TYPES = [
 ]
 
 
+def render_listing_cards(listings):
+    """
+    Set `listing.card` for each listing: its cached card with the viewer's
+    booking status (`user_booking_status`) filled in.
+    """
+    cards = render_fragments('marketplace_app/fragments/listing_card.html', listings, 'listing',
+                             prepare=prefetch_images)
+    # Only a handful of distinct statuses, so each badge is rendered once
+    badges = {}
+    for listing, card in zip(listings, cards):
+        status = listing.user_booking_status
+        if status not in badges:
+            badges[status] = render_to_string('marketplace_app/fragments/booking_status.html', {'status': status})
+        button = render_to_string('marketplace_app/fragments/book_button.html', {'listing': listing, 'status': status})
+        listing.card = personalize(card, {
+            'booking-status': lambda: badges[status],
+            'book-button': lambda: button,
+        })
+
+
+def marketplace_state(request):
+    """Validator for conditional_page: any listing or booking change (see thryve_app.signals)."""
+    # Errors of a failed create_listing are shown once, from the session
+    if 'form_errors' in request.session or 'show_create_modal' in request.session:
+        return None
+    versions = cache_tags.versions(['listings', 'bookings'])
+    return sorted(versions.items()), version_time(max(versions.values()))
+
+
 @login_required(login_url='login')
-@cache_control(no_cache=True, must_revalidate=True, no_store=True)
+@conditional_page(marketplace_state)
+@query_budget(8)
 def marketplace_home(request):
     """
     Main marketplace view. Handles searching, filtering, and displaying listings.
@@ -47,9 +83,10 @@ def marketplace_home(request):
         sender=request.user
     ).order_by('-created_at').values('status')[:1]
 
-    listings_qs = Listing.objects.prefetch_related('images').annotate(
+    # Images are only loaded for cards that are not cached yet (see render_listing_cards)
+    listings_qs = Listing.objects.annotate(
         user_booking_status=Subquery(user_booking_status)
-    ).all()
+    )
 
     # Exclude listings that have scheduled bookings from other users
     # (Keep listings where: user is the owner OR user has the scheduled booking OR no scheduled booking exists)
@@ -73,7 +110,8 @@ def marketplace_home(request):
     if type_filter in ['sale', 'swap', 'buy']:
         listings_qs = listings_qs.filter(listing_type=type_filter)
 
-    listings = listings_qs.order_by('-created_at')
+    listings = paginate_listings(listings_qs.order_by('-created_at'), request.GET.get('page'), MARKETPLACE_PAGE_SIZE)
+    render_listing_cards(listings)
 
     return render(request, 'marketplace.html', {
         'form': form,
@@ -100,10 +138,7 @@ def create_listing(request):
         if form.is_valid() and category_value:
             listing = form.save(commit=False)
             listing.user = request.user
-            try:
-                listing.your_name = request.user.profile.display_name or f"{request.user.first_name} {request.user.last_name}"
-            except:
-                listing.your_name = f"{request.user.first_name} {request.user.last_name}"
+            listing.your_name = request.profiles.user_profile.display_name or f"{request.user.first_name} {request.user.last_name}"
             listing.company = request.user.company_name
 
             if '-' in category_value:
@@ -134,6 +169,9 @@ def create_listing(request):
                     messages.error(request, str(e))
                     return redirect('marketplace:home')
 
+            record_activity('listing.created', request.user, {
+                request.user.pk: f"You listed {listing.title}",
+            }, target_id=listing.pk)
             messages.success(request, 'Your listing has been created successfully!')
             return redirect('marketplace:home')
         else:
@@ -5,3 +5,6 @@ class ProfileAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'profile_app'
 
+    def ready(self):
+        # Profile creation, avatar/logo tracking and public page versioning
+        from . import signals  # noqa: F401
@@ -0,0 +1,69 @@
+# profile_app/middleware.py
+"""
+Request-scoped access to the signed-in user's profiles.
+
+CurrentProfilesMiddleware sets `request.profiles`; the first access to either
+profile loads the user together with its UserProfile and BusinessProfile in
+one joined query, and both are memoized for the rest of the request. The
+objects are also attached to `request.user`, so `request.user.userprofile`
+and `request.user.businessprofile` stop costing a query each, and the user is
+re-stored in the auth user cache (auth_app.user_cache) with them attached.
+"""
+from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+
+from auth_app import user_cache
+from .models import BusinessProfile, UserProfile
+
+PROFILE_FIELDS = ('userprofile', 'businessprofile')
+
+
+class CurrentProfiles:
+    def __init__(self, request):
+        self._request = request
+
+    @cached_property
+    def _user(self):
+        user = self._request.user
+        if not user.is_authenticated:
+            return None
+        if all(name in user._state.fields_cache for name in PROFILE_FIELDS):
+            # Came out of the auth user cache with its profiles attached
+            return user
+        loaded = get_user_model().objects.select_related(*PROFILE_FIELDS).get(pk=user.pk)
+        for name in PROFILE_FIELDS:
+            try:
+                setattr(user, name, getattr(loaded, name))
+            except (UserProfile.DoesNotExist, BusinessProfile.DoesNotExist):
+                pass
+        user_cache.remember(self._request, user)
+        return loaded
+
+    def _profile(self, model, name):
+        user = self._user
+        if user is None:
+            return None
+        try:
+            return getattr(user, name)
+        except model.DoesNotExist:
+            # Profiles are created with the user; this only covers a deleted row
+            profile, _ = model.objects.get_or_create(user=user)
+            setattr(self._request.user, name, profile)
+            return profile
+
+    @cached_property
+    def user_profile(self):
+        return self._profile(UserProfile, 'userprofile')
+
+    @cached_property
+    def business_profile(self):
+        return self._profile(BusinessProfile, 'businessprofile')
+
+
+class CurrentProfilesMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.profiles = CurrentProfiles(request)
+        return self.get_response(request)
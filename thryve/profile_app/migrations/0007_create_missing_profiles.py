@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def create_missing_profiles(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    UserProfile = apps.get_model('profile_app', 'UserProfile')
+    BusinessProfile = apps.get_model('profile_app', 'BusinessProfile')
+
+    UserProfile.objects.bulk_create(
+        [UserProfile(user_id=user_id) for user_id in User.objects.filter(userprofile__isnull=True).values_list('pk', flat=True)],
+        batch_size=1000,
+    )
+    BusinessProfile.objects.bulk_create(
+        [
+            BusinessProfile(user_id=user_id, company_name=company_name)
+            for user_id, company_name in User.objects.filter(businessprofile__isnull=True).values_list('pk', 'company_name')
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profile_app', '0006_alter_businessprofile_logo_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(create_missing_profiles, migrations.RunPython.noop),
+    ]
@@ -54,12 +54,4 @@ class UserProfile(models.Model):
     )
 
     def __str__(self):
-        return f"{self.user}'s profile"
-
-    def save(self, *args, **kwargs):
-        # Delete old avatar when uploading a new one
-        if self.pk:
-            old_profile = UserProfile.objects.get(pk=self.pk)
-            if old_profile.avatar and self.avatar != old_profile.avatar:
-                old_profile.avatar.delete(save=False)
-        super().save(*args, **kwargs)
\ No newline at end of file
+        return f"{self.user}'s profile"
\ No newline at end of file
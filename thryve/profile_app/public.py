@@ -0,0 +1,82 @@
+# profile_app/public.py
+"""
+Public business profile pages.
+
+A page is rendered from the user, both profiles and the business's available
+listings, then cached whole under the user's cache tags (thryve_app.cache_tags;
+profile_app.signals and thryve_app.signals bump them on user, profile and
+listing changes). A tag version is the time.time_ns() of its last bump, so the
+newest one doubles as the page's Last-Modified and ETag and a repeat visit
+costs a few cache reads and a 304.
+
+The user id comes from the URL, so nothing is written to the cache for it
+until the business is known to exist: validators only read versions that are
+already there (a deleted or deactivated user bumps them), and a page without
+versions is checked against the database before it is rendered and cached.
+"""
+from datetime import datetime, timezone
+
+from django.contrib.auth import get_user_model
+from django.http import Http404
+from django.template.loader import render_to_string
+
+from thryve_app import cache_tags
+from thryve_app.listings import listing_cards
+from thryve_app.models import Listing
+
+PAGE_CACHE_TIMEOUT = 24 * 60 * 60
+LISTINGS_LIMIT = 24
+
+
+def page_tags(user_id):
+    return [f'user:{user_id}', f'user:{user_id}:profiles', f'user:{user_id}:listings']
+
+
+def page_version(user_id):
+    """The newest version of the page's tags, or None while any of them has none yet."""
+    tags = page_tags(user_id)
+    found = cache_tags.versions(tags, create=False)
+    return max(found.values()) if len(found) == len(tags) else None
+
+
+def etag(request, user_id):
+    version = page_version(user_id)
+    return None if version is None else f'"{user_id}-{version}"'
+
+
+def last_modified(request, user_id):
+    version = page_version(user_id)
+    return None if version is None else datetime.fromtimestamp(version / 1e9, tz=timezone.utc)
+
+
+def is_listed(user_id):
+    return get_user_model().objects.filter(pk=user_id, is_active=True).exists()
+
+
+def _render(user_id):
+    try:
+        business = get_user_model().objects.select_related('userprofile', 'businessprofile').get(
+            pk=user_id, is_active=True
+        )
+    except get_user_model().DoesNotExist:
+        raise Http404('Business not found')
+
+    listings = listing_cards(
+        Listing.objects.filter(user_id=user_id, is_available=True).order_by('-created_at')
+    )[:LISTINGS_LIMIT]
+
+    return render_to_string('profile_app/public_business_profile.html', {
+        'business': business,
+        'user_profile': getattr(business, 'userprofile', None),
+        'business_profile': getattr(business, 'businessprofile', None),
+        'listings': listings,
+    })
+
+
+def public_page(user_id):
+    """The page's HTML, rendered at most once per version; Http404 for unknown or inactive users."""
+    if page_version(user_id) is None and not is_listed(user_id):
+        raise Http404('Business not found')
+    return cache_tags.get_or_set(
+        f'business-page:{user_id}', lambda: _render(user_id), page_tags(user_id), PAGE_CACHE_TIMEOUT
+    )
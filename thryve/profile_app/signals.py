@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from thryve_app import cache_tags
+from thryve_app.media import track_files
+from .models import BusinessProfile, UserProfile
+
+# Replaced or deleted avatars and logos are removed from storage in the background
+track_files(UserProfile, 'avatar')
+track_files(BusinessProfile, 'logo')
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def create_profiles(sender, instance, created, raw=False, **kwargs):
+    """Every user gets both profiles at registration, so views never need get_or_create."""
+    if not created or raw:
+        return
+    UserProfile.objects.create(user=instance)
+    BusinessProfile.objects.create(user=instance, company_name=instance.company_name)
+
+
+def _user_tags(user):
+    return [f'user:{user.pk}']
+
+
+def _profile_tags(profile):
+    return [f'user:{profile.user_id}:profiles']
+
+
+# Listing changes bump user:<id>:listings from thryve_app.signals
+cache_tags.invalidate_on(get_user_model(), _user_tags)
+cache_tags.invalidate_on(UserProfile, _profile_tags)
+cache_tags.invalidate_on(BusinessProfile, _profile_tags)
@@ -1,3 +1,135 @@
-from django.test import TestCase
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, RequestFactory
+from django.urls import reverse
 
-# Create your tests here.
\ No newline at end of file
+from auth_app.models import CustomUser
+from thryve_app import cache_tags
+from thryve_app.models import Listing
+from . import public
+from .middleware import CurrentProfiles
+from .models import BusinessProfile, UserProfile
+
+
+class CurrentProfilesTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            email='owner@example.com', password='testpass123',
+            first_name='Owner', last_name='O', company_name='Owner Co'
+        )
+
+    def test_profiles_are_created_with_the_user(self):
+        """Test creating a user also creates its UserProfile and BusinessProfile"""
+        self.assertTrue(UserProfile.objects.filter(user=self.user).exists())
+        self.assertEqual(BusinessProfile.objects.get(user=self.user).company_name, 'Owner Co')
+
+    def test_profiles_load_in_one_query_and_are_memoized(self):
+        """Test both profiles come from one joined query and are reused afterwards"""
+        request = RequestFactory().get('/')
+        request.user = CustomUser.objects.get(pk=self.user.pk)
+        profiles = CurrentProfiles(request)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(profiles.user_profile.user_id, self.user.pk)
+            self.assertEqual(profiles.business_profile.company_name, 'Owner Co')
+            profiles.user_profile
+            request.user.userprofile
+            request.user.businessprofile
+
+    def test_missing_profile_is_recreated(self):
+        """Test a deleted profile row is recreated instead of raising"""
+        UserProfile.objects.filter(user=self.user).delete()
+        request = RequestFactory().get('/')
+        request.user = CustomUser.objects.get(pk=self.user.pk)
+        self.assertIsNotNone(CurrentProfiles(request).user_profile.pk)
+
+    def test_profile_views_use_existing_rows(self):
+        """Test the profile pages render without creating duplicate rows"""
+        self.client.force_login(self.user)
+        for name in ('business_profile', 'profile_customization', 'business_logo'):
+            self.assertEqual(self.client.get(reverse(name)).status_code, 200)
+        self.assertEqual(UserProfile.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(BusinessProfile.objects.filter(user=self.user).count(), 1)
+
+
+class OwnProfileConditionalTest(TestCase):
+    def setUp(self):
+        caches[settings.TAGGED_CACHE].clear()
+        self.user = CustomUser.objects.create_user(email='owner@example.com', password='testpass123')
+        self.client.force_login(self.user)
+
+    def test_profile_page_revalidates_until_profile_changes(self):
+        """Test an unchanged profile page answers 304 and a profile save changes its ETag"""
+        url = reverse('profile_customization')
+        self.client.get(url)  # sets the CSRF cookie the ETag depends on
+        response = self.client.get(url)
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        UserProfile.objects.get(user=self.user).save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+
+class PublicBusinessProfileTest(TestCase):
+    def setUp(self):
+        caches[settings.TAGGED_CACHE].clear()
+        self.user = CustomUser.objects.create_user(
+            email='shop@example.com', password='testpass123',
+            first_name='Shop', last_name='Owner', company_name='Shop Co'
+        )
+        BusinessProfile.objects.filter(user=self.user).update(industry='Hardware')
+        self.listing = Listing.objects.create(
+            user=self.user, listing_type='sale', title='Hammer', description='Desc',
+            your_name='Shop Owner', company='Shop Co', location='Cebu'
+        )
+        self.url = reverse('public_business_profile', args=[self.user.pk])
+
+    def test_page_is_public_and_lists_available_listings(self):
+        """Test anonymous visitors see the profile and only available listings"""
+        Listing.objects.create(
+            user=self.user, listing_type='sale', title='Sold Saw', description='Desc',
+            your_name='Shop Owner', company='Shop Co', location='Cebu', is_available=False
+        )
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Shop Co')
+        self.assertContains(response, 'Hammer')
+        self.assertNotContains(response, 'Sold Saw')
+        self.assertTrue(response.has_header('ETag'))
+        self.assertTrue(response.has_header('Last-Modified'))
+
+    def test_repeat_visit_is_cached_and_revalidates_to_304(self):
+        """Test a cached page costs no queries and a matching ETag gets 304"""
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_unknown_business_is_404_without_cache_writes(self):
+        """Test a made-up id gets 404, even with a matching-looking ETag, and creates no tag versions"""
+        missing = self.user.pk + 100
+        url = reverse('public_business_profile', args=[missing])
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=f'"{missing}-1"').status_code, 404)
+        self.assertEqual(cache_tags.versions(public.page_tags(missing), create=False), {})
+
+    def test_deactivated_business_is_no_longer_served(self):
+        """Test deactivating the user changes the ETag and the page becomes a 404"""
+        etag = self.client.get(self.url)['ETag']
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 404)
+
+    def test_listing_write_invalidates_page(self):
+        """Test editing a listing bumps the version, changing the ETag and content"""
+        etag = self.client.get(self.url)['ETag']
+        self.listing.title = 'Claw Hammer'
+        self.listing.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Claw Hammer')
+
+    def test_unknown_business_is_404(self):
+        """Test a missing business returns 404"""
+        self.assertEqual(self.client.get(reverse('public_business_profile', args=[999999])).status_code, 404)
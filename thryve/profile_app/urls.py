@@ -7,4 +7,5 @@ urlpatterns = [
     path('home/', views.business_profile_view, name='profile_home'),  # new alias
     path('customization/', views.profile_customization_view, name='profile_customization'),
     path('logo/', views.business_logo, name='business_logo'),
+    path('b/<int:user_id>/', views.public_business_profile, name='public_business_profile'),
 ]
\ No newline at end of file
@@ -2,17 +2,31 @@
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect
 from django.contrib import messages
+from django.http import HttpResponse
 from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 
+from thryve_app import cache_tags
+from thryve_app.conditional import conditional_page, version_time
+from thryve_app.query_budget import query_budget
+
+from . import public
 from .forms import ProfileCustomizationForm, BusinessProfileForm, BusinessLogoForm
-from .models import UserProfile, BusinessProfile
+
+
+def own_profile_state(request):
+    """Validator for conditional_page: the viewer's user row and both profiles."""
+    versions = cache_tags.versions([f'user:{request.user.pk}', f'user:{request.user.pk}:profiles'])
+    return sorted(versions.items()), version_time(max(versions.values()))
+
 
 # cleaned single decorator usage and correct form handling
 @login_required(login_url='login')
-@cache_control(no_cache=True, must_revalidate=True, no_store=True)
+@conditional_page(own_profile_state)
+@query_budget(6)
 def business_profile_view(request):
-    # ensure BusinessProfile exists for the logged-in user
-    business_profile, created = BusinessProfile.objects.get_or_create(user=request.user)
+    # created at registration and memoized per request (profile_app.middleware)
+    business_profile = request.profiles.business_profile
 
     if request.method == "POST":
         # include request.FILES so file fields are accepted
@@ -43,9 +57,10 @@ def business_profile_view(request):
 
 
 @login_required(login_url='login')
-@cache_control(no_cache=True, must_revalidate=True, no_store=True)
+@conditional_page(own_profile_state)
+@query_budget(6)
 def profile_customization_view(request):
-    profile, _ = UserProfile.objects.get_or_create(user=request.user)
+    profile = request.profiles.user_profile
 
     if request.method == 'POST':
         form = ProfileCustomizationForm(request.POST, request.FILES, instance=profile, user=request.user)
@@ -74,7 +89,7 @@ def profile_customization_view(request):
 
 @login_required(login_url='login')
 def business_logo(request):
-    business_profile, _ = BusinessProfile.objects.get_or_create(user=request.user)
+    business_profile = request.profiles.business_profile
     if request.method == 'POST':
         form = BusinessLogoForm(request.POST, request.FILES, instance=business_profile)
         if form.is_valid():
@@ -90,3 +105,11 @@ def business_logo(request):
         'business_profile': business_profile,
         'form': form,
     })
+
+
+@cache_control(public=True, max_age=60)
+@condition(etag_func=public.etag, last_modified_func=public.last_modified)
+@query_budget(6)
+def public_business_profile(request, user_id):
+    """Shareable business page; served from the full-page cache (see profile_app.public)."""
+    return HttpResponse(public.public_page(user_id))
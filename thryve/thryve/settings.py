@@ -54,15 +54,22 @@ INSTALLED_APPS = [
     'booking_app',
     'marketplace_app',
     'community_app',
+    'live_app',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Add WhiteNoise for static files
+    'thryve_app.metrics.MetricsMiddleware',  # See METRICS_ENABLED
+    'thryve_app.slow_queries.SlowQueryMiddleware',  # See SLOW_QUERY_THRESHOLD_MS
+    'thryve_app.timing.RequestTimingMiddleware',  # Sampled, see REQUEST_TIMING_SAMPLE_RATE
+    'thryve_app.query_budget.QueryBudgetMiddleware',  # Development only, see QUERY_BUDGET_ENABLED
+    'thryve_app.profiling.ProfilingMiddleware',  # Opt-in, see PROFILING_SAMPLE_RATE
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'auth_app.middleware.CachedAuthenticationMiddleware',
+    'profile_app.middleware.CurrentProfilesMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -185,6 +192,134 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'auth_app.CustomUser'
 
+# Background jobs (thryve_app.jobs): run `python manage.py run_worker` next to
+# the web process, or set BACKGROUND_JOBS_EAGER=True to run them in-process
+BACKGROUND_JOBS_EAGER = os.getenv('BACKGROUND_JOBS_EAGER', 'False') == 'True'
+
+# (dotted path, interval in seconds) run by every `run_worker` process
+PERIODIC_JOBS = [
+    ('community_app.trending.update_trending_scores', 60),
+    ('thryve_app.activity.compact_activity_events', 60 * 60),
+]
+
+# Dashboard activity events older than this are deleted by the worker
+ACTIVITY_RETENTION_DAYS = int(os.getenv('ACTIVITY_RETENTION_DAYS', '90'))
+
+# Authors with more connections than this are merged into timelines at read
+# time instead of being fanned out on write (community_app.timeline)
+TIMELINE_FANOUT_LIMIT = int(os.getenv('TIMELINE_FANOUT_LIMIT', '500'))
+
+# Live event stream (live_app): 'memory' pushes through an in-process broker
+# and needs a single ASGI worker; use 'poll' for multi-worker deployments
+LIVE_EVENTS_BACKEND = os.getenv('LIVE_EVENTS_BACKEND', 'memory')
+LIVE_EVENTS_POLL_INTERVAL = float(os.getenv('LIVE_EVENTS_POLL_INTERVAL', '3'))
+
+# Log requests that exceed their view's @query_budget or repeat a query
+# (thryve_app.query_budget); meant for development, not production
+QUERY_BUDGET_ENABLED = os.getenv('QUERY_BUDGET_ENABLED', 'False') == 'True'
+
+# Fraction of requests (0-1) that get a Server-Timing header and a JSON timing
+# log line (thryve_app.timing); 0 turns the middleware off
+REQUEST_TIMING_SAMPLE_RATE = float(os.getenv('REQUEST_TIMING_SAMPLE_RATE', '0'))
+
+# Sampling profiler (thryve_app.profiling): profile this fraction of requests,
+# plus requests sending PROFILING_TOKEN in the X-Thryve-Profile header or the
+# thryve_profile cookie. Both unset turns the middleware off. Profiles are
+# collapsed stacks per view in PROFILING_DIR; read them with
+# `manage.py profile_report` or at /listings/profiling/ as staff
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', '0'))
+PROFILING_TOKEN = os.getenv('PROFILING_TOKEN', '')
+PROFILING_INTERVAL = float(os.getenv('PROFILING_INTERVAL', '0.005'))
+PROFILING_DIR = os.getenv('PROFILING_DIR', os.path.join(BASE_DIR, '.profiles'))
+
+# Prometheus metrics (thryve_app.metrics) served at /listings/metrics/ to staff,
+# or to a scraper sending "Authorization: Bearer $METRICS_TOKEN". Every worker
+# writes its numbers to METRICS_DIR, which all workers must share
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'False') == 'True'
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+METRICS_DIR = os.getenv('METRICS_DIR', os.path.join(BASE_DIR, '.metrics'))
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', '10'))
+
+# Log queries slower than this many milliseconds (thryve_app.slow_queries) to a
+# ring of the last SLOW_QUERY_LOG_SIZE entries in SLOW_QUERY_LOG_DIR and EXPLAIN
+# each new slow shape in the background; 0 turns it off. Read it with
+# `manage.py slow_queries`
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', '0'))
+SLOW_QUERY_LOG_DIR = os.getenv('SLOW_QUERY_LOG_DIR', os.path.join(BASE_DIR, '.slow_queries'))
+SLOW_QUERY_LOG_SIZE = int(os.getenv('SLOW_QUERY_LOG_SIZE', '1000'))
+SLOW_QUERY_EXPLAIN = os.getenv('SLOW_QUERY_EXPLAIN', 'True') == 'True'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'json_lines': {'class': 'logging.StreamHandler', 'formatter': 'message'},
+    },
+    'loggers': {
+        'thryve_app.timing': {'handlers': ['json_lines'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
+# Caches. 'shared' holds login/registration throttle buckets
+# (auth_app.throttle), cached sessions and cached users (auth_app.user_cache)
+# and tag-versioned values (thryve_app.cache_tags), so every worker must see
+# the same one in production:
+# file (the default) is shared by the workers of one host, db by every host
+# (it needs `manage.py createcachetable`). locmem is per process and only for
+# a single-process setup: sessions and users are then read from the database
+# and pages are not answered with 304 (thryve_app.conditional).
+SHARED_CACHE_BACKEND = os.getenv('SHARED_CACHE_BACKEND', 'file')
+SHARED_CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'thryve-shared',
+    },
+    'file': {
+        # FileBasedCache with an add() that is atomic across processes
+        'BACKEND': 'thryve_app.cache_backends.FileBasedCache',
+        'LOCATION': os.getenv('SHARED_CACHE_DIR', os.path.join(BASE_DIR, '.cache', 'shared')),
+    },
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'thryve_shared_cache',
+    },
+}
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        # Room for the cached card fragments of busy pages
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('DEFAULT_CACHE_MAX_ENTRIES', '5000'))},
+    },
+    'shared': {
+        **SHARED_CACHE_BACKENDS[SHARED_CACHE_BACKEND],
+        # Sessions, throttle buckets, tag versions and tagged values share it
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('SHARED_CACHE_MAX_ENTRIES', '20000'))},
+    },
+}
+THROTTLE_CACHE = 'shared'
+AUTH_USER_CACHE = 'shared'
+TAGGED_CACHE = 'shared'
+# Listing cards, post cards and booking rows (thryve_app.fragments). Keys
+# change whenever the object does, so a per-process cache is fine; the timeout
+# bounds how long e.g. a renamed author still shows on cached cards.
+FRAGMENT_CACHE = 'default'
+FRAGMENT_CACHE_TIMEOUT = int(os.getenv('FRAGMENT_CACHE_TIMEOUT', str(15 * 60)))
+# Tests run on temporary copies of the file/db caches above
+TEST_RUNNER = 'thryve.test_runner.IsolatedCachesRunner'
+# Longest a request waits for another worker computing the same cache miss
+SINGLE_FLIGHT_TIMEOUT = float(os.getenv('SINGLE_FLIGHT_TIMEOUT', '10'))
+# Client IPs for the throttle come from X-Forwarded-For, as added by the
+# THROTTLE_PROXY_COUNT proxies in front of the app. Only enable behind a proxy
+# that sets it itself; on by default on Render (which sets RENDER), whose load
+# balancer does. Without it every client shares the proxy's address.
+THROTTLE_TRUST_X_FORWARDED_FOR = os.getenv(
+    'THROTTLE_TRUST_X_FORWARDED_FOR', 'True' if os.getenv('RENDER') else 'False'
+) == 'True'
+THROTTLE_PROXY_COUNT = int(os.getenv('THROTTLE_PROXY_COUNT', '1'))
+
 # Session security
 SESSION_COOKIE_HTTPONLY = True  # Prevent JavaScript access
 SESSION_COOKIE_SECURE = True    # Only send over HTTPS (production)
@@ -197,5 +332,9 @@ SESSION_COOKIE_AGE = 86400  # 24 hours (adjust as needed)
 # SESSION_SAVE_EVERY_REQUEST = False  # Don't save empty sessions
 SESSION_EXPIRE_AT_BROWSER_CLOSE = False
 
-# Use database-backed sessions
-SESSION_ENGINE = 'django.contrib.sessions.backends.db'
\ No newline at end of file
+# Database-backed sessions, read through the shared cache when it is shared
+if SHARED_CACHE_BACKEND == 'locmem':
+    SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+else:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'shared'
\ No newline at end of file
@@ -0,0 +1,28 @@
+"""
+Test runner that keeps the test suite off the developer's caches.
+
+The 'shared' cache is a file cache in the repository tree by default and holds
+the cached sessions and login throttle buckets of the local server. Tests
+clear and fill caches freely, so the whole run gets throwaway copies in a
+temporary directory instead.
+"""
+import shutil
+import tempfile
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from thryve_app.cache_backends import isolated_caches
+
+
+class IsolatedCachesRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._cache_dir = tempfile.mkdtemp(prefix='thryve-test-cache-')
+        self._caches = override_settings(CACHES=isolated_caches(self._cache_dir))
+        self._caches.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._caches.disable()
+        shutil.rmtree(self._cache_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
@@ -27,6 +27,7 @@ urlpatterns = [
     path('bookings/', include('booking_app.urls')),
     path('marketplace/', include('marketplace_app.urls')),
     path('community/', include('community_app.urls')),
+    path('live/', include('live_app.urls')),
 ]
 
 # Serve media files during development
@@ -0,0 +1,62 @@
+"""
+Append-only activity log behind the dashboard's Recent Activity widget.
+
+Write paths call `record_activity` with one summary line per affected user
+instead of the dashboard reconstructing activity from bookings, listings and
+connection requests on every request. Reading a user's feed is then a single
+scan of the (user, created_at) index. `compact_activity_events` runs as a
+periodic job and drops events older than ACTIVITY_RETENTION_DAYS.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import cache_tags
+from .models import ActivityEvent
+
+RECENT_LIMIT = 10
+COMPACT_BATCH_SIZE = 1000
+
+
+def display_name(user):
+    return user.company_name or user.get_full_name() or user.email
+
+
+def record_activity(verb, actor, summaries, target_id=None):
+    """Append one event per user; `summaries` maps user id -> the line that user sees."""
+    now = timezone.now()
+    ActivityEvent.objects.bulk_create([
+        ActivityEvent(
+            user_id=user_id,
+            actor=actor,
+            verb=verb,
+            summary=summary[:255],
+            target_id=target_id,
+            created_at=now,
+        )
+        for user_id, summary in summaries.items()
+    ])
+    cache_tags.bump(*(f'user:{user_id}:activity' for user_id in summaries))
+
+
+def recent_activity(user, limit=RECENT_LIMIT):
+    return list(
+        ActivityEvent.objects.filter(user=user)
+        .order_by('-created_at')
+        .values('verb', 'summary', 'created_at')[:limit]
+    )
+
+
+def compact_activity_events(batch_size=COMPACT_BATCH_SIZE):
+    """Periodic job: delete events past the retention window, a batch at a time."""
+    days = getattr(settings, 'ACTIVITY_RETENTION_DAYS', 90)
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted = 0
+    while True:
+        ids = list(
+            ActivityEvent.objects.filter(created_at__lt=cutoff).values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += ActivityEvent.objects.filter(pk__in=ids).delete()[0]
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ThryveAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'thryve_app'
+
+    def ready(self):
+        # Connect the cache tag invalidation handlers
+        from . import signals  # noqa: F401
@@ -0,0 +1,61 @@
+"""
+Cache backends for the 'shared' alias.
+
+Django's FileBasedCache is shared by every worker on a host, but its add() is
+a has_key() followed by a set(), so two workers adding the same key can both
+succeed. cache_tags uses add() as a lock and community_app.likes uses it to
+claim idempotency keys, so this FileBasedCache holds an flock while adding.
+Keys map onto a fixed set of lock files, so the directory does not grow.
+
+`isolated_caches(directory)` is CACHES with every cache that outlives the
+process moved under `directory`, for the test runner and `manage.py bench`,
+which clear caches freely and must not log out local sessions or reset the
+login throttle.
+"""
+import os
+import zlib
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import FileBasedCache as DjangoFileBasedCache
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process development only
+    fcntl = None
+
+LOCK_STRIPES = 64
+
+
+class FileBasedCache(DjangoFileBasedCache):
+    @contextmanager
+    def _add_lock(self, key, version):
+        if fcntl is None:
+            yield
+            return
+        self._createdir()
+        fname = self._key_to_file(key, version)
+        stripe = zlib.crc32(os.path.basename(fname).encode()) % LOCK_STRIPES
+        with open(os.path.join(self._dir, f'add-{stripe}.lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        with self._add_lock(key, version):
+            return super().add(key, value, timeout, version)
+
+
+def isolated_caches(directory):
+    """settings.CACHES with every file or database cache replaced by a file cache under `directory`."""
+    return {
+        alias: config if config['BACKEND'].endswith('.LocMemCache') else {
+            **config,
+            'BACKEND': 'thryve_app.cache_backends.FileBasedCache',
+            'LOCATION': os.path.join(directory, alias),
+        }
+        for alias, config in settings.CACHES.items()
+    }
@@ -0,0 +1,146 @@
+"""
+Tag-versioned caching.
+
+A cached value is stored together with the versions of the tags it was
+computed from ('listing:42', 'user:7:connections'). Writes bump the versions
+of their tags, from post_save/post_delete for the models registered with
+`invalidate_on`, and a read whose stored versions no longer match is a miss.
+Nothing is deleted, so invalidation needs no list of keys and stale values
+simply age out.
+
+Versions, values and locks live in the TAGGED_CACHE alias ('shared', file
+backed unless SHARED_CACHE_BACKEND says otherwise). Only a cache every worker
+sees carries a bump to the others: with a per-process LocMemCache each worker
+invalidates just its own values, and `is_shared()` is False so callers that
+must not serve stale data across workers (thryve_app.conditional) stand down.
+A version is the time.time_ns() of the tag's last bump, so it can double as a
+Last-Modified time.
+
+On a miss only one caller computes the value: the others wait up to
+SINGLE_FLIGHT_TIMEOUT seconds for it to appear instead of all running the
+same expensive queries at once.
+"""
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+DEFAULT_TIMEOUT = 5 * 60
+SINGLE_FLIGHT_TIMEOUT = 10
+_POLL_INTERVAL = 0.05
+
+
+def _cache():
+    return caches[getattr(settings, 'TAGGED_CACHE', 'default')]
+
+
+def is_shared():
+    """Whether tag versions are seen by every worker, not just this process."""
+    return not isinstance(_cache(), LocMemCache)
+
+
+def _version_key(tag):
+    return f'tag-version:{tag}'
+
+
+def versions(tags, create=True):
+    """
+    {tag: version} for `tags`, starting a fresh version for tags never bumped
+    (or evicted). With create=False such tags are left out instead, so a
+    lookup keyed by untrusted input writes nothing.
+    """
+    cache = _cache()
+    keys = {_version_key(tag): tag for tag in tags}
+    found = cache.get_many(keys)
+    if not create:
+        return {keys[key]: version for key, version in found.items()}
+    missing = [key for key in keys if key not in found]
+    if missing:
+        now = time.time_ns()
+        for key in missing:
+            cache.add(key, now, None)
+        # Another worker may have won the add with its own version
+        found.update(cache.get_many(missing))
+    return {tag: found.get(key, 0) for key, tag in keys.items()}
+
+
+def version(tag):
+    return versions([tag])[tag]
+
+
+def bump(*tags):
+    """Invalidate every value cached under any of `tags`."""
+    if tags:
+        now = time.time_ns()
+        _cache().set_many({_version_key(tag): now for tag in tags}, None)
+
+
+def _fresh(entry, current):
+    return entry is not None and entry[0] == current
+
+
+def get_or_set(key, compute, tags=(), timeout=DEFAULT_TIMEOUT):
+    """
+    The value cached under `key` if none of its tags changed since it was
+    stored; otherwise `compute()`, stored for `timeout` seconds.
+    """
+    cache = _cache()
+    key = f'tagged:{key}'
+    # Read versions before computing: a bump while we compute leaves our value stale
+    current = versions(tags)
+    entry = cache.get(key)
+    if _fresh(entry, current):
+        return entry[1]
+
+    lock = f'{key}:computing'
+    wait = getattr(settings, 'SINGLE_FLIGHT_TIMEOUT', SINGLE_FLIGHT_TIMEOUT)
+    if not cache.add(lock, True, wait):
+        deadline = time.monotonic() + wait
+        while time.monotonic() < deadline:
+            time.sleep(_POLL_INTERVAL)
+            entry = cache.get(key)
+            if _fresh(entry, current):
+                return entry[1]
+            if cache.get(lock) is None:
+                break
+        # The other caller failed or is too slow: compute it ourselves
+    try:
+        value = compute()
+        cache.set(key, (current, value), timeout)
+    finally:
+        cache.delete(lock)
+    return value
+
+
+def cached(key, tags=None, timeout=DEFAULT_TIMEOUT):
+    """
+    Decorator for get_or_set. `key` and `tags` are called with the function's
+    arguments, e.g. key=lambda user: f'summary:{user.pk}'.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return get_or_set(
+                key(*args, **kwargs), lambda: func(*args, **kwargs),
+                tags(*args, **kwargs) if tags else (), timeout,
+            )
+        return wrapper
+    return decorator
+
+
+def invalidate_on(model, tags):
+    """Bump `tags(instance)` whenever an instance of `model` is saved or deleted."""
+    def receiver(sender, instance, **kwargs):
+        changed = tags(instance)
+        bump(*changed)
+        # And again on commit: a reader between the two saw the new version but
+        # the old rows, and its value (or ETag) would otherwise never be replaced
+        transaction.on_commit(lambda: bump(*changed))
+
+    uid = f'cache_tags:{model._meta.label}:{tags.__module__}.{tags.__qualname__}'
+    post_save.connect(receiver, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(receiver, sender=model, weak=False, dispatch_uid=uid)
@@ -0,0 +1,79 @@
+"""
+Conditional GET for logged-in pages.
+
+Pages such as the marketplace and bookings are private and change often, so
+they are sent with `Cache-Control: private, no-cache`: the browser keeps its
+copy but asks again on every use. `conditional_page(state)` answers that
+question before the view runs its queries. `state(request, *args, **kwargs)`
+returns cheap inputs the page depends on (cache tag versions, an aggregate
+over updated_at) and its last change; the ETag hashes them together with the
+viewer, the URL and the CSRF cookie (the page embeds a token), and a browser
+whose copy still matches gets a 304.
+
+`state` returns None for a response that must be rendered anyway, e.g. one
+showing form errors kept in the session; pages with pending flash messages
+are always rendered. Other users' names are not covered by any validator;
+like cached fragments (thryve_app.fragments) they may lag by up to
+FRAGMENT_CACHE_TIMEOUT, so ETags also roll over that often.
+
+Tag versions only change in every worker when they live in a shared cache. If
+TAGGED_CACHE is local to each process (cache_tags.is_shared() is False), a
+worker that never saw a bump would keep answering 304, so pages are then sent
+uncached (`no-store`) as before, without validators.
+"""
+import hashlib
+import time
+from functools import wraps
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+from . import cache_tags
+from .fragments import DEFAULT_TIMEOUT
+
+
+def version_time(version):
+    """A cache tag version (time.time_ns() of its last bump) as a datetime."""
+    return datetime.fromtimestamp(version / 1e9, tz=dt_timezone.utc)
+
+
+def _validators(request, state, args, kwargs):
+    """(etag, last_modified) for this request, computed once."""
+    if not hasattr(request, '_conditional_validators'):
+        request._conditional_validators = (None, None)
+        if request.method in ('GET', 'HEAD') and not len(get_messages(request)):
+            result = state(request, *args, **kwargs)
+            if result is not None:
+                parts, last_modified = result
+                rollover = int(time.time() // getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', DEFAULT_TIMEOUT))
+                digest = hashlib.sha1(repr((
+                    request.user.pk, request.get_full_path(), request.META.get('CSRF_COOKIE'), rollover, parts,
+                )).encode()).hexdigest()[:24]
+                request._conditional_validators = (f'"{digest}"', last_modified)
+    return request._conditional_validators
+
+
+def conditional_page(state):
+    """Decorator: send the view's page as `private, no-cache` and answer 304 while `state` is unchanged."""
+    def etag(request, *args, **kwargs):
+        return _validators(request, state, args, kwargs)[0]
+
+    def last_modified(request, *args, **kwargs):
+        return _validators(request, state, args, kwargs)[1]
+
+    def decorator(view):
+        conditional = cache_control(private=True, no_cache=True)(
+            condition(etag_func=etag, last_modified_func=last_modified)(view)
+        )
+        uncached = cache_control(no_cache=True, must_revalidate=True, no_store=True)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if cache_tags.is_shared():
+                return conditional(request, *args, **kwargs)
+            return uncached(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,51 @@
+"""
+Dashboard activity counters.
+
+DashboardSummary computes every counter on the dashboard with one
+conditional-aggregate query per table, and caches the result under the user's
+booking, listing and connection request tags (see thryve_app.cache_tags and
+thryve_app.signals), so a cached summary is never served after a relevant write.
+"""
+from django.db.models import Count, Q
+
+from booking_app.models import BookingRequest
+from . import cache_tags
+from .models import Listing, ConnectionRequest
+
+CACHE_TIMEOUT = 5 * 60
+
+
+class DashboardSummary:
+    """Cached activity counters for one user's dashboard."""
+
+    def __init__(self, user):
+        self.user = user
+
+    @staticmethod
+    def tags(user_id):
+        return [f'user:{user_id}:bookings', f'user:{user_id}:listings', f'user:{user_id}:connection_requests']
+
+    def compute(self):
+        """Run the aggregate queries, one per table."""
+        bookings = BookingRequest.objects.filter(sender=self.user).aggregate(
+            total=Count('pk'),
+            pending=Count('pk', filter=Q(status='pending')),
+        )
+        listings = Listing.objects.filter(user=self.user).aggregate(
+            active=Count('pk', filter=Q(is_available=True)),
+        )
+        connection_requests = ConnectionRequest.objects.filter(
+            receiver=self.user, status='pending'
+        ).aggregate(incoming=Count('pk'))
+
+        return {
+            'total_bookings': bookings['total'],
+            'active_listings': listings['active'],
+            'pending_booking_requests': bookings['pending'],
+            'connection_requests': connection_requests['incoming'],
+        }
+
+    def as_dict(self):
+        return cache_tags.get_or_set(
+            f'dashboard-summary:{self.user.pk}', self.compute, self.tags(self.user.pk), CACHE_TIMEOUT
+        )
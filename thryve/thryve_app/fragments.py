@@ -0,0 +1,71 @@
+"""
+Fragment caching for listing cards, post cards and booking rows.
+
+A fragment is the HTML of one object rendered on its own, cached under the
+object's id and `updated_at` (plus those of related objects it shows, such as
+a booking's listing). Saving the object changes the key, so only the edited
+card is rendered again while the rest of the page comes straight from the
+cache; nothing has to be invalidated and old keys simply expire. What the
+stamps do not cover (an author renaming themselves) shows up once the
+fragment expires after FRAGMENT_CACHE_TIMEOUT.
+
+Fragments are the same for every viewer. Whatever is not (booking status,
+whether the viewer liked a post, owner menus, the CSRF token) is left in the
+fragment as a marker such as <!--viewer:post-menu:7--> and filled in on every
+request by `personalize`.
+"""
+import re
+
+from django.conf import settings
+from django.core.cache import caches
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+DEFAULT_TIMEOUT = 15 * 60
+_MARKER = re.compile(r'<!--viewer:([\w-]+)((?::[\w-]*)*)-->')
+
+
+def _cache():
+    return caches[getattr(settings, 'FRAGMENT_CACHE', 'default')]
+
+
+def fragment_key(template_name, obj, related=()):
+    stamps = ':'.join(f'{item.pk}@{item.updated_at.timestamp():.6f}' for item in (obj, *related))
+    return f'fragment:{template_name}:{stamps}'
+
+
+def render_fragments(template_name, objects, name, related=None, context=None, prepare=None):
+    """
+    The HTML of `template_name` for each of `objects` (in order), available in
+    the template as `name`. Cached fragments are read with one get_many; only
+    the others are rendered, after `prepare(missing)` has loaded what they
+    need (e.g. prefetching images) so cached objects never pay for it.
+    `related(obj)` lists other objects whose changes must re-render it.
+    """
+    objects = list(objects)
+    if not objects:
+        return []
+    keys = [fragment_key(template_name, obj, related(obj) if related else ()) for obj in objects]
+    cache = _cache()
+    found = cache.get_many(keys)
+    missing = {key: obj for key, obj in zip(keys, objects) if key not in found}
+    if missing:
+        if prepare is not None:
+            prepare(list(missing.values()))
+        rendered = {
+            key: render_to_string(template_name, {**(context or {}), name: obj})
+            for key, obj in missing.items()
+        }
+        cache.set_many(rendered, getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', DEFAULT_TIMEOUT))
+        found.update(rendered)
+    return [found[key] for key in keys]
+
+
+def personalize(html, overlays):
+    """
+    Replace each <!--viewer:name:arg...--> marker in `html` with
+    overlays[name](*args); the arguments are passed as strings.
+    """
+    return mark_safe(_MARKER.sub(
+        lambda match: str(overlays[match.group(1)](*match.group(2).split(':')[1:])), html
+    ))
@@ -0,0 +1,104 @@
+"""
+Minimal database-backed background jobs.
+
+`enqueue(func, **kwargs)` stores a BackgroundJob row in the caller's
+transaction, so a job only becomes visible to `manage.py run_worker` once the
+write that produced it has committed. With BACKGROUND_JOBS_EAGER=True the
+function is instead called in-process right after commit (handy in dev/tests).
+
+The worker also calls each PERIODIC_JOBS entry ("dotted.path", seconds) on its
+own schedule; periodic jobs must be idempotent since every worker runs them.
+"""
+import logging
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+# A job left 'running' longer than this is assumed to belong to a dead worker
+STALE_AFTER = timedelta(minutes=10)
+
+
+def _dotted_name(func):
+    return f"{func.__module__}.{func.__qualname__}"
+
+
+def enqueue(func, run_after=None, **kwargs):
+    """Schedule `func(**kwargs)`; kwargs must be JSON serializable"""
+    if getattr(settings, 'BACKGROUND_JOBS_EAGER', False):
+        transaction.on_commit(lambda: func(**kwargs))
+        return None
+
+    return BackgroundJob.objects.create(
+        name=_dotted_name(func),
+        payload=kwargs,
+        run_after=run_after or timezone.now(),
+    )
+
+
+def claim_jobs(limit=10):
+    """Atomically mark up to `limit` due jobs as running and return them"""
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            BackgroundJob.objects.select_for_update(skip_locked=True).filter(
+                Q(status='queued', run_after__lte=now) |
+                Q(status='running', updated_at__lt=now - STALE_AFTER)
+            ).order_by('run_after')[:limit]
+        )
+        if jobs:
+            BackgroundJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+                status='running', updated_at=now
+            )
+    return jobs
+
+
+def run_job(job):
+    """Run a claimed job; delete it on success, otherwise retry with backoff"""
+    try:
+        import_string(job.name)(**job.payload)
+    except Exception:
+        job.attempts += 1
+        job.last_error = traceback.format_exc()
+        if job.attempts >= MAX_ATTEMPTS:
+            job.status = 'failed'
+            logger.error("Background job %s failed permanently", job.name)
+        else:
+            job.status = 'queued'
+            job.run_after = timezone.now() + timedelta(seconds=2 ** job.attempts)
+        job.save(update_fields=['attempts', 'last_error', 'status', 'run_after', 'updated_at'])
+        return False
+
+    job.delete()
+    return True
+
+
+def run_pending(limit=10):
+    """Claim and run one batch of due jobs, returning how many were claimed"""
+    jobs = claim_jobs(limit)
+    for job in jobs:
+        run_job(job)
+    return len(jobs)
+
+
+def run_periodic(last_run):
+    """Call every PERIODIC_JOBS entry whose interval has elapsed; `last_run` is per-worker state"""
+    now = time.monotonic()
+    for path, interval in getattr(settings, 'PERIODIC_JOBS', []):
+        if path in last_run and now - last_run[path] < interval:
+            continue
+        last_run[path] = now
+        try:
+            import_string(path)()
+        except Exception:
+            logger.exception("Periodic job %s failed", path)
@@ -0,0 +1,43 @@
+"""
+Listing querysets for card/table rendering, shared by the marketplace and the
+dashboard.
+
+Templates read `listing.images.all`, `listing.main_image` and
+`listing.image_count` for every listing; `listing_cards` prefetches the images
+so that costs one extra query per page instead of one or more per listing.
+Paginate with `paginate_listings` before evaluating: the prefetch then only
+loads images for the listings on the current page. Pages rendered from
+cached fragments (thryve_app.fragments) pass `prefetch_images` instead, so
+only the listings whose card is not cached load their images.
+"""
+from django.core.paginator import Paginator
+from django.db.models import prefetch_related_objects
+
+from .models import Listing
+
+MARKETPLACE_PAGE_SIZE = 24
+DASHBOARD_PAGE_SIZE = 20
+# Columns the dashboard's "Marketplace updates" widget actually renders
+UPDATE_FIELDS = ('id', 'title', 'listing_type', 'category', 'created_at')
+
+
+def listing_cards(queryset=None):
+    """Listings with their images prefetched in a single query."""
+    if queryset is None:
+        queryset = Listing.objects.all()
+    return queryset.prefetch_related('images')
+
+
+def prefetch_images(listings):
+    """Prefetch the images of already-loaded listings in a single query."""
+    prefetch_related_objects(listings, 'images')
+
+
+def marketplace_updates(user, limit=5):
+    """Most recent listings by other users, loading only the rendered columns."""
+    return Listing.objects.exclude(user=user).only(*UPDATE_FIELDS).order_by('-created_at')[:limit]
+
+
+def paginate_listings(queryset, page_number, per_page):
+    """Return the requested Page; invalid or out-of-range numbers fall back to a valid page."""
+    return Paginator(queryset, per_page).get_page(page_number)
@@ -0,0 +1,275 @@
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import setup_databases, teardown_databases
+from django.urls import NoReverseMatch, URLResolver, get_resolver, reverse
+from django.utils import timezone
+
+from booking_app.models import BookingRequest
+from community_app.models import Comment, CommunityPost
+from thryve_app.cache_backends import isolated_caches
+from thryve_app.models import Listing
+from thryve_app.widgets import WIDGETS
+
+# Routes a GET would break (logs the client out), never finishes (event
+# stream) or that are not ours to measure
+SKIP_NAMESPACES = {'admin'}
+SKIP_ROUTES = {'logout', 'live_app:events'}
+# Responses that mean the route has no GET to measure
+NO_GET_STATUSES = {400, 405}
+
+
+class QueryTimer:
+    """connection.execute_wrapper that counts queries and sums their time."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+def routes(patterns=None, prefix=''):
+    """Yield (route name, names of its URL arguments) for every named route we can GET."""
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace in SKIP_NAMESPACES:
+                continue
+            namespace = f'{prefix}{pattern.namespace}:' if pattern.namespace else prefix
+            yield from routes(pattern.url_patterns, namespace)
+        elif pattern.name and f'{prefix}{pattern.name}' not in SKIP_ROUTES:
+            yield f'{prefix}{pattern.name}', sorted(getattr(pattern.pattern, 'converters', {}))
+
+
+def sample_kwargs(user):
+    """Values for URL arguments, taken from rows `user` owns or can see."""
+    post = CommunityPost.objects.filter(user=user).first() or CommunityPost.objects.first()
+    comment = Comment.objects.filter(post=post).first() if post else None
+    listing = Listing.objects.filter(user=user).order_by('-created_at').first()
+    booking = BookingRequest.objects.filter(receiver=user).order_by('-created_at').first()
+    return {
+        'user_id': [user.pk],
+        'listing_id': [listing.pk] if listing else [],
+        'booking_id': [booking.pk] if booking else [],
+        'post_id': [post.pk] if post else [],
+        'comment_id': [comment.pk] if comment else [],
+        'name': list(WIDGETS),
+    }
+
+
+def targets(user):
+    """(label, url) for every route, one per widget for the dashboard widget endpoint."""
+    values = sample_kwargs(user)
+    for name, arguments in routes():
+        combinations = [{}]
+        for argument in arguments:
+            combinations = [
+                {**kwargs, argument: value}
+                for kwargs in combinations for value in values.get(argument, [])
+            ]
+        for kwargs in combinations:
+            try:
+                url = reverse(name, kwargs=kwargs)
+            except NoReverseMatch:
+                continue
+            label = name if 'name' not in kwargs else f"{name}[{kwargs['name']}]"
+            yield label, url
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """
+    Pair each result with the same (size, view, persona) in `baseline`.
+    Returns (rows, regressions): a row is (result, baseline result or None, flags).
+    """
+    previous = {(r['size'], r['view'], r['persona']): r for r in baseline.get('results', [])}
+    rows, regressions = [], 0
+    for result in results:
+        before = previous.get((result['size'], result['view'], result['persona']))
+        flags = []
+        if before:
+            slower = result['wall_ms'] - before['wall_ms']
+            if slower > min_delta_ms and result['wall_ms'] > before['wall_ms'] * (1 + threshold):
+                flags.append('slower')
+            if result['queries'] > before['queries']:
+                flags.append('more queries')
+        regressions += bool(flags)
+        rows.append((result, before, flags))
+    return rows, regressions
+
+
+class Command(BaseCommand):
+    help = ("Seeds a throwaway test database at several sizes, GETs every URL as a heavy and a "
+            "typical user, and records time, queries, DB time and response size per view.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100,1000',
+                            help='Comma-separated numbers of users to seed (other tables scale with it).')
+        parser.add_argument('--repeat', type=int, default=5, help='Warm requests per view after the cold one.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--only', help='Only views whose name contains this text.')
+        parser.add_argument('--output', default='bench-results.json', help='Where to write the JSON results.')
+        parser.add_argument('--baseline', help='Earlier JSON results to compare against.')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='Relative slowdown of the median that counts as a regression.')
+        parser.add_argument('--min-delta-ms', type=float, default=2.0,
+                            help='Ignore slowdowns smaller than this (noise).')
+        parser.add_argument('--fail-on-regression', action='store_true')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError("--sizes must be comma-separated integers.")
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+
+        work_dir = tempfile.mkdtemp(prefix='thryve-bench-')
+        overrides = {
+            'DEBUG': False,
+            'ALLOWED_HOSTS': [*settings.ALLOWED_HOSTS, 'testserver'],
+            'MEDIA_ROOT': os.path.join(work_dir, 'media'),
+            # Each view starts from empty caches: never the real shared cache,
+            # which holds local sessions and throttle buckets
+            'CACHES': isolated_caches(os.path.join(work_dir, 'cache')),
+            # Keep placeholder uploads and image URLs local, and work without collectstatic
+            'STORAGES': {
+                'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+                'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+            },
+            'BACKGROUND_JOBS_EAGER': False,
+        }
+        results = []
+        with override_settings(**overrides):
+            old_config = setup_databases(verbosity=0, interactive=False, aliases={'default'})
+            try:
+                for size in sizes:
+                    results.extend(self._bench_size(size, options))
+            finally:
+                teardown_databases(old_config, verbosity=0)
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+        report = {
+            'meta': {
+                'created': timezone.now().isoformat(),
+                'commit': self._commit(),
+                'database': connection.vendor,
+                'sizes': sizes,
+                'repeat': options['repeat'],
+                'seed': options['seed'],
+            },
+            'results': results,
+        }
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(f"Wrote {len(results)} results to {options['output']}")
+
+        if baseline is not None:
+            regressions = self._report_comparison(results, baseline, options)
+            if regressions and options['fail_on_regression']:
+                raise CommandError(f"{regressions} view(s) regressed against {options['baseline']}.")
+
+    def _commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+                cwd=settings.BASE_DIR,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def _bench_size(self, size, options):
+        call_command('flush', interactive=False, verbosity=0)
+        self.stdout.write(f"Seeding {size} users...")
+        call_command('seed_scale', users=size, seed=options['seed'], verbosity=0)
+
+        users = get_user_model().objects.filter(email__endswith=f"@{options['seed']}.seed.thryve.test")
+        # seed_scale skews activity towards the first users, so user 0 is a power user
+        personas = {
+            'heavy': users.get(email__startswith='user0@'),
+            'typical': users.get(email__startswith=f'user{size // 2}@'),
+        }
+
+        results = []
+        for persona, user in personas.items():
+            client = Client()
+            client.force_login(user)
+            for label, url in targets(user):
+                if options['only'] and options['only'] not in label:
+                    continue
+                result = self._bench_view(client, url, options['repeat'])
+                if result is None:
+                    continue
+                result.update(size=size, view=label, persona=persona, url=url)
+                results.append(result)
+                self.stdout.write(
+                    f"  {size:>6} {persona:<8} {label:<50} {result['status']} "
+                    f"{result['wall_ms']:>8.1f} ms {result['queries']:>4} q {result['db_ms']:>7.1f} ms db "
+                    f"{result['bytes']:>8} B"
+                )
+        return results
+
+    def _get(self, client, url):
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = client.get(url)
+            body = b''.join(response) if response.streaming else response.content
+        return response, time.perf_counter() - start, timer, len(body)
+
+    def _bench_view(self, client, url, repeat):
+        for alias in settings.CACHES:
+            caches[alias].clear()
+        response, cold_seconds, cold_timer, _ = self._get(client, url)
+        if response.status_code in NO_GET_STATUSES:
+            return None
+
+        samples = [self._get(client, url) for _ in range(max(repeat, 1))]
+        walls = sorted(seconds * 1000 for _, seconds, _, _ in samples)
+        response, _, timer, size = samples[-1]
+        return {
+            'status': response.status_code,
+            'cold_ms': round(cold_seconds * 1000, 2),
+            'cold_queries': cold_timer.count,
+            'wall_ms': round(statistics.median(walls), 2),
+            'max_ms': round(walls[-1], 2),
+            'queries': timer.count,
+            'db_ms': round(statistics.median(t.seconds * 1000 for _, _, t, _ in samples), 2),
+            'bytes': size,
+        }
+
+    def _report_comparison(self, results, baseline, options):
+        rows, regressions = compare(results, baseline, options['threshold'], options['min_delta_ms'])
+        self.stdout.write(f"\nCompared with {options['baseline']} (commit {baseline['meta'].get('commit')}):")
+        for result, before, flags in rows:
+            if before is None:
+                change = 'new'
+            else:
+                change = (f"{result['wall_ms'] - before['wall_ms']:+8.1f} ms "
+                          f"{result['queries'] - before['queries']:+4d} q")
+            line = f"  {result['size']:>6} {result['persona']:<8} {result['view']:<50} {change}"
+            self.stdout.write(self.style.ERROR(f"{line}  {', '.join(flags)}") if flags else line)
+        summary = f"{regressions} regression(s)."
+        self.stdout.write(self.style.ERROR(summary) if regressions else self.style.SUCCESS(summary))
+        return regressions
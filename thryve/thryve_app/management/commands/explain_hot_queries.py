@@ -0,0 +1,117 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, OuterRef, Q, Subquery
+
+from booking_app.models import BookingRequest
+from community_app.models import CommunityPost, PostLike
+from thryve_app.listings import listing_cards, marketplace_updates
+from thryve_app.models import Connection, ConnectionRequest, Listing
+
+# "Seq Scan on thryve_app_listing" (PostgreSQL), "SCAN thryve_app_listing" (SQLite;
+# "SCAN t USING INDEX ..." walks an index in order and is not flagged)
+SEQ_SCAN_PATTERNS = [
+    re.compile(r'Seq Scan on (\w+)'),
+    re.compile(r'\bSCAN ([a-z_]\w*)(?! USING (?:COVERING )?INDEX)(?:\s|$)'),
+]
+
+
+def sequential_scans(plan):
+    """Names of the tables `plan` reads with a full table scan."""
+    tables = []
+    for line in plan.splitlines():
+        for pattern in SEQ_SCAN_PATTERNS:
+            match = pattern.search(line)
+            if match and match.group(1) not in tables:
+                tables.append(match.group(1))
+    return tables
+
+
+def hot_queries(user):
+    """(label, queryset) for the main queries of each view, as run by `user`."""
+    scheduled_by_others = BookingRequest.objects.filter(
+        listing=OuterRef('pk'), status='scheduled'
+    ).exclude(Q(sender=user) | Q(receiver=user))
+    booking_status = BookingRequest.objects.filter(
+        listing=OuterRef('pk'), sender=user
+    ).order_by('-created_at').values('status')[:1]
+
+    return [
+        ('marketplace: listing grid', listing_cards().annotate(
+            user_booking_status=Subquery(booking_status)
+        ).exclude(id__in=Subquery(scheduled_by_others.values('listing_id'))).order_by('-created_at')[:24]),
+        ('dashboard: marketplace updates', marketplace_updates(user)),
+        ('dashboard: my listings', Listing.objects.filter(user=user).order_by('-created_at')[:20]),
+        ('dashboard: active listings', Listing.objects.filter(user=user, is_available=True)),
+        ('public profile: listings', Listing.objects.filter(user=user, is_available=True).order_by('-created_at')[:24]),
+        ('bookings: sent', BookingRequest.objects.filter(sender=user).order_by('-created_at')),
+        ('bookings: received', BookingRequest.objects.filter(receiver=user).order_by('-created_at')),
+        ('bookings: scheduled', BookingRequest.objects.filter(
+            Q(sender=user) | Q(receiver=user), status='scheduled'
+        ).order_by('-created_at')),
+        ('bookings: date overlap', BookingRequest.objects.filter(
+            listing__user=user, status='scheduled',
+            proposed_start_date__lte='2100-01-01', proposed_end_date__gte='2000-01-01',
+        )),
+        ('connections: incoming', ConnectionRequest.objects.filter(receiver=user, status='pending')),
+        ('connections: sent', ConnectionRequest.objects.filter(sender=user, status='pending')),
+        ('connections: list', Connection.objects.filter(Q(user1=user) | Q(user2=user))),
+        ('community: feed', CommunityPost.objects.order_by('-created_at')[:20]),
+        ('community: liked posts', PostLike.objects.filter(
+            user=user, post__in=CommunityPost.objects.order_by('-created_at')[:20]
+        ).values_list('post_id', flat=True)),
+        ('community: author backfill', CommunityPost.objects.filter(user=user).order_by('-created_at')[:50]),
+        ('register: company name taken', get_user_model().objects.filter(company_name=user.company_name)),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Runs EXPLAIN on the main query of each view and flags sequential scans."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Email of the user to run the queries as (default: the one with most listings).')
+        parser.add_argument('--analyze', action='store_true',
+                            help='EXPLAIN ANALYZE: run the queries and report actual timings (PostgreSQL only).')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every plan, not only flagged ones.')
+        parser.add_argument('--fail-on-seq-scan', action='store_true',
+                            help='Exit with an error if any query scans a whole table.')
+
+    def _user(self, email):
+        users = get_user_model().objects
+        if email:
+            try:
+                return users.get(email=email)
+            except users.model.DoesNotExist:
+                raise CommandError(f"No user with email {email}")
+        user = users.annotate(n=Count('listing')).order_by('-n', 'pk').first()
+        if user is None:
+            raise CommandError("No users found; seed some data first.")
+        return user
+
+    def handle(self, *args, **options):
+        user = self._user(options['user'])
+        explain_options = {'analyze': True} if options['analyze'] else {}
+        if connection.vendor != 'postgresql':
+            self.stdout.write(self.style.WARNING(
+                f"Running on {connection.vendor}; plans differ from PostgreSQL in production."
+            ))
+
+        queries = hot_queries(user)
+        flagged = 0
+        for label, queryset in queries:
+            plan = queryset.explain(**explain_options)
+            scans = sequential_scans(plan)
+            if scans:
+                flagged += 1
+                self.stdout.write(self.style.ERROR(f"SEQ SCAN  {label}: {', '.join(scans)}"))
+            else:
+                self.stdout.write(f"ok        {label}")
+            if scans or options['verbose_plans']:
+                self.stdout.write('    ' + plan.replace('\n', '\n    '))
+
+        summary = f"{flagged} of {len(queries)} queries use a sequential scan."
+        if flagged and options['fail_on_seq_scan']:
+            raise CommandError(summary)
+        self.stdout.write(self.style.SUCCESS(summary) if not flagged else self.style.WARNING(summary))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from thryve_app import profiling
+
+
+class Command(BaseCommand):
+    help = ("Prints the profiles recorded by ProfilingMiddleware: the top functions per view, "
+            "or collapsed stacks for flamegraph.pl and speedscope.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--view', help='Only this view, e.g. marketplace:home.')
+        parser.add_argument('--top', type=int, default=20, help='Functions to list per view.')
+        parser.add_argument('--collapsed', action='store_true',
+                            help='Print collapsed stacks instead of the top-N table.')
+        parser.add_argument('--clear', action='store_true', help='Delete all recorded profiles.')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            profiling.clear()
+            self.stdout.write(self.style.SUCCESS(f"Cleared profiles in {profiling.profile_dir()}"))
+            return
+
+        profiles = profiling.load(options['view'])
+        if not profiles:
+            raise CommandError(f"No profiles recorded in {profiling.profile_dir()}"
+                               + (f" for {options['view']}" if options['view'] else '') + '.')
+        if options['collapsed']:
+            for _, stacks in profiles.values():
+                self.stdout.write(profiling.collapsed(stacks), ending='')
+        else:
+            self.stdout.write(profiling.report(profiles, options['top']))
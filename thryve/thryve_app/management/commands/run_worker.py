@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from thryve_app.jobs import run_pending, run_periodic
+
+
+class Command(BaseCommand):
+    help = "Runs queued and periodic background jobs (timeline fan-out, trending scores, etc.) until interrupted."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10,
+                            help='Number of jobs to claim per poll.')
+        parser.add_argument('--sleep', type=float, default=1.0,
+                            help='Seconds to wait when the queue is empty.')
+        parser.add_argument('--once', action='store_true',
+                            help='Run periodic jobs once, drain the currently due jobs and exit.')
+
+    def handle(self, *args, **options):
+        last_run = {}
+        while True:
+            run_periodic(last_run)
+            processed = run_pending(options['batch_size'])
+            if processed:
+                continue
+            if options['once']:
+                break
+            time.sleep(options['sleep'])
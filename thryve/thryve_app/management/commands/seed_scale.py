@@ -0,0 +1,322 @@
+import io
+import random
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from booking_app.models import BookingRequest
+from community_app.models import Comment, CommunityPost, PostLike
+from profile_app.models import BusinessProfile, UserProfile
+from thryve_app.models import Connection, Listing, ListingImage
+
+SEED_PASSWORD = 'SeedPass123!'
+PLACEHOLDER_COLORS = ['#2563eb', '#16a34a', '#dc2626', '#ca8a04', '#9333ea', '#0891b2', '#ea580c', '#4b5563']
+PLACEHOLDER_DIR = 'listings/seed'
+
+CITIES = ['Cebu City', 'Mandaue', 'Lapu-Lapu', 'Talisay', 'Manila', 'Quezon City', 'Makati', 'Davao City', 'Iloilo City', 'Bacolod']
+INDUSTRIES = ['Retail', 'Manufacturing', 'Food & Beverage', 'Logistics', 'Construction', 'IT Services', 'Printing', 'Agriculture']
+FIRST_NAMES = ['Ana', 'Ben', 'Carla', 'Dan', 'Ella', 'Felix', 'Grace', 'Hector', 'Ivy', 'Jose', 'Kim', 'Leo', 'Mara', 'Nico', 'Olive', 'Paolo']
+LAST_NAMES = ['Reyes', 'Santos', 'Cruz', 'Bautista', 'Garcia', 'Mendoza', 'Torres', 'Flores', 'Ramos', 'Villanueva']
+COMPANY_WORDS = ['Bright', 'Island', 'Metro', 'Summit', 'Harbor', 'Golden', 'Pacific', 'Prime', 'Coral', 'Evergreen']
+COMPANY_SUFFIXES = ['Trading', 'Supplies', 'Works', 'Solutions', 'Enterprises', 'Co.', 'Industries', 'Services']
+WORDS = (
+    'quality used equipment available for pickup bulk order discount local delivery slightly worn '
+    'good condition spare parts office supplies warehouse stock partnership opportunity looking for '
+    'suppliers event this weekend thanks everyone great service recommend contact me details inside'
+).split()
+
+# status -> relative frequency, roughly what production shows
+BOOKING_STATUS_WEIGHTS = {'pending': 30, 'scheduled': 20, 'completed': 30, 'declined': 12, 'cancelled': 8}
+LISTING_TYPE_WEIGHTS = {'sale': 60, 'swap': 15, 'buy': 25}
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let bulk_create store the created_at/updated_at values we generate."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def skewed_index(rng, n, skew=2.5):
+    """An index in [0, n), heavily biased towards 0 (a few users/posts get most of the activity)."""
+    return min(n - 1, int(n * rng.random() ** skew))
+
+
+def preferential_attachment(rng, n, edges_per_node):
+    """
+    Yield (a, b) index pairs of a Barabási–Albert graph: each new node links to
+    `edges_per_node` existing nodes picked in proportion to their degree, which
+    gives the power-law degree distribution of real connection graphs.
+    """
+    # Every node appears here once per edge it has, so a uniform pick is degree-weighted
+    endpoints = []
+    for node in range(1, n):
+        targets = set()
+        wanted = min(edges_per_node, node)
+        while len(targets) < wanted:
+            if endpoints and rng.random() < 0.9:
+                targets.add(rng.choice(endpoints))
+            else:
+                targets.add(rng.randrange(node))
+        for target in targets:
+            endpoints.extend((node, target))
+            yield target, node
+
+
+class Command(BaseCommand):
+    help = "Generates a large, deterministic synthetic dataset for reproducing production-scale performance."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--listings', type=int, help='Default: 5 per user.')
+        parser.add_argument('--max-images', type=int, default=3, help='Up to this many images per listing.')
+        parser.add_argument('--bookings', type=int, help='Default: 2 per listing.')
+        parser.add_argument('--connections-per-user', type=int, default=4,
+                            help='Edges each new user adds to the power-law connection graph.')
+        parser.add_argument('--posts', type=int, help='Default: 3 per user.')
+        parser.add_argument('--likes', type=int, help='Default: 10 per post.')
+        parser.add_argument('--comments', type=int, help='Default: 2 per post.')
+        parser.add_argument('--seed', type=int, default=42, help='Same seed and sizes give the same data.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--email-domain', default='seed.thryve.test',
+                            help='Seeded users get emails user<N>@<seed>.<domain>.')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now().replace(microsecond=0)
+        self.verbosity = options['verbosity']
+
+        n_users = options['users']
+        n_listings = options['listings'] if options['listings'] is not None else n_users * 5
+        n_bookings = options['bookings'] if options['bookings'] is not None else n_listings * 2
+        n_posts = options['posts'] if options['posts'] is not None else n_users * 3
+        n_likes = options['likes'] if options['likes'] is not None else n_posts * 10
+        n_comments = options['comments'] if options['comments'] is not None else n_posts * 2
+        if n_users < 2:
+            raise CommandError("--users must be at least 2.")
+
+        domain = f"{options['seed']}.{options['email_domain']}"
+        User = get_user_model()
+        if User.objects.filter(email__endswith=f'@{domain}').exists():
+            raise CommandError(f"Users @{domain} already exist; use another --seed or a fresh database.")
+
+        started = time.monotonic()
+        placeholders = self._placeholders()
+        with transaction.atomic(), explicit_timestamps(
+            Listing, ListingImage, BookingRequest, Connection, CommunityPost, PostLike, Comment,
+            BusinessProfile,
+        ):
+            users = self._users(n_users, domain)
+            listings = self._listings(users, n_listings)
+            self._images(listings, options['max_images'], placeholders)
+            self._bookings(users, listings, n_bookings)
+            self._connections(users, options['connections_per_user'])
+            self._community(users, n_posts, n_likes, n_comments)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded @{domain} in {time.monotonic() - started:.1f}s (password: {SEED_PASSWORD})."
+        ))
+
+    # --- helpers ---
+
+    def _insert(self, model, rows):
+        """bulk_create `rows` (any iterable) in batches; return the new primary keys."""
+        started = time.monotonic()
+        pks, batch = [], []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                pks.extend(obj.pk for obj in model.objects.bulk_create(batch))
+                batch = []
+        if batch:
+            pks.extend(obj.pk for obj in model.objects.bulk_create(batch))
+        if self.verbosity:
+            self.stdout.write(f"  {model._meta.label}: {len(pks)} rows in {time.monotonic() - started:.1f}s")
+        return pks
+
+    def _past(self, days=365):
+        return self.now - timedelta(seconds=self.rng.randrange(days * 24 * 60 * 60))
+
+    def _sentence(self, low, high):
+        words = self.rng.choices(WORDS, k=self.rng.randint(low, high))
+        return ' '.join(words).capitalize() + '.'
+
+    def _weighted(self, weights):
+        return self.rng.choices(list(weights), weights=list(weights.values()))[0]
+
+    def _placeholders(self):
+        """A few tiny images every seeded ListingImage points at."""
+        names = []
+        for index, color in enumerate(PLACEHOLDER_COLORS):
+            name = f"{PLACEHOLDER_DIR}/placeholder-{index}.png"
+            if not default_storage.exists(name):
+                buffer = io.BytesIO()
+                Image.new('RGB', (320, 240), color).save(buffer, format='PNG')
+                name = default_storage.save(name, ContentFile(buffer.getvalue()))
+            names.append(name)
+        return names
+
+    # --- tables ---
+
+    def _users(self, n, domain):
+        User = get_user_model()
+        password = make_password(SEED_PASSWORD)  # hashed once, shared by every seeded user
+        users = []
+
+        def rows():
+            for i in range(n):
+                first, last = self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+                company = f"{self.rng.choice(COMPANY_WORDS)} {self.rng.choice(COMPANY_SUFFIXES)} {i}"
+                users.append((f"{first} {last}", company))
+                yield User(
+                    email=f"user{i}@{domain}", password=password,
+                    first_name=first, last_name=last, company_name=company,
+                    phone_number=f"9{self.rng.randrange(10 ** 9):09d}",
+                )
+
+        pks = self._insert(User, rows())
+        self._insert(UserProfile, (
+            UserProfile(user_id=pk, display_name=name, tagline=self._sentence(3, 6))
+            for pk, (name, _) in zip(pks, users)
+        ))
+        self._insert(BusinessProfile, (
+            BusinessProfile(
+                user_id=pk, company_name=company, industry=self.rng.choice(INDUSTRIES),
+                description=self._sentence(10, 30), city=self.rng.choice(CITIES),
+                country='Philippines', created_at=self._past(),
+            )
+            for pk, (_, company) in zip(pks, users)
+        ))
+        return [(pk, name, company) for pk, (name, company) in zip(pks, users)]
+
+    def _listings(self, users, n):
+        owners = []
+        categories = [key for key, _ in Listing.CATEGORY_CHOICES]
+
+        def rows():
+            for _ in range(n):
+                # A handful of sellers own most listings
+                user_id, name, company = users[skewed_index(self.rng, len(users), skew=2)]
+                listing_type = self._weighted(LISTING_TYPE_WEIGHTS)
+                category = self.rng.choice(categories)
+                subcategories = Listing.SUBCATEGORY_CHOICES.get(category, [])
+                price = Decimal(self.rng.randrange(100, 500000)) / 100
+                owners.append(user_id)
+                listing = Listing(
+                    user_id=user_id, listing_type=listing_type, category=category,
+                    subcategory=self.rng.choice(subcategories)[0] if subcategories else None,
+                    title=self._sentence(2, 5)[:-1][:200], description=self._sentence(15, 60),
+                    price=price if listing_type == 'sale' else None,
+                    budget=price if listing_type == 'buy' else None,
+                    swap_for=self._sentence(3, 8) if listing_type == 'swap' else None,
+                    your_name=name, company=company[:100], location=self.rng.choice(CITIES),
+                    created_at=self._past(), is_available=self.rng.random() < 0.85,
+                )
+                listing.updated_at = listing.created_at
+                yield listing
+
+        return list(zip(self._insert(Listing, rows()), owners))
+
+    def _images(self, listings, max_images, placeholders):
+        def rows():
+            for listing_id, _ in listings:
+                for position in range(self.rng.randint(0, max_images)):
+                    yield ListingImage(
+                        listing_id=listing_id, image=self.rng.choice(placeholders),
+                        is_main=position == 0, uploaded_at=self.now,
+                    )
+
+        self._insert(ListingImage, rows())
+
+    def _bookings(self, users, listings, n):
+        pending_pairs = set()
+
+        def rows():
+            for _ in range(n if listings else 0):
+                listing_id, owner_id = listings[skewed_index(self.rng, len(listings), skew=1.5)]
+                sender_id = users[self.rng.randrange(len(users))][0]
+                if sender_id == owner_id:
+                    continue
+                status = self._weighted(BOOKING_STATUS_WEIGHTS)
+                if status == 'pending':
+                    # At most one pending request per (listing, sender)
+                    if (listing_id, sender_id) in pending_pairs:
+                        status = 'declined'
+                    pending_pairs.add((listing_id, sender_id))
+                created = self._past()
+                start = created.date() + timedelta(days=self.rng.randint(1, 30))
+                yield BookingRequest(
+                    listing_id=listing_id, sender_id=sender_id, receiver_id=owner_id,
+                    proposed_start_date=start, proposed_end_date=start + timedelta(days=self.rng.randint(0, 14)),
+                    message=self._sentence(4, 20) if self.rng.random() < 0.6 else None,
+                    status=status, created_at=created,
+                    updated_at=created if status == 'pending' else created + timedelta(hours=self.rng.randint(1, 72)),
+                )
+
+        self._insert(BookingRequest, rows())
+
+    def _connections(self, users, edges_per_node):
+        self._insert(Connection, (
+            Connection(user1_id=users[a][0], user2_id=users[b][0], created_at=self._past())
+            for a, b in preferential_attachment(self.rng, len(users), edges_per_node)
+        ))
+
+    def _community(self, users, n_posts, n_likes, n_comments):
+        # Draw likes and comments first so the posts are inserted with correct counters
+        likes, like_counts = set(), Counter()
+        for _ in range(n_likes if n_posts else 0):
+            pair = (skewed_index(self.rng, n_posts), self.rng.randrange(len(users)))
+            if pair not in likes:
+                likes.add(pair)
+                like_counts[pair[0]] += 1
+        comments = [
+            (skewed_index(self.rng, n_posts), self.rng.randrange(len(users)))
+            for _ in range(n_comments if n_posts else 0)
+        ]
+        comment_counts = Counter(post for post, _ in comments)
+
+        post_dates = [self._past() for _ in range(n_posts)]
+        post_ids = self._insert(CommunityPost, (
+            CommunityPost(
+                user_id=users[skewed_index(self.rng, len(users), skew=1.5)][0],
+                content=self._sentence(8, 50), created_at=post_dates[index], updated_at=post_dates[index],
+                likes_count=like_counts[index], comments_count=comment_counts[index],
+                score_dirty=True,
+            )
+            for index in range(n_posts)
+        ))
+
+        def activity_time(post):
+            return min(self.now, post_dates[post] + timedelta(minutes=self.rng.randint(1, 7 * 24 * 60)))
+
+        self._insert(PostLike, (
+            PostLike(post_id=post_ids[post], user_id=users[user][0], created_at=activity_time(post))
+            for post, user in sorted(likes)
+        ))
+        self._insert(Comment, (
+            Comment(post_id=post_ids[post], user_id=users[user][0], content=self._sentence(3, 25)[:500],
+                    created_at=activity_time(post))
+            for post, user in comments
+        ))
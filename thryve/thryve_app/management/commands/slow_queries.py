@@ -0,0 +1,66 @@
+from statistics import mean
+
+from django.core.management.base import BaseCommand
+
+from thryve_app import slow_queries
+
+
+class Command(BaseCommand):
+    help = ("Shows the slow query log written by SlowQueryMiddleware, newest first, "
+            "or summarised per query shape.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20, help='Entries (or shapes with --summary) to show.')
+        parser.add_argument('--view', help='Only queries run by this view, e.g. bookings.')
+        parser.add_argument('--summary', action='store_true',
+                            help='One line per query shape: count, mean and max time, views and callers.')
+        parser.add_argument('--plans', action='store_true', help='Print the captured EXPLAIN plan of each query.')
+        parser.add_argument('--clear', action='store_true', help='Empty the log and the captured plans.')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            slow_queries.clear()
+            self.stdout.write(self.style.SUCCESS(f"Cleared {slow_queries.log_dir()}"))
+            return
+
+        entries = slow_queries.read()
+        if options['view']:
+            entries = [entry for entry in entries if entry['view'] == options['view']]
+        if not entries:
+            self.stdout.write("No slow queries logged.")
+            return
+
+        if options['summary']:
+            self._summary(entries, options)
+            return
+        for entry in reversed(entries[-options['limit']:]):
+            self.stdout.write(self.style.WARNING(
+                f"{entry['at']}  {entry['ms']:>9.1f} ms  {entry['view']}  {entry['frame']}  "
+                f"shape {entry['shape_id']} params {entry['params']}"
+            ))
+            self.stdout.write(f"    {entry['sql']}")
+            self._plan(entry, options)
+
+    def _summary(self, entries, options):
+        shapes = {}
+        for entry in entries:
+            shapes.setdefault(entry['shape_id'], []).append(entry)
+        ranked = sorted(shapes.values(), key=lambda group: -sum(entry['ms'] for entry in group))
+        for group in ranked[:options['limit']]:
+            times = [entry['ms'] for entry in group]
+            views = sorted({str(entry['view']) for entry in group})
+            frames = sorted({str(entry['frame']) for entry in group})
+            self.stdout.write(self.style.WARNING(
+                f"{len(group):>5}x  mean {mean(times):>9.1f} ms  max {max(times):>9.1f} ms  "
+                f"shape {group[0]['shape_id']}  distinct params {len({entry['params'] for entry in group})}"
+            ))
+            self.stdout.write(f"    views: {', '.join(views)}")
+            self.stdout.write(f"    from: {', '.join(frames)}")
+            self.stdout.write(f"    {group[-1]['sql']}")
+            self._plan(group[-1], options)
+
+    def _plan(self, entry, options):
+        if not options['plans']:
+            return
+        plan = entry['plan'] or '(EXPLAIN not captured yet)\n'
+        self.stdout.write('    ' + plan.rstrip('\n').replace('\n', '\n    '))
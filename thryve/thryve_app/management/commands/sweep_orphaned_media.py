@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+import cloudinary.api
+from cloudinary_storage.storage import MediaCloudinaryStorage
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from thryve_app.media import referenced_files, upload_directories
+
+
+def _walk(storage, path):
+    """Yield every file name under `path`, recursively."""
+    directories, files = storage.listdir(path)
+    for name in files:
+        yield f"{path}/{name}"
+    for directory in directories:
+        yield from _walk(storage, f"{path}/{directory}")
+
+
+def _cloudinary_files(storage, directory):
+    """
+    (name, uploaded at) of the storage's uploads under `directory`, from the
+    paged Admin API listing: Cloudinary storage has no get_modified_time, but
+    every resource carries its created_at.
+    """
+    options = {
+        'type': 'upload',
+        'prefix': storage._prepend_prefix(f"{directory}/"),
+        'resource_type': storage.RESOURCE_TYPE,
+        'max_results': 500,
+        'tags': True,
+    }
+    while True:
+        response = cloudinary.api.resources(**options)
+        for resource in response['resources']:
+            # Only what this storage uploaded, never other assets of the account
+            if storage.TAG in resource.get('tags', ()):
+                yield resource['public_id'], parse_datetime(resource['created_at'])
+        if not response.get('next_cursor'):
+            break
+        options['next_cursor'] = response['next_cursor']
+
+
+def _stored_files(storage, directory):
+    """(name, modified time or None if unknown) of every file under `directory`."""
+    if isinstance(storage, MediaCloudinaryStorage):
+        yield from _cloudinary_files(storage, directory)
+        return
+    try:
+        names = list(_walk(storage, directory))
+    except FileNotFoundError:
+        return
+    for name in names:
+        try:
+            yield name, storage.get_modified_time(name)
+        except NotImplementedError:
+            yield name, None
+
+
+class Command(BaseCommand):
+    help = "Deletes avatar, logo and listing image files that no database row references."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-age', type=int, default=60,
+                            help='Skip files modified in the last N minutes (uploads still in flight).')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only list the orphaned files.')
+
+    def handle(self, *args, **options):
+        storage = default_storage
+        cutoff = timezone.now() - timedelta(minutes=options['min_age'])
+        referenced = referenced_files()
+
+        orphaned, undated = [], 0
+        for directory in upload_directories():
+            for name, modified in _stored_files(storage, directory):
+                if name in referenced:
+                    continue
+                if modified is None:
+                    # No way to tell a finished orphan from an upload in flight
+                    undated += 1
+                    continue
+                if modified > cutoff:
+                    continue
+                orphaned.append(name)
+
+        for name in orphaned:
+            self.stdout.write(name)
+            if not options['dry_run']:
+                storage.delete(name)
+
+        verb = 'Found' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(orphaned)} orphaned file(s)."))
+        if undated:
+            self.stdout.write(self.style.WARNING(
+                f"Skipped {undated} unreferenced file(s): the storage does not report modification times."
+            ))
@@ -0,0 +1,99 @@
+"""
+Lifecycle of uploaded files (avatars, business logos, listing images).
+
+`track_files(Model, 'field', ...)` remembers each file's name when an instance
+is loaded. After a save that replaced the file, or a delete, the old name is
+handed to a background job (thryve_app.jobs), so the request neither reloads
+the row to compare nor waits on the remote storage delete. The job row is
+written in the same transaction, so nothing is deleted if the write rolls back.
+Names can be shared (seed_scale points many rows at the same placeholder), so
+the job only deletes a file once no tracked row refers to it any more.
+
+`manage.py sweep_orphaned_media` removes files no tracked row points to, e.g.
+uploads left behind by failed requests or before this tracking existed.
+"""
+from django.core.files.storage import default_storage
+from django.db.models.signals import post_delete, post_init, post_save
+
+from .jobs import enqueue
+
+# model -> names of its tracked file fields
+TRACKED = {}
+
+
+def _file_name(value):
+    return getattr(value, 'name', value) or ''
+
+
+def _remember(sender, instance, **kwargs):
+    # Read the raw value: deferred fields are absent and must not be loaded here
+    instance._original_files = {
+        name: _file_name(instance.__dict__[name])
+        for name in TRACKED[sender]
+        if name in instance.__dict__
+    }
+
+
+def _schedule_replaced(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    original = getattr(instance, '_original_files', {})
+    for name in TRACKED[sender]:
+        current = _file_name(getattr(instance, name))
+        old = original.get(name)
+        if old and old != current:
+            enqueue(delete_stored_file, name=old)
+        original[name] = current
+    instance._original_files = original
+
+
+def _schedule_deleted(sender, instance, **kwargs):
+    for name in TRACKED[sender]:
+        current = _file_name(getattr(instance, name))
+        if current:
+            enqueue(delete_stored_file, name=current)
+
+
+def track_files(model, *field_names):
+    """Delete replaced and orphaned files of `model`'s file fields in the background."""
+    TRACKED[model] = field_names
+    post_init.connect(_remember, sender=model, dispatch_uid=f'media-init-{model._meta.label}')
+    post_save.connect(_schedule_replaced, sender=model, dispatch_uid=f'media-save-{model._meta.label}')
+    post_delete.connect(_schedule_deleted, sender=model, dispatch_uid=f'media-delete-{model._meta.label}')
+
+
+def delete_stored_file(name):
+    """Background job: remove one file from storage unless a row still uses it (missing files are ignored)."""
+    if not is_referenced(name):
+        default_storage.delete(name)
+
+
+def is_referenced(name):
+    """Whether any tracked row stores the file `name`."""
+    return any(
+        model.objects.filter(**{field_name: name}).exists()
+        for model, field_names in TRACKED.items()
+        for field_name in field_names
+    )
+
+
+def referenced_files():
+    """Every file name currently stored on a tracked row."""
+    names = set()
+    for model, field_names in TRACKED.items():
+        for field_name in field_names:
+            names.update(
+                model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+                .values_list(field_name, flat=True)
+                .iterator()
+            )
+    return names
+
+
+def upload_directories():
+    """The upload_to directories of every tracked field."""
+    return sorted({
+        model._meta.get_field(field_name).upload_to.rstrip('/')
+        for model, field_names in TRACKED.items()
+        for field_name in field_names
+    })
@@ -0,0 +1,310 @@
+"""
+Built-in metrics in the Prometheus text format.
+
+MetricsMiddleware (METRICS_ENABLED) records, per request:
+
+    thryve_http_request_duration_seconds  histogram by view, method and status
+    thryve_db_queries_per_request         histogram by view
+    thryve_db_query_duration_seconds      histogram by statement (select, insert, ...)
+    thryve_cache_requests_total           counter by cache alias and hit/miss
+
+Each process keeps its numbers in memory and writes them to its own file in
+METRICS_DIR at most every METRICS_FLUSH_INTERVAL seconds, so gunicorn workers
+never contend for a file. The thryve_app:metrics endpoint adds up every file
+and appends gauges read at scrape time: cache hit ratios and background job
+queue depth. Files of exited workers are kept so counters never go
+backwards; empty METRICS_DIR when deploying, as Prometheus expects counters
+to reset on a restart anyway.
+"""
+import atexit
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from .models import BackgroundJob
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+QUERY_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+STATEMENTS = ('select', 'insert', 'update', 'delete')
+# The method label is client supplied: anything else is 'other' so it cannot add series
+METHODS = ('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS')
+DEFAULT_FLUSH_INTERVAL = 10
+
+
+class Metric:
+    def __init__(self, name, help, labelnames, buckets=None):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+
+    @property
+    def type(self):
+        return 'counter' if self.buckets is None else 'histogram'
+
+
+REQUEST_DURATION = Metric(
+    'thryve_http_request_duration_seconds', 'Time to produce a response.', ('view', 'method', 'status'),
+    LATENCY_BUCKETS,
+)
+QUERIES_PER_REQUEST = Metric(
+    'thryve_db_queries_per_request', 'SQL queries issued by one request.', ('view',), QUERY_COUNT_BUCKETS,
+)
+QUERY_DURATION = Metric(
+    'thryve_db_query_duration_seconds', 'Time to run one SQL statement.', ('statement',), QUERY_LATENCY_BUCKETS,
+)
+CACHE_REQUESTS = Metric(
+    'thryve_cache_requests_total', 'Cache lookups by result.', ('cache', 'result'),
+)
+METRICS = {metric.name: metric for metric in (REQUEST_DURATION, QUERIES_PER_REQUEST, QUERY_DURATION, CACHE_REQUESTS)}
+
+
+class Registry:
+    """
+    This process's samples: {metric name: {label values: value}}. A counter's
+    value is a number; a histogram's is [count per bucket..., +Inf count, sum].
+    """
+
+    def __init__(self):
+        self.values = {name: {} for name in METRICS}
+        self._lock = threading.Lock()
+        self._pid = None
+        self._flushed = time.monotonic()
+
+    def inc(self, metric, labels, amount=1):
+        with self._lock:
+            series = self.values[metric.name]
+            series[labels] = series.get(labels, 0) + amount
+
+    def observe(self, metric, labels, value):
+        with self._lock:
+            series = self.values[metric.name]
+            if labels not in series:
+                series[labels] = [0] * (len(metric.buckets) + 2)
+            sample = series[labels]
+            for i, bound in enumerate(metric.buckets):
+                if value <= bound:
+                    sample[i] += 1
+                    break
+            else:
+                sample[-2] += 1
+            sample[-1] += value
+
+    def flush(self, directory):
+        """Replace this process's file in `directory` with its current samples."""
+        with self._lock:
+            if self._pid != os.getpid():
+                # First flush, or a worker forked from a process that imported us
+                self._pid = os.getpid()
+                self._file = f'{self._pid}-{uuid.uuid4().hex[:8]}.json'
+            data = {name: [[list(labels), value] for labels, value in series.items()]
+                    for name, series in self.values.items()}
+            self._flushed = time.monotonic()
+            filename = self._file
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        temporary = directory / f'.{filename}.tmp'
+        temporary.write_text(json.dumps(data))
+        os.replace(temporary, directory / filename)
+
+    def flush_due(self, interval):
+        return time.monotonic() - self._flushed >= interval
+
+
+registry = Registry()
+
+
+def metrics_dir():
+    return Path(getattr(settings, 'METRICS_DIR', Path(settings.BASE_DIR) / '.metrics'))
+
+
+def collect(directory):
+    """Add up the samples of every process file in `directory`."""
+    totals = {name: {} for name in METRICS}
+    for path in Path(directory).glob('*.json'):
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue  # removed or half-written by a crashed worker
+        for name, samples in data.items():
+            if name not in totals:
+                continue
+            series = totals[name]
+            for labels, value in samples:
+                labels = tuple(labels)
+                if labels not in series:
+                    series[labels] = value
+                elif isinstance(value, list):
+                    series[labels] = [a + b for a, b in zip(series[labels], value)]
+                else:
+                    series[labels] += value
+    return totals
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if isinstance(value, float) and math.isinf(value):
+        return '+Inf'
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render(totals, gauges=()):
+    """Prometheus text exposition of collected totals plus (name, help, [(labels, value)]) gauges."""
+    lines = []
+    for name, series in totals.items():
+        metric = METRICS[name]
+        lines += [f'# HELP {name} {metric.help}', f'# TYPE {name} {metric.type}']
+        for labels, value in sorted(series.items()):
+            if metric.buckets is None:
+                lines.append(f'{name}{_labels(metric.labelnames, labels)} {_number(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip((*metric.buckets, math.inf), value[:-1]):
+                cumulative += count
+                le = (('le', _number(float(bound))),)
+                lines.append(f'{name}_bucket{_labels(metric.labelnames, labels, le)} {cumulative}')
+            lines.append(f'{name}_sum{_labels(metric.labelnames, labels)} {_number(float(value[-1]))}')
+            lines.append(f'{name}_count{_labels(metric.labelnames, labels)} {cumulative}')
+    for name, help, samples in gauges:
+        lines += [f'# HELP {name} {help}', f'# TYPE {name} gauge']
+        for labels, value in samples:
+            lines.append(f'{name}{_labels([k for k, _ in labels], [v for _, v in labels])} {_number(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+def scrape_gauges(totals):
+    """Gauges computed when scraped: cache hit ratio and background job queue depth."""
+    lookups = {}
+    for (alias, result), count in totals[CACHE_REQUESTS.name].items():
+        lookups.setdefault(alias, {}).setdefault(result, 0)
+        lookups[alias][result] += count
+    ratios = [
+        ((('cache', alias),), counts.get('hit', 0) / sum(counts.values()))
+        for alias, counts in sorted(lookups.items()) if sum(counts.values())
+    ]
+
+    by_status = dict(BackgroundJob.objects.values_list('status').annotate(n=Count('pk')).order_by())
+    jobs = [((('status', status),), by_status.get(status, 0)) for status, _ in BackgroundJob.STATUS_CHOICES]
+    oldest = BackgroundJob.objects.filter(status='queued', run_after__lte=timezone.now()).aggregate(
+        oldest=Min('run_after'))['oldest']
+    lag = (timezone.now() - oldest).total_seconds() if oldest else 0.0
+
+    return [
+        ('thryve_cache_hit_ratio', 'Share of cache lookups that were hits, since the metrics were reset.', ratios),
+        ('thryve_background_jobs', 'Background jobs by status.', jobs),
+        ('thryve_background_jobs_lag_seconds', 'Age of the oldest queued job that is due to run.', [((), lag)]),
+    ]
+
+
+def exposition():
+    """Flush this process, then render every process's metrics and the scrape-time gauges."""
+    directory = metrics_dir()
+    registry.flush(directory)
+    totals = collect(directory)
+    return render(totals, scrape_gauges(totals))
+
+
+def _statement(sql):
+    verb = sql.lstrip().split(None, 1)[0].lower() if sql.strip() else ''
+    return verb if verb in STATEMENTS else 'other'
+
+
+def _method(method):
+    return method if method in METHODS else 'other'
+
+
+class _RequestQueries:
+    """connection.execute_wrapper that counts a request's queries and times each one."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            registry.observe(QUERY_DURATION, (_statement(sql),), time.perf_counter() - start)
+
+
+_MISSING = object()
+_installed = False
+
+
+def _cache_alias(cache):
+    alias = getattr(cache, '_metrics_alias', None)
+    if alias is None:
+        # caches[alias] is per thread; find which alias this instance serves
+        alias = next((a for a in settings.CACHES if caches[a] is cache), 'unknown')
+        cache._metrics_alias = alias
+    return alias
+
+
+def _install():
+    """Count hits and misses of every configured cache backend (once per process)."""
+    global _installed
+    if _installed:
+        return
+    _installed = True
+
+    for backend in {type(caches[alias]) for alias in settings.CACHES}:
+        if backend.get is BaseCache.get:
+            continue
+        get = backend.get
+
+        def counted_get(self, key, default=None, version=None, _get=get):
+            value = _get(self, key, _MISSING, version=version)
+            registry.inc(CACHE_REQUESTS, (_cache_alias(self), 'miss' if value is _MISSING else 'hit'))
+            return default if value is _MISSING else value
+
+        backend.get = counted_get
+
+    atexit.register(lambda: registry.flush(metrics_dir()))
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.flush_interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL)
+        _install()
+
+    def __call__(self, request):
+        queries = _RequestQueries()
+        start = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        registry.observe(REQUEST_DURATION, (view, _method(request.method), str(response.status_code)), elapsed)
+        registry.observe(QUERIES_PER_REQUEST, (view,), queries.count)
+        if registry.flush_due(self.flush_interval):
+            registry.flush(metrics_dir())
+        return response
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:40
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('thryve_app', '0009_backgroundjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('verb', models.CharField(choices=[('booking.requested', 'Booking requested'), ('booking.scheduled', 'Booking scheduled'), ('booking.declined', 'Booking declined'), ('booking.cancelled', 'Booking cancelled'), ('booking.completed', 'Booking completed'), ('listing.created', 'Listing created'), ('listing.updated', 'Listing updated'), ('listing.deleted', 'Listing deleted'), ('connection.requested', 'Connection requested'), ('connection.accepted', 'Connection accepted'), ('connection.declined', 'Connection declined'), ('connection.removed', 'Connection removed'), ('post.created', 'Post created'), ('post.commented', 'Post commented')], max_length=30)),
+                ('summary', models.CharField(max_length=255)),
+                ('target_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', '-created_at'], include=('verb', 'summary'), name='activity_user_created_idx'), models.Index(fields=['created_at'], name='activity_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('thryve_app', '0010_activityevent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='connectionrequest',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['receiver'], name='connreq_receiver_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['-created_at'], name='listing_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['user', '-created_at'], name='listing_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(condition=models.Q(('is_available', True)), fields=['user', '-created_at'], name='listing_user_available_idx'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from django.utils.html import strip_tags
 
 def validate_listing_image_size(image):
@@ -112,11 +113,34 @@ class Listing(models.Model):
     location = models.CharField(max_length=100)
     date = models.DateField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Also moved when its images change; keys the cached listing card
+    updated_at = models.DateTimeField(auto_now=True)
     is_available = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            # Marketplace grid and dashboard "Marketplace updates", newest first
+            models.Index(fields=['-created_at'], name='listing_created_idx'),
+            # Dashboard "My Listings"
+            models.Index(fields=['user', '-created_at'], name='listing_user_created_idx'),
+            # Public business page and the active-listings count
+            models.Index(
+                fields=['user', '-created_at'],
+                condition=models.Q(is_available=True),
+                name='listing_user_available_idx',
+            ),
+        ]
+
+    def _prefetched_images(self):
+        """Images loaded by prefetch_related('images'), or None if not prefetched"""
+        return getattr(self, '_prefetched_objects_cache', {}).get('images')
+
     @property
     def main_image(self):
         """Return the main image for this listing"""
+        images = self._prefetched_images()
+        if images is not None:
+            return next((image for image in images if image.is_main), None)
         return self.images.filter(is_main=True).first()
 
     @property
@@ -157,6 +181,9 @@ class Listing(models.Model):
     @property
     def image_count(self):
         """Return the number of images for this listing"""
+        images = self._prefetched_images()
+        if images is not None:
+            return len(images)
         return self.images.count()
 
     @property
@@ -220,6 +247,10 @@ class ConnectionRequest(models.Model):
 
     class Meta:
         unique_together = ['sender', 'receiver']
+        indexes = [
+            # Incoming requests tab and dashboard count; sent requests use the unique index
+            models.Index(fields=['receiver'], condition=models.Q(status='pending'), name='connreq_receiver_pending_idx'),
+        ]
 
     def __str__(self):
         return f"{self.sender} -> {self.receiver} ({self.status})"
@@ -233,5 +264,87 @@ class Connection(models.Model):
     class Meta:
         unique_together = ['user1', 'user2']
 
+    @classmethod
+    def connected_user_ids(cls, user):
+        """Return the ids of every user connected to `user`, in either direction"""
+        user_id = getattr(user, 'pk', user)
+        pairs = cls.objects.filter(
+            models.Q(user1_id=user_id) | models.Q(user2_id=user_id)
+        ).values_list('user1_id', 'user2_id')
+        return {u2 if u1 == user_id else u1 for u1, u2 in pairs}
+
     def __str__(self):
         return f"{self.user1} <-> {self.user2}"
+
+
+class BackgroundJob(models.Model):
+    """A deferred function call, run by `manage.py run_worker` (see thryve_app.jobs)"""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('failed', 'Failed'),
+    ]
+
+    name = models.CharField(max_length=200, help_text='Dotted path of the function to call')
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    run_after = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'run_after'], name='bgjob_status_run_after_idx')]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+
+class ActivityEvent(models.Model):
+    """
+    One line of a user's recent activity, appended by the write paths through
+    thryve_app.activity.record_activity and never updated afterwards.
+    """
+    VERB_CHOICES = [
+        ('booking.requested', 'Booking requested'),
+        ('booking.scheduled', 'Booking scheduled'),
+        ('booking.declined', 'Booking declined'),
+        ('booking.cancelled', 'Booking cancelled'),
+        ('booking.completed', 'Booking completed'),
+        ('listing.created', 'Listing created'),
+        ('listing.updated', 'Listing updated'),
+        ('listing.deleted', 'Listing deleted'),
+        ('connection.requested', 'Connection requested'),
+        ('connection.accepted', 'Connection accepted'),
+        ('connection.declined', 'Connection declined'),
+        ('connection.removed', 'Connection removed'),
+        ('post.created', 'Post created'),
+        ('post.commented', 'Post commented'),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='activity_events', on_delete=models.CASCADE)
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL, related_name='+', null=True, blank=True, on_delete=models.SET_NULL
+    )
+    verb = models.CharField(max_length=30, choices=VERB_CHOICES)
+    # Rendered for `user` at write time so reading the feed needs no joins
+    summary = models.CharField(max_length=255)
+    target_id = models.PositiveIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Covering index: the recent-activity widget is an index-only scan on PostgreSQL.
+            # SQLite ignores include= (models.W040), so tests only see a (user, created_at) index
+            models.Index(
+                fields=['user', '-created_at'],
+                include=['verb', 'summary'],
+                name='activity_user_created_idx',
+            ),
+            models.Index(fields=['created_at'], name='activity_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.summary}"
@@ -0,0 +1,223 @@
+"""
+Opt-in sampling profiler.
+
+ProfilingMiddleware profiles a fraction of requests (PROFILING_SAMPLE_RATE)
+plus any request that carries PROFILING_TOKEN in the X-Thryve-Profile header
+or the thryve_profile cookie, so one slow page can be profiled on demand.
+With neither set the middleware is off.
+
+A profiled request gets a sampler thread that reads the request thread's
+stack every PROFILING_INTERVAL seconds. Stacks are kept in the collapsed
+format of flamegraph.pl and speedscope ("outer;inner;leaf count") and
+merged into one file per resolved view name (marketplace:home, bookings,
+...) under PROFILING_DIR, so every worker process adds to the same profile.
+The merge happens under an flock and keeps one line per distinct stack, so a
+profile grows with the code paths a view takes, not with its traffic.
+`manage.py profile_report` and the staff-only thryve_app:profiling page read
+them back as top-N function tables or raw collapsed stacks. Only the
+request's own thread is sampled: time an async view spends on other threads
+shows up as the request thread waiting for it.
+"""
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process development only
+    fcntl = None
+
+HEADER = 'HTTP_X_THRYVE_PROFILE'
+COOKIE = 'thryve_profile'
+DEFAULT_INTERVAL = 0.005
+SUFFIX = '.folded'
+
+_UNSAFE_FILENAME = re.compile(r'[^\w.-]')
+
+
+def profile_dir():
+    return Path(getattr(settings, 'PROFILING_DIR', Path(settings.BASE_DIR) / '.profiles'))
+
+
+def frame_label(frame):
+    """module:function for one frame, e.g. thryve_app.views:dashboard."""
+    code = frame.f_code
+    module = frame.f_globals.get('__name__') or os.path.basename(code.co_filename)
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def collapse(frame, root):
+    """The stack from just below `root` down to `frame`, outermost first, joined by ';'."""
+    labels = []
+    while frame is not None and frame is not root:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class StackSampler(threading.Thread):
+    """Samples another thread's stack at a fixed interval until stopped."""
+
+    def __init__(self, thread_id, root, interval=DEFAULT_INTERVAL):
+        super().__init__(name='thryve-profiler', daemon=True)
+        self.thread_id = thread_id
+        self.root = root
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                stack = collapse(frame, self.root)
+                if stack:
+                    self.stacks[stack] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+        return self.stacks
+
+
+def _view_path(view_name):
+    return profile_dir() / (_UNSAFE_FILENAME.sub('_', view_name) + SUFFIX)
+
+
+@contextmanager
+def _locked(f, exclusive):
+    if fcntl is None:
+        yield f
+        return
+    fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+    try:
+        yield f
+    finally:
+        fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _parse(f, name):
+    """(view name, profiled requests, Counter of collapsed stacks) from one profile file."""
+    requests, stacks = 0, Counter()
+    for line in f:
+        if line.startswith('# '):
+            # "# <view name> <requests>"; older files have one "# <view name>" per request
+            header, _, count = line[2:].strip().rpartition(' ')
+            if header and count.isdigit():
+                name, requests = header, requests + int(count)
+            else:
+                name, requests = line[2:].strip(), requests + 1
+            continue
+        stack, _, count = line.rstrip('\n').rpartition(' ')
+        if stack and count.isdigit():
+            stacks[stack] += int(count)
+    return name, requests, stacks
+
+
+def record(view_name, stacks):
+    """Merge one request's stacks into the view's profile."""
+    if not stacks:
+        return
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    fd = os.open(_view_path(view_name), os.O_RDWR | os.O_CREAT, 0o644)
+    with open(fd, 'r+') as f, _locked(f, exclusive=True):
+        _, requests, merged = _parse(f, view_name)
+        merged.update(stacks)
+        # The header names the view, as the file name is lossy, and counts its requests
+        f.seek(0)
+        f.truncate()
+        f.write(f"# {view_name} {requests + 1}\n" + collapsed(merged))
+
+
+def load(view_name=None):
+    """{view name: (profiled requests, Counter of collapsed stacks)}, optionally for one view."""
+    directory = profile_dir()
+    paths = [_view_path(view_name)] if view_name else sorted(directory.glob(f'*{SUFFIX}'))
+    profiles = {}
+    for path in paths:
+        if not path.exists():
+            continue
+        with open(path) as f, _locked(f, exclusive=False):
+            name, requests, stacks = _parse(f, path.stem)
+        profiles[name] = (requests, stacks)
+    return profiles
+
+
+def clear():
+    for path in profile_dir().glob(f'*{SUFFIX}'):
+        path.unlink()
+
+
+def top_functions(stacks, limit=20):
+    """
+    [(function, self samples, total samples)], heaviest total first. Self
+    counts samples where the function was running; total also counts its callees.
+    """
+    own, total = Counter(), Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(';')
+        own[frames[-1]] += count
+        for frame in set(frames):
+            total[frame] += count
+    return [(frame, own[frame], samples) for frame, samples in total.most_common(limit)]
+
+
+def collapsed(stacks):
+    return ''.join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
+
+
+def report(profiles, limit=20):
+    """Plain-text top-N table per view."""
+    lines = []
+    for name, (requests, stacks) in sorted(profiles.items()):
+        samples = sum(stacks.values())
+        lines.append(f"{name}: {requests} request(s), {samples} sample(s)")
+        lines.append(f"  {'self %':>7} {'total %':>7}  function")
+        for frame, own, total in top_functions(stacks, limit):
+            lines.append(f"  {100 * own / samples:>7.1f} {100 * total / samples:>7.1f}  {frame}")
+        lines.append('')
+    return '\n'.join(lines)
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.sample_rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0)
+        self.token = getattr(settings, 'PROFILING_TOKEN', '')
+        if not self.sample_rate and not self.token:
+            raise MiddlewareNotUsed
+        self.interval = getattr(settings, 'PROFILING_INTERVAL', DEFAULT_INTERVAL)
+        self.get_response = get_response
+
+    def wants_profile(self, request):
+        if self.token and any(
+            hmac.compare_digest(self.token.encode(), candidate.encode())
+            for candidate in (request.META.get(HEADER, ''), request.COOKIES.get(COOKIE, ''))
+        ):
+            return True
+        return random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if not self.wants_profile(request):
+            return self.get_response(request)
+
+        # Stacks are cut at this frame, leaving out the server and outer middleware
+        sampler = StackSampler(threading.get_ident(), sys._getframe(), self.interval)
+        sampler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            stacks = sampler.stop()
+
+        match = getattr(request, 'resolver_match', None)
+        record(match.view_name if match else 'unresolved', stacks)
+        return response
@@ -0,0 +1,120 @@
+"""
+Per-view query budgets and N+1 detection.
+
+`@query_budget(n)` declares how many queries one request to a view may issue,
+counting everything the request does (session, user, profiles, the view and
+its template). QueryBudgetMiddleware, enabled by QUERY_BUDGET_ENABLED
+in development, counts the queries of every request and logs a warning when
+a view goes over its budget or runs the same SQL shape N_PLUS_ONE_THRESHOLD
+or more times, the signature of a query issued once per row of a loop.
+QueryBudgetTestMixin turns the same checks into test failures.
+"""
+import logging
+import re
+from collections import Counter
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.urls import resolve
+
+logger = logging.getLogger(__name__)
+
+N_PLUS_ONE_THRESHOLD = 3
+
+# "IN (%s, %s, %s)" -> "IN (%s, ...)", so lists of different lengths share a shape
+_PARAMETER_LIST = re.compile(r'\(%s(?:, %s)+\)')
+_TRANSACTION_STATEMENTS = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+
+def query_budget(max_queries):
+    """Declare the most queries one request to the decorated view may issue."""
+    def decorator(view_func):
+        view_func.query_budget = max_queries
+        return view_func
+    return decorator
+
+
+def view_budget(view_func):
+    # functools.wraps copies the attribute, so it survives login_required & co.
+    return getattr(view_func, 'query_budget', None)
+
+
+def sql_shape(sql):
+    return _PARAMETER_LIST.sub('(%s, ...)', sql)
+
+
+class QueryRecorder:
+    """connection.execute_wrapper that counts queries by SQL shape."""
+
+    def __init__(self):
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.startswith(_TRANSACTION_STATEMENTS):
+            self.shapes[sql_shape(sql)] += 1
+        return execute(sql, params, many, context)
+
+    @property
+    def count(self):
+        return sum(self.shapes.values())
+
+    def problems(self, budget=None, threshold=N_PLUS_ONE_THRESHOLD):
+        """Human-readable budget overruns and repeated shapes; empty if all is well."""
+        problems = []
+        if budget is not None and self.count > budget:
+            problems.append(f"{self.count} queries, budget is {budget}")
+        for shape, times in self.shapes.most_common():
+            if times < threshold:
+                break
+            problems.append(f"same query {times} times (N+1?): {shape}")
+        return problems
+
+
+class QueryBudgetMiddleware:
+    """Development aid: log requests that exceed their view's budget or repeat queries."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_BUDGET_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = getattr(settings, 'QUERY_BUDGET_N_PLUS_ONE_THRESHOLD', N_PLUS_ONE_THRESHOLD)
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+
+        for problem in recorder.problems(getattr(request, '_query_budget', None), self.threshold):
+            logger.warning("%s %s: %s", request.method, request.path, problem)
+        response['X-Query-Count'] = str(recorder.count)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._query_budget = view_budget(view_func)
+
+
+class QueryBudgetTestMixin:
+    """TestCase mixin: request a URL and fail on a blown budget or repeated queries."""
+
+    n_plus_one_threshold = N_PLUS_ONE_THRESHOLD
+
+    def assertWithinQueryBudget(self, url, budget=None, method='get', **request_kwargs):
+        """
+        Request `url` with self.client and return the response. `budget`
+        defaults to the one declared on the URL's view with @query_budget.
+        """
+        if budget is None:
+            budget = view_budget(resolve(urlsplit(url).path).func)
+            if budget is None:
+                self.fail(f"The view for {url} declares no @query_budget")
+
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            response = getattr(self.client, method)(url, **request_kwargs)
+
+        problems = recorder.problems(budget, self.n_plus_one_threshold)
+        if problems:
+            self.fail(f"{method.upper()} {url}:\n  " + '\n  '.join(problems))
+        return response
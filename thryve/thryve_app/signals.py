@@ -0,0 +1,55 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from booking_app.models import BookingRequest
+from . import cache_tags
+from .media import track_files
+from .models import Connection, ConnectionRequest, Listing, ListingImage
+
+# Replaced or deleted listing images are removed from storage in the background
+track_files(ListingImage, 'image')
+
+
+# 'listings' and 'bookings' change with any listing or booking: the marketplace
+# grid shows every listing, hides the ones others have scheduled and shows the
+# viewer's booking status on each
+
+def _booking_tags(booking):
+    return [f'user:{booking.sender_id}:bookings', f'user:{booking.receiver_id}:bookings',
+            f'listing:{booking.listing_id}:bookings', 'bookings']
+
+
+def _listing_tags(listing):
+    return [f'listing:{listing.pk}', f'user:{listing.user_id}:listings', 'listings']
+
+
+def _listing_image_tags(image):
+    # Listing cards and the My Listings widget render image URLs
+    owner_id = Listing.objects.filter(pk=image.listing_id).values_list('user_id', flat=True).first()
+    tags = [f'listing:{image.listing_id}', 'listings']
+    if owner_id is not None:
+        tags.append(f'user:{owner_id}:listings')
+    return tags
+
+
+def _connection_request_tags(request):
+    return [f'user:{request.sender_id}:connection_requests', f'user:{request.receiver_id}:connection_requests']
+
+
+def _connection_tags(connection):
+    return [f'user:{connection.user1_id}:connections', f'user:{connection.user2_id}:connections']
+
+
+cache_tags.invalidate_on(BookingRequest, _booking_tags)
+cache_tags.invalidate_on(Listing, _listing_tags)
+cache_tags.invalidate_on(ListingImage, _listing_image_tags)
+cache_tags.invalidate_on(ConnectionRequest, _connection_request_tags)
+cache_tags.invalidate_on(Connection, _connection_tags)
+
+
+@receiver(post_save, sender=ListingImage)
+@receiver(post_delete, sender=ListingImage)
+def touch_listing(sender, instance, **kwargs):
+    # Listing cards show the images, so a new key for the listing's cached card
+    Listing.objects.filter(pk=instance.listing_id).update(updated_at=timezone.now())
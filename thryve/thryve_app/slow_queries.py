@@ -0,0 +1,263 @@
+"""
+Slow query log.
+
+SlowQueryMiddleware (SLOW_QUERY_THRESHOLD_MS, 0 disables it) watches every
+query a request runs and keeps the ones slower than the threshold, with:
+
+    shape    the SQL with IN lists collapsed (see query_budget.sql_shape)
+    params   a fingerprint of the parameter values, to spot repeated lookups
+             without writing user data to disk
+    view     the resolved view name
+    frame    the innermost project frame that ran it, e.g.
+             booking_app/views.py:120 in bookings
+
+Entries go to a fixed-size ring file in SLOW_QUERY_LOG_DIR, so the log never
+outgrows SLOW_QUERY_LOG_SIZE entries and all worker processes share it under
+a file lock. The first time a shape is slow, its EXPLAIN is queued for an
+explainer thread in the worker process, with the parameters still only in
+memory, so the slow request does not wait for it; the plan (never the
+parameters) is stored next to the ring. The queue is small and drops work
+when full: a shape that misses out is explained the next time it is slow.
+`manage.py slow_queries` reads both.
+"""
+import hashlib
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import traceback
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+
+from .query_budget import sql_shape
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process development server, no locking needed
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SLOT_BYTES = 4096
+DEFAULT_SIZE = 1000
+RING_FILE = 'slow_queries.ring'
+PLANS_DIR = 'plans'
+EXPLAIN_QUEUE_SIZE = 100
+_SKIP = ('EXPLAIN', 'SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+# Our own wrappers sit between the view and the database; they are not the caller
+_INSTRUMENTATION = tuple(
+    os.path.join('thryve_app', name) for name in ('slow_queries.py', 'timing.py', 'metrics.py', 'query_budget.py')
+)
+
+
+def log_dir():
+    return Path(getattr(settings, 'SLOW_QUERY_LOG_DIR', Path(settings.BASE_DIR) / '.slow_queries'))
+
+
+def shape_id(shape):
+    return hashlib.sha1(shape.encode()).hexdigest()[:12]
+
+
+def params_fingerprint(params):
+    return hashlib.sha1(repr(params).encode()).hexdigest()[:12]
+
+
+def project_frame(stack=None):
+    """'app/module.py:line in function' for the innermost frame in our own code."""
+    base = str(settings.BASE_DIR) + os.sep
+    for frame in reversed(stack if stack is not None else traceback.extract_stack()):
+        filename = frame.filename
+        if (filename.startswith(base) and 'site-packages' not in filename
+                and not filename.endswith(_INSTRUMENTATION)):
+            return f"{os.path.relpath(filename, base)}:{frame.lineno} in {frame.name}"
+    return None
+
+
+class SlowQueryRecorder:
+    """connection.execute_wrapper that keeps queries slower than `threshold` seconds."""
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            if elapsed >= self.threshold and not sql.lstrip().upper().startswith(_SKIP):
+                self.slow.append({
+                    'ms': round(elapsed * 1000, 2),
+                    'sql': sql,
+                    'params': None if many else params,
+                    'frame': project_frame(),
+                })
+
+
+def _lock(f, exclusive):
+    # Released when the file is closed
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+
+def _slot(entry):
+    """The entry as one fixed-width slot, shortening the SQL if it does not fit."""
+    data = json.dumps(entry, cls=DjangoJSONEncoder).encode()
+    while len(data) >= SLOT_BYTES:
+        entry = {**entry, 'sql': entry['sql'][:len(entry['sql']) - (len(data) - SLOT_BYTES) - 16] + '...'}
+        data = json.dumps(entry, cls=DjangoJSONEncoder).encode()
+    return data.ljust(SLOT_BYTES - 1) + b'\n'
+
+
+def append(entries, size=None):
+    """Write entries into the ring, overwriting the oldest once it is full."""
+    size = size or getattr(settings, 'SLOW_QUERY_LOG_SIZE', DEFAULT_SIZE)
+    directory = log_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    fd = os.open(directory / RING_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+    with os.fdopen(fd, 'r+b') as f:
+        _lock(f, exclusive=True)
+        # Slot 0 holds the sequence number of the next entry
+        sequence = int(f.read(SLOT_BYTES).strip() or 0)
+        for entry in entries:
+            f.seek((1 + sequence % size) * SLOT_BYTES)
+            f.write(_slot({'seq': sequence, **entry}))
+            sequence += 1
+        f.seek(0)
+        f.write(str(sequence).encode().ljust(SLOT_BYTES - 1) + b'\n')
+
+
+def read():
+    """Every entry still in the ring, oldest first, with its EXPLAIN plan if captured."""
+    path = log_dir() / RING_FILE
+    if not path.exists():
+        return []
+    with open(path, 'rb') as f:
+        _lock(f, exclusive=False)
+        f.seek(SLOT_BYTES)
+        slots = f.read()
+    entries = []
+    for start in range(0, len(slots), SLOT_BYTES):
+        data = slots[start:start + SLOT_BYTES].strip()
+        if data:
+            entries.append(json.loads(data))
+    for entry in entries:
+        entry['plan'] = explain_plan(entry['shape_id'])
+    return sorted(entries, key=lambda entry: entry['seq'])
+
+
+def clear():
+    for path in [log_dir() / RING_FILE, *(log_dir() / PLANS_DIR).glob('*.txt')]:
+        path.unlink(missing_ok=True)
+
+
+def explain_plan(shape):
+    path = log_dir() / PLANS_DIR / f'{shape}.txt'
+    return path.read_text() if path.exists() else None
+
+
+def explain_slow_query(shape, sql, params):
+    """Store the EXPLAIN output of one slow query shape."""
+    # A savepoint, so a failing EXPLAIN cannot break the request's transaction
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+        # One text column on PostgreSQL; SQLite's detail is the last column
+        plan = '\n'.join(str(row[-1]) for row in cursor.fetchall())
+    directory = log_dir() / PLANS_DIR
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / f'{shape}.txt').write_text(plan + '\n')
+
+
+def _explain_once(entry, params):
+    """EXPLAIN shapes that have no plan yet and that no other worker is capturing."""
+    shape = entry['shape_id']
+    if params is None or explain_plan(shape) is not None:
+        return
+    if not caches['shared'].add(f'slow-query-explain:{shape}', True, timeout=60 * 60):
+        return
+    try:
+        explain_slow_query(shape, entry['sql'], params)
+    except Exception:
+        # The request already succeeded; a missing plan must not turn it into a 500
+        logger.warning("Could not EXPLAIN slow query %s", shape, exc_info=True)
+
+
+_explain_queue = queue.Queue(maxsize=EXPLAIN_QUEUE_SIZE)
+_explainer = None
+_explainer_lock = threading.Lock()
+
+
+def _run_explainer():
+    while True:
+        entry, params = _explain_queue.get()
+        try:
+            _explain_once(entry, params)
+        finally:
+            # The thread's own connection; shapes are rare enough not to keep it open
+            connection.close()
+            _explain_queue.task_done()
+
+
+def explain_later(entry, params):
+    """Queue `entry` for the explainer thread, starting it on first use."""
+    global _explainer
+    with _explainer_lock:
+        if _explainer is None or not _explainer.is_alive():
+            _explainer = threading.Thread(target=_run_explainer, name='thryve-explain', daemon=True)
+            _explainer.start()
+    try:
+        _explain_queue.put_nowait((entry, params))
+    except queue.Full:
+        pass
+
+
+def wait_for_explains():
+    """Block until every queued EXPLAIN has been stored (for tests)."""
+    _explain_queue.join()
+
+
+class SlowQueryMiddleware:
+    def __init__(self, get_response):
+        threshold_ms = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', 0)
+        if not threshold_ms:
+            raise MiddlewareNotUsed
+        self.threshold = threshold_ms / 1000
+        self.explain = getattr(settings, 'SLOW_QUERY_EXPLAIN', True)
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = SlowQueryRecorder(self.threshold)
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        if not recorder.slow:
+            return response
+
+        # Written after the response so logging never runs between a query and its fetch
+        match = getattr(request, 'resolver_match', None)
+        now = datetime.now(dt_timezone.utc).isoformat(timespec='seconds')
+        entries = []
+        for query in recorder.slow:
+            shape = sql_shape(query['sql'])
+            entries.append({
+                'at': now,
+                'ms': query['ms'],
+                'view': match.view_name if match else None,
+                'frame': query['frame'],
+                'shape_id': shape_id(shape),
+                'params': params_fingerprint(query['params']),
+                'sql': shape,
+            })
+        append(entries)
+        if self.explain:
+            for entry, query in zip(entries, recorder.slow):
+                explain_later({**entry, 'sql': query['sql']}, query['params'])
+        return response
@@ -1,3 +1,1000 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection, models
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from auth_app.models import CustomUser
+from booking_app.models import BookingRequest
+from profile_app.models import UserProfile
+from .activity import compact_activity_events, record_activity, recent_activity
+from .dashboard import DashboardSummary
+from .jobs import enqueue, run_pending, MAX_ATTEMPTS
+from . import cache_tags, metrics, profiling, slow_queries, views
+from .cache_backends import FileBasedCache, isolated_caches
+from .models import ActivityEvent, BackgroundJob, Listing, ListingImage, ConnectionRequest
+from .query_budget import QueryBudgetTestMixin, QueryRecorder
+from .widgets import WIDGETS
+from .management.commands import bench
+from .management.commands.explain_hot_queries import sequential_scans
+
+CALLS = []
+
+
+def record_call(value):
+    CALLS.append(value)
+
+
+def always_fail():
+    raise RuntimeError('boom')
+
+
+# Uploads and page renders stay on the local disk (no Cloudinary, no
+# collectstatic) and caches are throwaway copies under the same directory
+MEDIA_ROOT = tempfile.mkdtemp()
+LOCAL_STORAGE = override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    STORAGES={
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    },
+    CACHES=isolated_caches(os.path.join(MEDIA_ROOT, 'cache')),
+)
+
+
+class BackgroundJobTest(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_enqueued_job_runs_and_is_removed(self):
+        """Test the worker runs a queued job and deletes it on success"""
+        enqueue(record_call, value=42)
+        self.assertEqual(BackgroundJob.objects.count(), 1)
+
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(CALLS, [42])
+        self.assertFalse(BackgroundJob.objects.exists())
+
+    def test_failing_job_is_retried_then_marked_failed(self):
+        """Test a failing job is rescheduled and eventually marked failed"""
+        job = enqueue(always_fail)
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'queued')
+        self.assertEqual(job.attempts, 1)
+
+        BackgroundJob.objects.filter(pk=job.pk).update(attempts=MAX_ATTEMPTS - 1, run_after=job.created_at)
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+
+    @override_settings(BACKGROUND_JOBS_EAGER=True)
+    def test_eager_mode_runs_after_commit(self):
+        """Test eager mode calls the function on commit without a job row"""
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue(record_call, value='now')
+        self.assertEqual(CALLS, ['now'])
+        self.assertFalse(BackgroundJob.objects.exists())
+
+
+class DashboardSummaryTest(TestCase):
+    def setUp(self):
+        caches[settings.TAGGED_CACHE].clear()
+        self.owner = CustomUser.objects.create_user(
+            email='owner@example.com', password='testpass123',
+            first_name='Owner', last_name='O', company_name='Owner Co'
+        )
+        self.booker = CustomUser.objects.create_user(
+            email='booker@example.com', password='testpass123',
+            first_name='Booker', last_name='B', company_name='Booker Co'
+        )
+        self.listing = Listing.objects.create(
+            user=self.owner, listing_type='sale', title='Drill', description='A sturdy power drill',
+            your_name='Owner O', company='Owner Co', location='Cebu'
+        )
+        Listing.objects.create(
+            user=self.owner, listing_type='sale', title='Saw', description='A sold circular saw',
+            your_name='Owner O', company='Owner Co', location='Cebu', is_available=False
+        )
+        ConnectionRequest.objects.create(sender=self.booker, receiver=self.owner)
+
+    def _book(self, status='pending'):
+        return BookingRequest.objects.create(
+            listing=self.listing, sender=self.booker, receiver=self.owner,
+            proposed_start_date=date(2030, 1, 1), proposed_end_date=date(2030, 1, 2), status=status
+        )
+
+    def test_summary_counts(self):
+        """Test the summary aggregates bookings, listings and connection requests"""
+        self._book()
+        self._book(status='completed')
+        self.assertEqual(DashboardSummary(self.booker).as_dict(), {
+            'total_bookings': 2,
+            'active_listings': 0,
+            'pending_booking_requests': 1,
+            'connection_requests': 0,
+        })
+        self.assertEqual(DashboardSummary(self.owner).as_dict()['active_listings'], 1)
+        self.assertEqual(DashboardSummary(self.owner).as_dict()['connection_requests'], 1)
+
+    def test_summary_is_cached_until_a_relevant_write(self):
+        """Test a cached summary is reused and recomputed after a booking changes"""
+        self.assertEqual(DashboardSummary(self.booker).as_dict()['total_bookings'], 0)
+        with self.assertNumQueries(0):
+            DashboardSummary(self.booker).as_dict()
+
+        booking = self._book()
+        self.assertEqual(DashboardSummary(self.booker).as_dict()['pending_booking_requests'], 1)
+
+        booking.status = 'cancelled'
+        booking.save()
+        self.assertEqual(DashboardSummary(self.booker).as_dict()['pending_booking_requests'], 0)
+
+    def test_dashboard_widgets_use_summary(self):
+        """Test the dashboard widgets render the cached activity summary and recent bookings"""
+        self._book()
+        self.client.force_login(self.booker)
+        response = self.client.get(reverse('thryve_app:dashboard_widget', args=['activity_summary']))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['activity_summary']['total_bookings'], 1)
+        response = self.client.get(reverse('thryve_app:dashboard_widget', args=['recent_bookings']))
+        self.assertEqual(response.context['recent_bookings'][0]['item'], 'Drill')
+
+
+class DashboardWidgetTest(TestCase):
+    def setUp(self):
+        caches[settings.TAGGED_CACHE].clear()
+        self.user = CustomUser.objects.create_user(email='widgets@example.com', password='testpass123')
+        self.client.force_login(self.user)
+
+    def _widget(self, name, **params):
+        return self.client.get(reverse('thryve_app:dashboard_widget', args=[name]), params)
+
+    def test_shell_renders_without_widget_queries(self):
+        """Test the dashboard shell only links the widgets instead of rendering them"""
+        response = self.client.get(reverse('thryve_app:dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('user_listings', response.context)
+        for name in ('recent_bookings', 'marketplace_updates', 'activity_summary', 'my_listings'):
+            self.assertContains(response, reverse('thryve_app:dashboard_widget', args=[name]))
+
+    def test_unknown_widget_is_404(self):
+        """Test requesting an unknown widget returns 404"""
+        self.assertEqual(self._widget('nope').status_code, 404)
+
+    def test_widget_is_cached_until_a_relevant_write(self):
+        """Test a rendered widget is served from cache and re-rendered after the user's listings change"""
+        self.assertContains(self._widget('my_listings'), 'No listings yet')
+        with CaptureQueriesContext(connection) as cached:
+            self._widget('my_listings')
+        self.assertFalse(any('thryve_app_listing' in query['sql'] for query in cached.captured_queries))
+
+        Listing.objects.create(
+            user=self.user, listing_type='sale', title='Fresh Lamp', description='Desc',
+            your_name='Owner', company='Co', location='Cebu'
+        )
+        self.assertContains(self._widget('my_listings'), 'Fresh Lamp')
+
+
+@LOCAL_STORAGE
+class ListingQueryBudgetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = CustomUser.objects.create_user(email='seller@example.com', password='pass12345')
+        self.viewer = CustomUser.objects.create_user(email='buyer@example.com', password='pass12345')
+
+    def _add_listings(self, user, count):
+        for i in range(count):
+            listing = Listing.objects.create(
+                user=user, listing_type='sale', title=f'Item {i}', description='Desc',
+                your_name='Owner', company='Co', location='Cebu'
+            )
+            ListingImage.objects.create(listing=listing, image='listings/a.jpg', is_main=True)
+            ListingImage.objects.create(listing=listing, image='listings/b.jpg')
+
+    def _count_queries(self, url):
+        for alias in settings.CACHES:
+            caches[alias].clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_dashboard_queries_do_not_grow_with_listings(self):
+        """Test My Listings and Marketplace updates cost the same queries for 1 or 10 listings"""
+        self.client.force_login(self.owner)
+        urls = [
+            reverse('thryve_app:dashboard_widget', args=[name])
+            for name in ('my_listings', 'marketplace_updates')
+        ]
+        self._add_listings(self.owner, 1)
+        self._add_listings(self.viewer, 1)
+        baseline = [self._count_queries(url) for url in urls]
+
+        self._add_listings(self.owner, 9)
+        self._add_listings(self.viewer, 9)
+        self.assertEqual([self._count_queries(url) for url in urls], baseline)
+
+    def test_marketplace_queries_do_not_grow_with_listings(self):
+        """Test the marketplace grid costs the same queries for 1 or 10 listings"""
+        self.client.force_login(self.viewer)
+        url = reverse('marketplace:home')
+        self._add_listings(self.owner, 1)
+        baseline = self._count_queries(url)
+
+        self._add_listings(self.owner, 9)
+        self.assertEqual(self._count_queries(url), baseline)
+
+    def test_marketplace_is_paginated(self):
+        """Test the marketplace renders one page of listings at a time"""
+        self.client.force_login(self.viewer)
+        self._add_listings(self.owner, 30)
+        response = self.client.get(reverse('marketplace:home'), {'page': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['listings'].number, 2)
+        self.assertEqual(len(response.context['listings'].object_list), 6)
+
+
+class ActivityEventTest(TestCase):
+    def setUp(self):
+        caches[settings.TAGGED_CACHE].clear()
+        self.owner = CustomUser.objects.create_user(
+            email='owner@example.com', password='testpass123',
+            first_name='Owner', last_name='O', company_name='Owner Co'
+        )
+        self.booker = CustomUser.objects.create_user(
+            email='booker@example.com', password='testpass123',
+            first_name='Booker', last_name='B', company_name='Booker Co'
+        )
+        self.listing = Listing.objects.create(
+            user=self.owner, listing_type='sale', title='Drill', description='A sturdy power drill',
+            your_name='Owner O', company='Owner Co', location='Cebu'
+        )
+
+    def _ajax_post(self, url, data=None):
+        return self.client.post(url, data or {}, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+
+    def test_booking_flow_is_logged_for_both_parties(self):
+        """Test booking requests and status changes append events for sender and receiver"""
+        self.client.force_login(self.booker)
+        self._ajax_post(reverse('create_booking_request_api'), {
+            'listing_id': self.listing.pk, 'start_date': '2030-01-01', 'end_date': '2030-01-02',
+        })
+        booking = BookingRequest.objects.get()
+        self.client.force_login(self.owner)
+        self._ajax_post(reverse('schedule_booking_request', args=[booking.pk]))
+
+        self.assertEqual(
+            [event['summary'] for event in recent_activity(self.owner)],
+            ['You scheduled the booking for Drill', 'Booker Co requested to book Drill'],
+        )
+        self.assertEqual(
+            [event['summary'] for event in recent_activity(self.booker)],
+            ['Owner Co scheduled the booking for Drill', 'You requested to book Drill'],
+        )
+
+    def test_recent_activity_widget_reads_the_log(self):
+        """Test the Recent Activity widget renders logged events and refreshes after new ones"""
+        self.client.force_login(self.owner)
+        url = reverse('thryve_app:dashboard_widget', args=['recent_activity'])
+        self.assertContains(self.client.get(url), 'No recent activity')
+
+        record_activity('listing.created', self.owner, {self.owner.pk: 'You listed Drill'}, target_id=self.listing.pk)
+        self.assertContains(self.client.get(url), 'You listed Drill')
+
+    def test_compaction_drops_expired_events(self):
+        """Test the retention job deletes only events older than the retention window"""
+        record_activity('listing.created', self.owner, {self.owner.pk: 'Old'})
+        record_activity('listing.updated', self.owner, {self.owner.pk: 'New'})
+        ActivityEvent.objects.filter(summary='Old').update(created_at=timezone.now() - timedelta(days=91))
+
+        with override_settings(ACTIVITY_RETENTION_DAYS=90):
+            self.assertEqual(compact_activity_events(batch_size=1), 1)
+        self.assertEqual(list(ActivityEvent.objects.values_list('summary', flat=True)), ['New'])
+
+
+@LOCAL_STORAGE
+class MediaLifecycleTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='media@example.com', password='testpass123')
+        self.profile = UserProfile.objects.get(user=self.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def _upload(self, name):
+        return SimpleUploadedFile(name, b'GIF89a', content_type='image/gif')
+
+    def test_save_without_file_change_is_a_single_update(self):
+        """Test saving a profile no longer reloads the row to compare avatars"""
+        profile = UserProfile.objects.get(pk=self.profile.pk)
+        with self.assertNumQueries(1):
+            profile.tagline = 'Hello'
+            profile.save()
+
+    def test_replaced_avatar_is_deleted_by_the_worker(self):
+        """Test the old avatar is deleted by a background job after it is replaced"""
+        self.profile.avatar = self._upload('old.gif')
+        self.profile.save()
+        old_name = self.profile.avatar.name
+
+        profile = UserProfile.objects.get(pk=self.profile.pk)
+        profile.avatar = self._upload('new.gif')
+        profile.save()
+        self.assertTrue(default_storage.exists(old_name))
+
+        call_command('run_worker', once=True)
+        self.assertFalse(default_storage.exists(old_name))
+        self.assertTrue(default_storage.exists(profile.avatar.name))
+
+    def test_deleted_listing_image_is_removed(self):
+        """Test deleting a listing schedules deletion of its image files"""
+        listing = Listing.objects.create(
+            user=self.user, listing_type='sale', title='Lamp', description='Desc',
+            your_name='Owner', company='Co', location='Cebu'
+        )
+        image = ListingImage.objects.create(listing=listing, image=self._upload('lamp.gif'), is_main=True)
+        listing.delete()
+
+        call_command('run_worker', once=True)
+        self.assertFalse(default_storage.exists(image.image.name))
+
+    def test_sweeper_deletes_only_unreferenced_files(self):
+        """Test sweep_orphaned_media removes files no row points to"""
+        self.profile.avatar = self._upload('kept.gif')
+        self.profile.save()
+        orphan = default_storage.save('business_logo/orphan.gif', self._upload('orphan.gif'))
+
+        call_command('sweep_orphaned_media', min_age=0, stdout=StringIO())
+        self.assertFalse(default_storage.exists(orphan))
+        self.assertTrue(default_storage.exists(self.profile.avatar.name))
+
+    def test_sweeper_skips_files_of_unknown_age(self):
+        """Test files are kept when the storage cannot say how old they are"""
+        orphan = default_storage.save('business_logo/undated.gif', self._upload('undated.gif'))
+        with patch.object(default_storage, 'get_modified_time', side_effect=NotImplementedError):
+            call_command('sweep_orphaned_media', min_age=0, stdout=StringIO())
+        self.assertTrue(default_storage.exists(orphan))
+
+    @override_settings(STORAGES={
+        'default': {'BACKEND': 'cloudinary_storage.storage.MediaCloudinaryStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    })
+    def test_sweeper_dates_cloudinary_uploads_from_their_metadata(self):
+        """Test a storage without get_modified_time still honours --min-age through Cloudinary's created_at"""
+        UserProfile.objects.filter(pk=self.profile.pk).update(avatar='media/avatars/kept')
+        day_ago = (timezone.now() - timedelta(days=1)).strftime('%Y-%m-%dT%H:%M:%SZ')
+        just_now = timezone.now().strftime('%Y-%m-%dT%H:%M:%SZ')
+        uploads = {'media/avatars/': [
+            {'public_id': 'media/avatars/kept', 'created_at': day_ago, 'tags': ['media']},
+            {'public_id': 'media/avatars/orphan', 'created_at': day_ago, 'tags': ['media']},
+            {'public_id': 'media/avatars/in-flight', 'created_at': just_now, 'tags': ['media']},
+            {'public_id': 'media/avatars/not-ours', 'created_at': day_ago, 'tags': []},
+        ]}
+
+        def resources(prefix, **options):
+            return {'resources': uploads.get(prefix, [])}
+
+        with patch('cloudinary.api.resources', side_effect=resources), \
+                patch('cloudinary.uploader.destroy', return_value={'result': 'ok'}) as destroy:
+            call_command('sweep_orphaned_media', min_age=60, stdout=StringIO())
+        self.assertEqual([call.args[0] for call in destroy.call_args_list], ['media/avatars/orphan'])
+
+    def test_file_still_used_by_another_row_is_kept(self):
+        """Test deleting one of two rows sharing a file name leaves the file for the other"""
+        listing = Listing.objects.create(
+            user=self.user, listing_type='sale', title='Lamp', description='Desc',
+            your_name='Owner', company='Co', location='Cebu'
+        )
+        image = ListingImage.objects.create(listing=listing, image=self._upload('shared.gif'), is_main=True)
+        ListingImage.objects.create(listing=listing, image=image.image.name)
+        image.delete()
+
+        call_command('run_worker', once=True)
+        self.assertTrue(default_storage.exists(image.image.name))
+
+
+class ExplainHotQueriesTest(TestCase):
+    def test_sequential_scans_are_detected_in_both_plan_formats(self):
+        """Test full table scans are flagged for PostgreSQL and SQLite plans, index walks are not"""
+        postgres = (
+            "Limit  (cost=0.29..1.53 rows=24 width=120)\n"
+            "  ->  Seq Scan on thryve_app_listing  (cost=0.00..18.50 rows=850 width=120)"
+        )
+        sqlite = (
+            "5 0 0 SCAN thryve_app_listing USING INDEX listing_created_idx\n"
+            "9 0 0 SCAN booking_app_bookingrequest\n"
+            "12 0 0 SCAN CONSTANT ROW"
+        )
+        self.assertEqual(sequential_scans(postgres), ['thryve_app_listing'])
+        self.assertEqual(sequential_scans(sqlite), ['booking_app_bookingrequest'])
+
+    def test_hot_queries_use_indexes(self):
+        """Test no view's main query scans a whole table"""
+        user = CustomUser.objects.create_user(
+            email='explain@example.com', password='testpass123',
+            first_name='Ex', last_name='Plain', company_name='Explain Co'
+        )
+        Listing.objects.create(
+            user=user, listing_type='sale', title='Drill', description='A drill',
+            your_name='Ex Plain', company='Explain Co', location='Cebu'
+        )
+        out = StringIO()
+        call_command('explain_hot_queries', fail_on_seq_scan=True, stdout=out)
+        self.assertIn('0 of', out.getvalue())
+
+
+@LOCAL_STORAGE
+class SeedScaleTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def _seed(self, seed):
+        call_command(
+            'seed_scale', users=20, listings=40, bookings=60, posts=30, likes=100, comments=20,
+            seed=seed, batch_size=7, stdout=StringIO(),
+        )
+        domain = f'@{seed}.seed.thryve.test'
+        return (
+            list(CustomUser.objects.filter(email__endswith=domain).order_by('pk').values_list('company_name', flat=True)),
+            list(Listing.objects.filter(user__email__endswith=domain).order_by('pk').values_list('title', 'created_at__date')),
+        )
+
+    def test_seeds_every_table_with_consistent_counters(self):
+        """Test the seeder fills each table and stores post counters matching the like and comment rows"""
+        self._seed(1)
+        self.assertEqual(CustomUser.objects.count(), 20)
+        self.assertEqual(UserProfile.objects.count(), 20)
+        self.assertEqual(Listing.objects.count(), 40)
+        self.assertTrue(ListingImage.objects.exists())
+        self.assertTrue(default_storage.exists(ListingImage.objects.first().image.name))
+        self.assertTrue(BookingRequest.objects.exclude(status='pending').exists())
+        self.assertFalse(BookingRequest.objects.filter(sender=models.F('receiver')).exists())
+
+        out = StringIO()
+        call_command('reconcile_post_counters', dry_run=True, stdout=out)
+        self.assertTrue(out.getvalue().startswith('0 post(s)'))
+
+    def test_same_seed_gives_same_data(self):
+        """Test two runs with the same seed generate the same rows"""
+        first = self._seed(7)
+        CustomUser.objects.all().delete()
+        self.assertEqual(self._seed(7), first)
+
+    def test_refuses_to_seed_twice(self):
+        """Test seeding the same seed twice into one database is rejected"""
+        self._seed(3)
+        with self.assertRaises(CommandError):
+            self._seed(3)
+
+
+class BenchTest(TestCase):
+    def test_targets_cover_routes_without_logging_out(self):
+        """Test the bench GETs every widget and fills URL arguments, but never logs out or streams"""
+        user = CustomUser.objects.create_user(email='bench@example.com', password='testpass123')
+        urls = dict(bench.targets(user))
+        self.assertIn('marketplace:home', urls)
+        self.assertEqual(urls['public_business_profile'], reverse('public_business_profile', args=[user.pk]))
+        self.assertTrue(all(f'thryve_app:dashboard_widget[{name}]' in urls for name in WIDGETS))
+        self.assertNotIn('logout', urls)
+        self.assertNotIn('live_app:events', urls)
+        # No listing yet, so there is nothing to edit
+        self.assertNotIn('thryve_app:edit_listing', urls)
+
+    def test_compare_flags_slower_views_and_extra_queries(self):
+        """Test regressions need both the relative and absolute slowdown, and any extra query counts"""
+        def result(view, wall_ms, queries):
+            return {'size': 100, 'view': view, 'persona': 'heavy', 'wall_ms': wall_ms, 'queries': queries}
+
+        baseline = {'results': [result('a', 10, 5), result('b', 10, 5), result('c', 1, 5), result('d', 10, 5)]}
+        current = [result('a', 15, 5), result('b', 10, 6), result('c', 1.5, 5), result('d', 10, 5), result('e', 3, 1)]
+        rows, regressions = bench.compare(current, baseline, threshold=0.2, min_delta_ms=2)
+
+        self.assertEqual(regressions, 2)
+        self.assertEqual([flags for _, _, flags in rows], [['slower'], ['more queries'], [], [], []])
+        self.assertIsNone(rows[-1][1])
+
+    def test_bench_and_tests_use_their_own_shared_cache(self):
+        """Test cleared caches never include the shared cache in the repository tree"""
+        repo_cache = os.path.join(settings.BASE_DIR, '.cache')
+        self.assertFalse(str(settings.CACHES['shared']['LOCATION']).startswith(repo_cache))
+        isolated = isolated_caches('/tmp/bench-cache')
+        self.assertEqual(isolated['shared']['LOCATION'], os.path.join('/tmp/bench-cache', 'shared'))
+        self.assertEqual(isolated['default'], settings.CACHES['default'])
+
+
+@LOCAL_STORAGE
+class QueryBudgetTest(QueryBudgetTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command('seed_scale', users=30, seed=5, stdout=StringIO())
+        # user0 owns most of the seeded listings, bookings and connections
+        cls.user = CustomUser.objects.get(email='user0@5.seed.thryve.test')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        for alias in settings.CACHES:
+            caches[alias].clear()
+        self.client.force_login(self.user)
+
+    def test_views_stay_within_their_budgets(self):
+        """Test every budgeted page stays within its declared budget without repeated queries"""
+        listing = Listing.objects.filter(user=self.user).first()
+        urls = [
+            reverse('thryve_app:dashboard'),
+            reverse('thryve_app:connections'),
+            reverse('thryve_app:browse_businesses'),
+            reverse('thryve_app:edit_listing', args=[listing.pk]),
+            reverse('bookings'),
+            reverse('marketplace:home'),
+            reverse('community_app:community_feed'),
+            reverse('business_profile'),
+            reverse('profile_customization'),
+            reverse('public_business_profile', args=[self.user.pk]),
+        ] + [reverse('thryve_app:dashboard_widget', args=[name]) for name in WIDGETS]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertWithinQueryBudget(url)
+
+    def test_repeated_query_shapes_are_reported(self):
+        """Test the recorder flags a query run once per row, whatever the parameters"""
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            for listing in Listing.objects.all()[:4]:
+                listing.user.company_name
+            list(Listing.objects.filter(pk__in=[1, 2, 3]))
+            list(Listing.objects.filter(pk__in=[4, 5]))
+
+        # The two IN lists share one shape: listings, users, listings by pk
+        self.assertEqual(len(recorder.shapes), 3)
+        problems = recorder.problems(budget=4)
+        self.assertIn('7 queries, budget is 4', problems[0])
+        self.assertIn('same query 4 times', problems[1])
+        self.assertEqual(len(problems), 2)
+
+    def test_middleware_logs_blown_budget_and_sets_header(self):
+        """Test the development middleware warns about an over-budget view"""
+        with override_settings(QUERY_BUDGET_ENABLED=True):
+            client = Client()
+            client.force_login(self.user)
+            with self.assertLogs('thryve_app.query_budget', level='WARNING') as logs, \
+                    patch.object(views.connections, 'query_budget', 1):
+                response = client.get(reverse('thryve_app:connections'))
+        self.assertIn('budget is 1', logs.output[0])
+        self.assertGreater(int(response['X-Query-Count']), 1)
+
+
+@LOCAL_STORAGE
+class RequestTimingTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='timing@example.com', password='testpass123')
+        listing = Listing.objects.create(
+            user=self.user, listing_type='sale', title='Drill', description='A drill',
+            your_name='Tim', company='Timing Co', location='Cebu'
+        )
+        ListingImage.objects.create(listing=listing, image='listings/drill.jpg', is_main=True)
+
+    def _get(self, sample_rate):
+        with override_settings(REQUEST_TIMING_SAMPLE_RATE=sample_rate):
+            client = Client()
+            client.force_login(self.user)
+            return client.get(reverse('marketplace:home'))
+
+    def test_sampled_request_gets_breakdown_header_and_log_line(self):
+        """Test a timed request reports exclusive db/template/storage/view buckets adding up to the total"""
+        with self.assertLogs('thryve_app.timing', level='INFO') as logs:
+            response = self._get(1)
+
+        header = response['Server-Timing']
+        for bucket in ('db;dur=', 'template;dur=', 'storage;dur=', 'view;dur=', 'total;dur='):
+            self.assertIn(bucket, header)
+
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line['view'], 'marketplace:home')
+        self.assertEqual(line['status'], 200)
+        self.assertGreater(line['queries'], 0)
+        self.assertGreater(line['storage_ms'], 0)
+        parts = line['db_ms'] + line['template_ms'] + line['storage_ms'] + line['view_ms']
+        self.assertAlmostEqual(parts, line['total_ms'], delta=0.1)
+
+    def test_unsampled_requests_are_untouched(self):
+        """Test requests are not timed when sampling is off"""
+        self.assertNotIn('Server-Timing', self._get(0))
+
+
+@LOCAL_STORAGE
+@override_settings(PROFILING_TOKEN='secret', PROFILING_INTERVAL=0.0005)
+class ProfilingTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='profile@example.com', password='testpass123')
+        profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, profile_dir, ignore_errors=True)
+        self.enterContext(self.settings(PROFILING_DIR=profile_dir))
+        self.client.force_login(self.user)
+
+    def test_token_header_profiles_request_per_view(self):
+        """Test a request sending the token is sampled and filed under its view name"""
+        self.client.get(reverse('marketplace:home'))
+        self.assertEqual(profiling.load(), {})
+
+        self.client.get(reverse('marketplace:home'), headers={'X-Thryve-Profile': 'secret'})
+        requests, stacks = profiling.load()['marketplace:home']
+        self.assertEqual(requests, 1)
+        self.assertTrue(any('marketplace_app.views:marketplace_home' in stack for stack in stacks))
+        # Cut at the middleware: no server or outer middleware frames
+        self.assertFalse(any('ProfilingMiddleware' in stack for stack in stacks))
+
+        out = StringIO()
+        call_command('profile_report', view='marketplace:home', top=5, stdout=out)
+        self.assertIn('marketplace:home: 1 request(s)', out.getvalue())
+
+    def test_wrong_token_is_not_profiled(self):
+        """Test a header or cookie that is not the token does not profile the request"""
+        self.client.get(reverse('marketplace:home'), headers={'X-Thryve-Profile': 'secre'})
+        self.client.cookies[profiling.COOKIE] = 'secret-but-longer'
+        self.client.get(reverse('marketplace:home'))
+        self.assertEqual(profiling.load(), {})
+
+    def test_samples_are_merged_into_one_line_per_stack(self):
+        """Test repeated requests add to existing stack counts instead of growing the file"""
+        for _ in range(3):
+            profiling.record('bookings', {'a:view;b:render': 2, 'a:view': 1})
+        profiling.record('bookings', {'a:view;c:query': 1})
+        with open(profiling._view_path('bookings')) as f:
+            self.assertEqual(
+                f.read(), '# bookings 4\na:view 3\na:view;b:render 6\na:view;c:query 1\n'
+            )
+        self.assertEqual(profiling.load()['bookings'][0], 4)
+
+    def test_top_functions_and_collapsed_output(self):
+        """Test self and total samples are derived from collapsed stacks"""
+        stacks = {'a:view;b:render': 3, 'a:view;c:query': 1, 'a:view': 1}
+        self.assertEqual(profiling.top_functions(stacks, 2), [('a:view', 1, 5), ('b:render', 3, 3)])
+        self.assertEqual(profiling.collapsed(stacks), 'a:view 1\na:view;b:render 3\na:view;c:query 1\n')
+
+    def test_report_endpoint_is_staff_only(self):
+        """Test only staff can read profiles, as a table or as collapsed stacks"""
+        profiling.record('bookings', {'booking_app.views:bookings': 2})
+        url = reverse('thryve_app:profiling')
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        self.user.is_staff = True
+        self.user.save()
+        self.assertContains(self.client.get(url), 'bookings: 1 request(s), 2 sample(s)')
+        response = self.client.get(url, {'view': 'bookings', 'format': 'collapsed'})
+        self.assertEqual(response.content.decode(), 'booking_app.views:bookings 2\n')
+
+
+@LOCAL_STORAGE
+@override_settings(METRICS_ENABLED=True, METRICS_TOKEN='scrape', METRICS_FLUSH_INTERVAL=0)
+class MetricsTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='metrics@example.com', password='testpass123')
+        self.metrics_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.metrics_dir, ignore_errors=True)
+        self.enterContext(self.settings(METRICS_DIR=self.metrics_dir))
+        self.enterContext(patch.object(metrics, 'registry', metrics.Registry()))
+
+    def test_histograms_add_up_across_process_files(self):
+        """Test each worker's file is summed and histogram buckets are cumulative"""
+        for latency in (0.003, 0.2, 30):
+            worker = metrics.Registry()
+            worker.observe(metrics.REQUEST_DURATION, ('bookings', 'GET', '200'), latency)
+            worker.inc(metrics.CACHE_REQUESTS, ('shared', 'hit'))
+            worker.flush(self.metrics_dir)
+
+        text = metrics.render(metrics.collect(self.metrics_dir))
+        labels = 'view="bookings",method="GET",status="200"'
+        self.assertIn(f'thryve_http_request_duration_seconds_bucket{{{labels},le="0.005"}} 1', text)
+        self.assertIn(f'thryve_http_request_duration_seconds_bucket{{{labels},le="0.25"}} 2', text)
+        self.assertIn(f'thryve_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 3', text)
+        self.assertIn(f'thryve_http_request_duration_seconds_count{{{labels}}} 3', text)
+        self.assertIn('thryve_cache_requests_total{cache="shared",result="hit"} 3', text)
+
+    def test_requests_are_measured_and_exposed_to_staff_or_scraper(self):
+        """Test a page view shows up in the exposition, which needs staff or the bearer token"""
+        enqueue(record_call, value=1)
+        self.client.force_login(self.user)
+        self.client.get(reverse('marketplace:home'))
+
+        url = reverse('thryve_app:metrics')
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.get(url, headers={'Authorization': 'Bearer wrong'}).status_code, 404)
+        text = self.client.get(url, headers={'Authorization': 'Bearer scrape'}).content.decode()
+
+        self.assertIn('thryve_http_request_duration_seconds_count'
+                      '{view="marketplace:home",method="GET",status="200"} 1', text)
+        self.assertIn('thryve_db_queries_per_request_count{view="marketplace:home"} 1', text)
+        self.assertIn('thryve_db_query_duration_seconds_count{statement="select"}', text)
+        self.assertIn('thryve_cache_requests_total{cache="shared",result="hit"}', text)
+        self.assertIn('thryve_cache_hit_ratio{cache="shared"}', text)
+        self.assertIn('thryve_background_jobs{status="queued"} 1', text)
+
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_unknown_methods_share_one_label(self):
+        """Test client-chosen HTTP methods are recorded as 'other' instead of adding series"""
+        self.client.generic('FOOBAR', reverse('marketplace:home'))
+        text = self.client.get(reverse('thryve_app:metrics'), headers={'Authorization': 'Bearer scrape'}).content.decode()
+        self.assertNotIn('FOOBAR', text)
+        self.assertIn('method="other"', text)
+
+
+@LOCAL_STORAGE
+@override_settings(SLOW_QUERY_THRESHOLD_MS=0.0001)
+class SlowQueryLogTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='slow@example.com', password='testpass123')
+        log_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, log_dir, ignore_errors=True)
+        self.enterContext(self.settings(SLOW_QUERY_LOG_DIR=log_dir))
+        caches['shared'].clear()
+
+    def test_slow_queries_are_logged_with_view_caller_and_plan(self):
+        """Test a slow query records its view and project frame, and its shape gets EXPLAINed off the request"""
+        self.client.force_login(self.user)
+        explained_on = []
+        explain = slow_queries.explain_slow_query
+
+        def record_thread(*args):
+            explained_on.append(threading.current_thread())
+            explain(*args)
+
+        with patch.object(slow_queries, 'explain_slow_query', side_effect=record_thread):
+            self.client.get(reverse('bookings'))
+            slow_queries.wait_for_explains()
+        self.assertTrue(explained_on)
+        self.assertNotIn(threading.current_thread(), explained_on)
+
+        entries = [entry for entry in slow_queries.read() if entry['view'] == 'bookings']
+        self.assertTrue(entries)
+        # Plans are captured in-process: no job payload ever holds the parameters
+        self.assertFalse(BackgroundJob.objects.exists())
+        self.assertTrue(any(entry['frame'].startswith('booking_app/views.py:') for entry in entries))
+        self.assertTrue(all(entry['plan'] for entry in entries if entry['sql'].startswith('SELECT')))
+
+        out = StringIO()
+        call_command('slow_queries', view='bookings', summary=True, plans=True, stdout=out)
+        self.assertIn('booking_app/views.py:', out.getvalue())
+
+    def test_ring_keeps_only_the_newest_entries(self):
+        """Test the ring overwrites its oldest slots and shortens SQL that does not fit a slot"""
+        entry = {'at': 'now', 'ms': 1.0, 'view': None, 'frame': None, 'shape_id': 'abc', 'params': 'def'}
+        slow_queries.append([{**entry, 'sql': f'SELECT {i}'} for i in range(4)], size=3)
+        slow_queries.append([{**entry, 'sql': 'SELECT ' + 'x' * 10000}], size=3)
+
+        entries = slow_queries.read()
+        self.assertEqual([e['seq'] for e in entries], [2, 3, 4])
+        self.assertEqual(entries[0]['sql'], 'SELECT 2')
+        self.assertTrue(entries[-1]['sql'].endswith('...'))
+
+    def test_failed_explain_does_not_raise(self):
+        """Test an EXPLAIN that fails (here on a Decimal parameter and a missing table) is only logged"""
+        entry = {'shape_id': 'broken', 'sql': 'SELECT price FROM no_such_table WHERE price = %s'}
+        with self.assertLogs('thryve_app.slow_queries', level='WARNING'):
+            slow_queries._explain_once(entry, [Decimal('9.50')])
+        self.assertIsNone(slow_queries.explain_plan('broken'))
+
+
+class CacheTagsTest(TestCase):
+    def setUp(self):
+        caches[settings.TAGGED_CACHE].clear()
+        self.user = CustomUser.objects.create_user(email='tags@example.com', password='testpass123')
+        self.listing = Listing.objects.create(
+            user=self.user, listing_type='sale', title='Lamp', description='Desc',
+            your_name='Owner', company='Co', location='Cebu'
+        )
+
+    def test_value_is_reused_until_one_of_its_tags_is_bumped(self):
+        """Test a cached value survives unrelated bumps and is recomputed after a tagged write"""
+        calls = []
+
+        @cache_tags.cached(key=lambda listing: f'title:{listing.pk}', tags=lambda listing: [f'listing:{listing.pk}'])
+        def title(listing):
+            calls.append(listing.pk)
+            return Listing.objects.get(pk=listing.pk).title
+
+        self.assertEqual(title(self.listing), 'Lamp')
+        cache_tags.bump('listing:0', f'user:{self.user.pk}:bookings')
+        self.assertEqual(title(self.listing), 'Lamp')
+        self.assertEqual(len(calls), 1)
+
+        self.listing.title = 'Desk Lamp'
+        self.listing.save()  # post_save bumps listing:<pk>
+        self.assertEqual(title(self.listing), 'Desk Lamp')
+        self.assertEqual(len(calls), 2)
+
+    def test_concurrent_misses_compute_once(self):
+        """Test callers missing the same key wait for the first one instead of computing again"""
+        calls, results = [], []
+
+        def slow_compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'facets'
+
+        def read():
+            results.append(cache_tags.get_or_set('facets', slow_compute, ['listing']))
+
+        threads = [threading.Thread(target=read) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['facets'] * 4)
+        self.assertEqual(len(calls), 1)
+
+    def test_file_cache_add_is_exclusive(self):
+        """Test only one of several concurrent add() calls on the shared file cache wins"""
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        file_cache = FileBasedCache(cache_dir, {})
+        won = []
+        threads = [
+            threading.Thread(target=lambda: won.append(file_cache.add('lock', True, 60)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(won.count(True), 1)
+
+
+@LOCAL_STORAGE
+class FragmentCacheTest(TestCase):
+    def setUp(self):
+        caches[settings.FRAGMENT_CACHE].clear()
+        self.owner = CustomUser.objects.create_user(email='seller@example.com', password='pass12345')
+        self.booker = CustomUser.objects.create_user(email='booker@example.com', password='pass12345')
+        self.other = CustomUser.objects.create_user(email='other@example.com', password='pass12345')
+        self.listing = Listing.objects.create(
+            user=self.owner, listing_type='sale', title='Oak Desk', description='Desc',
+            your_name='Owner', company='Co', location='Cebu'
+        )
+        ListingImage.objects.create(listing=self.listing, image='listings/a.jpg', is_main=True)
+
+    def test_cached_cards_skip_image_queries(self):
+        """Test a second marketplace view renders its cards from cache without loading images"""
+        self.client.force_login(self.booker)
+        url = reverse('marketplace:home')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertContains(response, 'listings/a.jpg')
+        self.assertFalse(any('thryve_app_listingimage' in query['sql'] for query in queries))
+
+        ListingImage.objects.create(listing=self.listing, image='listings/b.jpg')
+        self.assertContains(self.client.get(url), 'listings/b.jpg')
+
+    def test_card_follows_edits_and_viewer_booking_status(self):
+        """Test an edited listing gets a new card while the booking badge stays per viewer"""
+        url = reverse('marketplace:home')
+        self.client.force_login(self.other)
+        self.client.get(url)
+        BookingRequest.objects.create(
+            listing=self.listing, sender=self.booker, receiver=self.owner,
+            proposed_start_date=date(2030, 1, 1), proposed_end_date=date(2030, 1, 2),
+        )
+        self.listing.title = 'Walnut Desk'
+        self.listing.save()
+
+        response = self.client.get(url)
+        self.assertContains(response, 'Walnut Desk')
+        self.assertNotContains(response, 'Request Pending')
+        self.client.force_login(self.booker)
+        response = self.client.get(url)
+        self.assertContains(response, 'Request Pending')
+        self.assertNotContains(response, '<!--viewer:')
+
+    def test_booking_rows_follow_their_listing(self):
+        """Test booking rows are rendered again when the booked listing changes"""
+        BookingRequest.objects.create(
+            listing=self.listing, sender=self.booker, receiver=self.owner,
+            proposed_start_date=date(2030, 1, 1), proposed_end_date=date(2030, 1, 2),
+        )
+        self.client.force_login(self.booker)
+        self.assertContains(self.client.get(reverse('bookings')), 'Oak Desk')
+        self.listing.title = 'Walnut Desk'
+        self.listing.save()
+        response = self.client.get(reverse('bookings'))
+        self.assertContains(response, 'Walnut Desk')
+        self.assertNotContains(response, 'Oak Desk')
+
+
+@LOCAL_STORAGE
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        caches[settings.TAGGED_CACHE].clear()
+        self.owner = CustomUser.objects.create_user(email='seller@example.com', password='pass12345')
+        self.booker = CustomUser.objects.create_user(email='booker@example.com', password='pass12345')
+        self.listing = Listing.objects.create(
+            user=self.owner, listing_type='sale', title='Oak Desk', description='Desc',
+            your_name='Owner', company='Co', location='Cebu'
+        )
+        BookingRequest.objects.create(
+            listing=self.listing, sender=self.booker, receiver=self.owner,
+            proposed_start_date=date(2030, 1, 1), proposed_end_date=date(2030, 1, 2),
+        )
+        self.client.force_login(self.booker)
+
+    def _etag(self, url):
+        self.client.get(url)  # sets the CSRF cookie the ETag depends on
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        self.assertTrue(response.has_header('Last-Modified'))
+        return response['ETag']
+
+    def test_unchanged_marketplace_answers_304_without_listing_queries(self):
+        """Test a matching ETag skips the marketplace queries and a listing write changes it"""
+        url = reverse('marketplace:home')
+        etag = self._etag(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(any('thryve_app_listing' in query['sql'] for query in queries))
+        self.assertNotEqual(self._etag(url + '?q=desk'), etag)
+
+        self.listing.title = 'Walnut Desk'
+        self.listing.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_bookings_revalidate_until_a_booked_listing_changes(self):
+        """Test the bookings page answers 304 until a booking or its listing changes"""
+        url = reverse('bookings')
+        etag = self._etag(url)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Renaming does not bump the booker's tags, only the listing's updated_at
+        Listing.objects.filter(pk=self.listing.pk).update(title='Walnut Desk', updated_at=timezone.now())
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Walnut Desk')
+
+    def test_pending_form_errors_are_always_rendered(self):
+        """Test a page with errors kept in the session is never answered with 304"""
+        url = reverse('marketplace:home')
+        etag = self._etag(url)
+        session = self.client.session
+        session['show_create_modal'] = True
+        session.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_per_process_tag_cache_disables_validators(self):
+        """Test pages are sent uncached without an ETag while tag versions are local to each worker"""
+        url = reverse('marketplace:home')
+        with override_settings(CACHES={
+            **settings.CACHES,
+            'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tags-locmem'},
+        }):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+        self.assertIn('no-store', response['Cache-Control'])
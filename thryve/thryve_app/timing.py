@@ -0,0 +1,140 @@
+"""
+Per-request timing breakdown.
+
+RequestTimingMiddleware times a sample of requests (REQUEST_TIMING_SAMPLE_RATE,
+0 disables it) and splits the wall time into exclusive buckets:
+
+    db       SQL, via connection.execute_wrapper
+    template Django template rendering, minus the SQL and URLs inside it
+    storage  FieldFile.url, i.e. media URL generation by the storage backend
+    view     everything else: view code, forms, middleware
+
+The buckets add up to the total. Each sampled response gets a Server-Timing
+header (visible in the browser's network panel) and one JSON line on the
+`thryve_app.timing` logger. Unsampled requests only pay for a random() call
+and a context variable lookup in the patched functions.
+"""
+import json
+import logging
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.db.models.fields.files import FieldFile
+from django.template.backends.django import Template
+
+logger = logging.getLogger(__name__)
+
+BUCKETS = ('db', 'template', 'storage', 'view')
+
+_current = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """Charges elapsed time to whichever bucket is innermost, so buckets never overlap."""
+
+    def __init__(self):
+        self.totals = dict.fromkeys(BUCKETS, 0.0)
+        self.queries = 0
+        self._stack = ['view']
+        self._started = self._last = time.perf_counter()
+
+    def _switch(self):
+        now = time.perf_counter()
+        self.totals[self._stack[-1]] += now - self._last
+        self._last = now
+
+    def enter(self, bucket):
+        self._switch()
+        self._stack.append(bucket)
+
+    def exit(self):
+        self._switch()
+        self._stack.pop()
+
+    def finish(self):
+        self._switch()
+        return self._last - self._started
+
+
+def timed(bucket, func, *args, **kwargs):
+    """Call func, charging its time to `bucket` if this request is being timed."""
+    timings = _current.get()
+    if timings is None:
+        return func(*args, **kwargs)
+    timings.enter(bucket)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        timings.exit()
+
+
+def _time_queries(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is not None:
+        timings.queries += 1
+    return timed('db', execute, sql, params, many, context)
+
+
+_installed = False
+
+
+def _install():
+    """Wrap template rendering and media URL generation (once per process)."""
+    global _installed
+    if _installed:
+        return
+    _installed = True
+
+    render = Template.render
+    Template.render = lambda self, *args, **kwargs: timed('template', render, self, *args, **kwargs)
+
+    url = FieldFile.url.fget
+    FieldFile.url = property(lambda self: timed('storage', url, self))
+
+
+def server_timing(durations, queries):
+    parts = [f'{bucket};dur={durations[bucket]:.1f}' for bucket in BUCKETS]
+    parts[0] += f';desc="{queries} queries"'
+    parts.append(f"total;dur={durations['total']:.1f}")
+    return ', '.join(parts)
+
+
+class RequestTimingMiddleware:
+    def __init__(self, get_response):
+        self.sample_rate = getattr(settings, 'REQUEST_TIMING_SAMPLE_RATE', 0)
+        if not self.sample_rate:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        _install()
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            with connection.execute_wrapper(_time_queries):
+                response = self.get_response(request)
+            total = timings.finish()
+        finally:
+            _current.reset(token)
+
+        durations = {bucket: seconds * 1000 for bucket, seconds in timings.totals.items()}
+        durations['total'] = total * 1000
+        response['Server-Timing'] = server_timing(durations, timings.queries)
+
+        match = getattr(request, 'resolver_match', None)
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'queries': timings.queries,
+            **{f'{bucket}_ms': round(ms, 2) for bucket, ms in durations.items()},
+        }))
+        return response
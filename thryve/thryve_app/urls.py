@@ -5,6 +5,7 @@ app_name = 'thryve_app'
 
 urlpatterns = [
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('dashboard/widgets/<slug:name>/', views.dashboard_widget, name='dashboard_widget'),
     path('connections/', views.connections, name='connections'),
     path('browse-businesses/', views.browse_businesses, name='browse_businesses'),
     path('send-connection-request/', views.send_connection_request, name='send_connection_request'),
@@ -14,4 +15,6 @@ urlpatterns = [
     path('remove-connection/', views.remove_connection, name='remove_connection'),
     path('edit-listing/<int:listing_id>/', views.edit_listing, name='edit_listing'),
     path('delete-listing/<int:listing_id>/', views.delete_listing, name='delete_listing'),
+    path('profiling/', views.profiling_report, name='profiling'),
+    path('metrics/', views.metrics_exposition, name='metrics'),
 ]
\ No newline at end of file
@@ -1,6 +1,10 @@
+import hmac
+
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse, JsonResponse
 from django.db.models import Q
 from django.contrib import messages
 from django.core.exceptions import ValidationError
@@ -8,59 +12,18 @@ from django.core.exceptions import ValidationError
 from marketplace_app.forms import ListingForm, validate_images_count, validate_image_file
 from marketplace_app.views import LISTING_TYPES
 from thryve_app.models import Listing, ListingImage
+from .activity import display_name, record_activity
+from . import metrics, profiling
 from .models import Connection, ConnectionRequest
-from booking_app.models import BookingRequest
+from .query_budget import query_budget
+from .widgets import WIDGETS, render_widget
 
 
 @login_required(login_url='login')
+@query_budget(5)
 def dashboard(request):
-    # Get user's recent bookings (5 most recent)
-    recent_bookings_qs = BookingRequest.objects.filter(
-        sender=request.user
-    ).select_related('listing').order_by('-created_at')[:5]
-    
-    recent_bookings = []
-    for booking in recent_bookings_qs:
-        recent_bookings.append({
-            'item': booking.listing.title,
-            'date': f"{booking.proposed_start_date.strftime('%m/%d/%Y')} – {booking.proposed_end_date.strftime('%m/%d/%Y')}",
-            'status': booking.status
-        })
-
-    # Get user's active listings (real data)
-    user_active_listings = Listing.objects.filter(user=request.user, is_available=True)
-    active_listings = []
-    for listing in user_active_listings:
-        active_listings.append({
-            'title': listing.title,
-            'type': dict(Listing.LISTING_TYPE_CHOICES).get(listing.listing_type, listing.listing_type).title(),
-            'other': listing.category_display,
-            'status': 'available' if listing.is_available else 'unavailable',
-        })
-
-    # Get recent marketplace updates (5 most recent listings excluding user's own)
-    marketplace_updates = Listing.objects.exclude(user=request.user).order_by('-created_at')[:5]
-
-    # Get incoming connection requests count
-    incoming_connection_requests_count = ConnectionRequest.objects.filter(
-        receiver=request.user,
-        status='pending'
-    ).count()
-
-    # Activity summary counts
-    total_bookings_count = BookingRequest.objects.filter(sender=request.user).count()
-    pending_bookings_count = BookingRequest.objects.filter(sender=request.user, status='pending').count()
-    
-    activity_summary = {
-        'total_bookings': total_bookings_count,
-        'active_listings': user_active_listings.count(),
-        'pending_booking_requests': pending_bookings_count,
-        'connection_requests': incoming_connection_requests_count
-    }
-
-    # Get all user's listings for the "My Listings" section
-    user_listings = Listing.objects.filter(user=request.user).order_by('-created_at')
-
+    # Only the page shell is rendered here; every widget is loaded from
+    # dashboard_widget in parallel by the browser (see thryve_app.widgets)
     category_dropdown_data = []
 
     # Loop through the main categories defined in your Model
@@ -76,17 +39,25 @@ def dashboard(request):
         })
 
     context = {
-        'recent_bookings': recent_bookings,
-        'active_listings': active_listings,
-        'marketplace_updates': marketplace_updates,
-        'activity_summary': activity_summary,
-        'user_listings': user_listings,
+        'listings_page': request.GET.get('listings_page', ''),
         'categories': Listing.get_categories_dict(),
     }
 
     return render(request, 'thryve_app/dashboard.html', context)
 
+
 @login_required(login_url='login')
+@query_budget(8)
+async def dashboard_widget(request, name):
+    """Render one dashboard widget as an HTML fragment."""
+    if name not in WIDGETS:
+        raise Http404('Unknown widget')
+    user = await request.auser()
+    html = await sync_to_async(render_widget)(name, user, request.GET)
+    return HttpResponse(html)
+
+@login_required(login_url='login')
+@query_budget(10)
 def connections(request):
     # Get user's connections
     user_connections = Connection.objects.filter(
@@ -121,6 +92,7 @@ def connections(request):
     return render(request, 'thryve_app/connections.html', context)
 
 @login_required(login_url='login')
+@query_budget(8)
 def browse_businesses(request):
     from django.contrib.auth import get_user_model
     User = get_user_model()
@@ -132,22 +104,14 @@ def browse_businesses(request):
     businesses = User.objects.exclude(id=request.user.id)
 
     # Get connected users
-    connected_user_ids = set()
-    for conn in Connection.objects.filter(Q(user1=request.user) | Q(user2=request.user)):
-        if conn.user1 == request.user:
-            connected_user_ids.add(conn.user2.id)
-        else:
-            connected_user_ids.add(conn.user1.id)
+    connected_user_ids = Connection.connected_user_ids(request.user)
 
-    # Get users with pending requests (sent or received)
+    # Get users with pending requests (sent or received), by id only
     pending_user_ids = set()
-    for req in ConnectionRequest.objects.filter(
+    for sender_id, receiver_id in ConnectionRequest.objects.filter(
         (Q(sender=request.user) | Q(receiver=request.user)) & Q(status='pending')
-    ):
-        if req.sender == request.user:
-            pending_user_ids.add(req.receiver.id)
-        else:
-            pending_user_ids.add(req.sender.id)
+    ).values_list('sender_id', 'receiver_id'):
+        pending_user_ids.add(receiver_id if sender_id == request.user.pk else sender_id)
 
     # Exclude connected and pending users
     exclude_ids = connected_user_ids.union(pending_user_ids)
@@ -199,6 +163,10 @@ def send_connection_request(request):
                 receiver=receiver,
                 message=message if message else None
             )
+            record_activity('connection.requested', request.user, {
+                request.user.pk: f"You sent a connection request to {display_name(receiver)}",
+                receiver.pk: f"{display_name(request.user)} sent you a connection request",
+            })
             return JsonResponse({'success': True, 'message': f'Connection request sent successfully to {receiver.get_full_name()}.', 'receiver_name': receiver.get_full_name()})
         except User.DoesNotExist:
             return JsonResponse({'success': False, 'message': 'User not found.'})
@@ -222,6 +190,10 @@ def accept_connection_request(request):
             # Update request status
             connection_request.status = 'accepted'
             connection_request.save()
+            record_activity('connection.accepted', request.user, {
+                request.user.pk: f"You connected with {display_name(connection_request.sender)}",
+                connection_request.sender_id: f"{display_name(request.user)} accepted your connection request",
+            })
 
             return JsonResponse({
                 'success': True,
@@ -245,6 +217,9 @@ def decline_connection_request(request):
             sender_name = connection_request.sender.get_full_name()
             # Delete the request entirely to allow future requests
             connection_request.delete()
+            record_activity('connection.declined', request.user, {
+                request.user.pk: f"You declined a connection request from {display_name(connection_request.sender)}",
+            })
 
             return JsonResponse({
                 'success': True,
@@ -291,6 +266,9 @@ def remove_connection(request):
             other_user_name = other_user.get_full_name()
             # Delete the connection
             connection.delete()
+            record_activity('connection.removed', request.user, {
+                request.user.pk: f"You removed your connection with {display_name(other_user)}",
+            })
             # Also delete any connection requests between these users
             ConnectionRequest.objects.filter(
                 (Q(sender=request.user) & Q(receiver=other_user)) |
@@ -308,6 +286,7 @@ def remove_connection(request):
 
 
 @login_required(login_url='login')
+@query_budget(6)
 def edit_listing(request, listing_id):
     listing = get_object_or_404(Listing, id=listing_id, user=request.user)
 
@@ -369,6 +348,9 @@ def edit_listing(request, listing_id):
                     messages.error(request, str(e))
                     return redirect('thryve_app:dashboard')
 
+            record_activity('listing.updated', request.user, {
+                request.user.pk: f"You updated {listing.title}",
+            }, target_id=listing.pk)
             messages.success(request, 'Your listing has been updated successfully!')
             return redirect('thryve_app:dashboard')
         else:
@@ -397,6 +379,37 @@ def delete_listing(request, listing_id):
     """Delete a listing from dashboard"""
     listing = get_object_or_404(Listing, id=listing_id, user=request.user)
     if request.method == 'POST':
+        title, listing_pk = listing.title, listing.pk
         listing.delete()
+        record_activity('listing.deleted', request.user, {
+            request.user.pk: f"You deleted {title}",
+        }, target_id=listing_pk)
         messages.success(request, 'Your listing has been deleted successfully!')
     return redirect('thryve_app:dashboard')
+
+
+@login_required(login_url='login')
+def profiling_report(request):
+    """Staff only: sampled profiles per view (?view= to pick one, ?format=collapsed for flame graphs)."""
+    if not request.user.is_staff:
+        raise Http404
+    profiles = profiling.load(request.GET.get('view') or None)
+    if request.GET.get('format') == 'collapsed':
+        body = ''.join(profiling.collapsed(stacks) for _, stacks in profiles.values())
+    else:
+        try:
+            limit = int(request.GET.get('top', 20))
+        except ValueError:
+            limit = 20
+        body = profiling.report(profiles, limit) or 'No profiles recorded yet.\n'
+    return HttpResponse(body, content_type='text/plain; charset=utf-8')
+
+
+def metrics_exposition(request):
+    """Prometheus metrics, for staff or a scraper sending `Authorization: Bearer <METRICS_TOKEN>`."""
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    authorization = request.headers.get('Authorization', '')
+    scraper = bool(token) and hmac.compare_digest(authorization, f'Bearer {token}')
+    if not scraper and not request.user.is_staff:
+        raise Http404
+    return HttpResponse(metrics.exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,93 @@
+"""
+Dashboard widgets.
+
+The dashboard view only renders the page shell; each widget below is fetched
+from its own endpoint (views.dashboard_widget), so the browser loads them
+concurrently and the first byte no longer waits for every widget's queries.
+
+Rendered widget HTML is cached per user. Widgets built from the user's own
+bookings, listings, connection requests and activity events are tagged with
+them (thryve_app.cache_tags), and thryve_app.signals and record_activity bump
+those tags on every relevant write; the others simply expire after a short
+timeout. Within My Listings each row is its own fragment
+(thryve_app.fragments), so editing one listing only renders that row again.
+"""
+from django.template.loader import render_to_string
+
+from booking_app.models import BookingRequest
+from . import cache_tags
+from .activity import recent_activity
+from .dashboard import DashboardSummary
+from .fragments import render_fragments
+from .listings import DASHBOARD_PAGE_SIZE, marketplace_updates, paginate_listings, prefetch_images
+from .models import Listing
+
+CACHE_TIMEOUT = 5 * 60
+# Other users' listings do not bump our version, so keep this one short
+UPDATES_CACHE_TIMEOUT = 60
+
+
+def _recent_bookings(user, params):
+    bookings = BookingRequest.objects.filter(sender=user).order_by('-created_at').values(
+        'listing__title', 'proposed_start_date', 'proposed_end_date', 'status'
+    )[:5]
+    return {
+        'recent_bookings': [
+            {
+                'item': booking['listing__title'],
+                'date': f"{booking['proposed_start_date'].strftime('%m/%d/%Y')} – {booking['proposed_end_date'].strftime('%m/%d/%Y')}",
+                'status': booking['status'],
+            }
+            for booking in bookings
+        ]
+    }
+
+
+def _marketplace_updates(user, params):
+    return {'marketplace_updates': marketplace_updates(user)}
+
+
+# Not read from ActivityEvent: the summary is lifetime totals and current state
+# (active listings, pending requests), while events are transitions that
+# compact_activity_events drops after ACTIVITY_RETENTION_DAYS. Counting them
+# would undercount old accounts and double-count status changes, so this stays
+# on DashboardSummary's cached aggregates, bumped by the same writes.
+def _activity_summary(user, params):
+    return {'activity_summary': DashboardSummary(user).as_dict()}
+
+
+def _recent_activity(user, params):
+    return {'recent_activity': recent_activity(user)}
+
+
+def _my_listings(user, params):
+    listings = paginate_listings(
+        Listing.objects.filter(user=user).order_by('-created_at'), params.get('listings_page'), DASHBOARD_PAGE_SIZE,
+    )
+    # Desktop table row and mobile card
+    rows = render_fragments('thryve_app/fragments/my_listing_row.html', listings, 'listing', prepare=prefetch_images)
+    cards = render_fragments('thryve_app/fragments/my_listing_card.html', listings, 'listing')
+    for listing, row, card in zip(listings, rows, cards):
+        listing.row, listing.card = row, card
+    return {'user_listings': listings}
+
+
+# name -> (context loader, cache tags for a user id, timeout)
+WIDGETS = {
+    'recent_bookings': (_recent_bookings, lambda user_id: [f'user:{user_id}:bookings'], CACHE_TIMEOUT),
+    'marketplace_updates': (_marketplace_updates, lambda user_id: [], UPDATES_CACHE_TIMEOUT),
+    'activity_summary': (_activity_summary, DashboardSummary.tags, CACHE_TIMEOUT),
+    'recent_activity': (_recent_activity, lambda user_id: [f'user:{user_id}:activity'], CACHE_TIMEOUT),
+    'my_listings': (_my_listings, lambda user_id: [f'user:{user_id}:listings'], CACHE_TIMEOUT),
+}
+
+
+def render_widget(name, user, params):
+    """Return the widget's HTML, from cache when possible. Raises KeyError for unknown widgets."""
+    loader, tags, timeout = WIDGETS[name]
+    page = params.get('listings_page', '') if name == 'my_listings' else ''
+    return cache_tags.get_or_set(
+        f'dashboard-widget:{name}:{user.pk}:{page[:10]}',
+        lambda: render_to_string(f'thryve_app/widgets/{name}.html', loader(user, params)),
+        tags(user.pk), timeout,
+    )